@@ -3,6 +3,8 @@ import sys
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp_pool import MCPSessionPool
+from mcp_manifest import load_context, prompt_from_manifest, tools_from_manifest
 
 load_dotenv()
 
@@ -12,6 +14,12 @@ if sys.platform == "win32":
 
 BASE_DIR = Path(__file__).resolve().parent
 SERVER_PATH = BASE_DIR / "Resources" / "2.1_mcp_server.py"
+MANIFEST_PATH = BASE_DIR / ".cache" / "local_server_manifest.json"
+RESPONSES_PATH = BASE_DIR / ".cache" / "responses.sqlite3"
+
+sys.path.append(str(BASE_DIR.parents[1] / "Essentials"))
+from response_cache import ResponseCache
+from agent_trace import trace_config
 
 def build_client() -> MultiServerMCPClient :
     return MultiServerMCPClient(
@@ -24,26 +32,22 @@ def build_client() -> MultiServerMCPClient :
         }
     )
 
-async def fetch_mcp_context(client: MultiServerMCPClient):
-    print("Getting Tools ..")
-    tools = await client.get_tools()
-    print(tools)
-    
-    print("Getting Resoures ..")
-    resources = await client.get_resources("local_server")
-    print(resources)
-    
-    print("Getting Prompt")
-    prompt = await client.get_prompt("local_server","prompt")
-    print(prompt)
-    
-    return tools,prompt
+async def load_mcp_context(client: MultiServerMCPClient, pool: MCPSessionPool):
+    # build from the cached schemas right away, the servers are checked in the background
+    manifest, refresh = await load_context(client, MANIFEST_PATH, pool=pool)
+    tools = await tools_from_manifest(client, manifest, pool=pool)
+    prompt = prompt_from_manifest(manifest, "local_server", "prompt")
+    return tools, prompt, refresh
  
 from langchain.agents import create_agent
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-def build_agent(tools,prompt):
-    model = ChatGoogleGenerativeAI(model = "gemini-2.5-flash")
+def build_agent(tools,prompt,cache=None):
+    # repeated questions with the same tools and prompt skip the model call
+    model = ChatGoogleGenerativeAI(
+        model = "gemini-2.5-flash",
+        cache = cache or ResponseCache(str(RESPONSES_PATH)),
+    )
     agent = create_agent(
         model = model,
         tools = tools,
@@ -53,11 +57,12 @@ def build_agent(tools,prompt):
 from langchain.messages import HumanMessage
 
 async def run_agent(agent):
-    config = {
+    # AGENT_TRACE=trace.jsonl records node, model and tool timings
+    config = trace_config({
         "configurable" : {
             "thread_id" : "1"
         }
-    }
+    })
     response = await agent.ainvoke(
         {
             "messages" : [
@@ -73,13 +78,19 @@ async def run_agent(agent):
 async def main():
     
     client = build_client()
-    tools, prompt = await fetch_mcp_context(client)
-    agent = build_agent(tools,prompt)
-    
-    response = await run_agent(agent=agent)
-    from pprint import pprint
-    
-    pprint(response)
+    pool = MCPSessionPool(client)
+    try:
+        tools, prompt, refresh = await load_mcp_context(client, pool)
+        agent = build_agent(tools,prompt)
+        
+        response = await run_agent(agent=agent)
+        from pprint import pprint
+        
+        pprint(response)
+        if refresh and await refresh:
+            print("MCP manifest updated, the next run uses the new schemas")
+    finally:
+        await pool.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,11 +1,29 @@
 from dotenv import load_dotenv
 import sys
+from pathlib import Path
 load_dotenv()
 import asyncio
 #online mcp server
-from langchain_mcp_adapters.client import MultiServerMCPClient
-async def main():
-    client = MultiServerMCPClient(
+from mcp_fanout import MCPFanOut, ToolPolicy
+from mcp_pool import MCPSessionPool
+
+BASE_DIR = Path(__file__).resolve().parent
+SERVER_PATH = BASE_DIR / "Resources" / "2.1_mcp_server.py"
+
+# per tool deadlines, no hedging: every server is reached over one pooled session,
+# a duplicate goes down it to the same backend and does the same slow work again
+# (search_web even shares the running search), so it can't come back sooner
+POLICIES = {
+    "time": ToolPolicy(timeout=5),
+    "local_server": ToolPolicy(timeout=30),
+    "local_server:search_web": ToolPolicy(timeout=30),
+    "local_server:query_chinook": ToolPolicy(timeout=10),
+    "travel_server": ToolPolicy(timeout=60),
+    "travel_server:search-flight": ToolPolicy(timeout=60),
+}
+
+def build_fanout() -> MCPFanOut:
+    return MCPFanOut(
     {
         "time": {
             "transport": "stdio",
@@ -15,34 +33,55 @@ async def main():
                 "mcp_server_time",
                 "--local-timezone=Europe/Warsaw"
             ]
+        },
+        "local_server": {
+            "transport": "stdio",
+            "command": sys.executable,
+            "args": [str(SERVER_PATH)],
+        },
+        "travel_server": {
+            "transport": "streamable_http",
+            "url": "https://mcp.kiwi.com"
         }
-    }
+    },
+    policies = POLICIES,
 )
 
-    tools = await client.get_tools()
-
-    from langchain_google_genai import ChatGoogleGenerativeAI
-    from langchain.agents import create_agent
-    
-    model = ChatGoogleGenerativeAI(model = "gemini-2.5-flash")
-    
-    agent = create_agent(
-        model = model,
-        tools = tools
-    )
-    
-    from langchain.messages import HumanMessage
-    
-    question = HumanMessage("what time is it ?")
-    
-    response = await agent.ainvoke(
-        {
-            "messages" : [question]
-        }
-    )
-    
-    from pprint import pprint
-    pprint(response)
+async def main():
+    fanout = build_fanout()
+    # one session per server, shared by all the agent's tool calls
+    pool = MCPSessionPool(fanout.client)
+    try:
+        # all servers are asked at once, one that doesn't answer is left out
+        tools = await fanout.get_tools(pool)
+        for name, error in fanout.discovery_errors.items():
+            print(f"{name} left out: {error}")
+
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        from langchain.agents import create_agent
+
+        model = ChatGoogleGenerativeAI(model = "gemini-2.5-flash")
+
+        agent = create_agent(
+            model = model,
+            tools = tools
+        )
+
+        from langchain.messages import HumanMessage
+
+        question = HumanMessage("what time is it ?")
+
+        response = await agent.ainvoke(
+            {
+                "messages" : [question]
+            }
+        )
+
+        from pprint import pprint
+        pprint(response)
+        pprint(fanout.stats())
+    finally:
+        await pool.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -2,55 +2,161 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import asyncio
+import os
+import sqlite3
+import sys
+from pathlib import Path
 from mcp.server.fastmcp import FastMCP
 from tavily import TavilyClient
 from typing import Dict, Any
-from requests import get
+from search_cache import SearchCache, normalize_query
+from github_cache import CachedFetcher
+from sql_tool import ReadOnlyDB, QueryTimeout
+from sql_schema import SchemaCache
+from sql_advisor import QueryLog
+from handbook_rag import HandbookRetriever
+
+sys.path.append(str(Path(__file__).resolve().parents[3] / "Essentials"))
+from single_flight import SingleFlight
 
 
 mcp = FastMCP("mcp_server")
 
 tavily_client = TavilyClient()
 
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
+# repeated queries are answered from here instead of calling Tavily again
+# set SEARCH_CACHE_PATH="" to keep the cache in memory only
+search_cache = SearchCache(
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", 3600)),
+    max_size=int(os.getenv("SEARCH_CACHE_SIZE", 256)),
+    path=os.getenv("SEARCH_CACHE_PATH", str(CACHE_DIR / "search_cache.sqlite3")),
+)
+search_flight = SingleFlight(key=normalize_query)
+
 
 # Tool for searching the web
+# the search runs in a thread, so other calls are served meanwhile;
+# the same query asked by several sessions at once is sent to Tavily once
 @mcp.tool()
-def search_web(query: str) -> Dict[str, Any]:
+@search_flight.wrap
+async def search_web(query: str) -> Dict[str, Any]:
     """Search the web for information"""
 
-    results = tavily_client.search(query)
+    results = await asyncio.to_thread(search_cache.get_or_search, query, tavily_client.search)
 
     return results
 
 
+# read-only SQL over the bundled Chinook music store database
+# pooled mode=ro connections, results cached by normalized SQL
+# executed queries are logged with their plan for sql_advisor.py
+# set SQL_LOG_PATH="" to keep the log in memory only
+chinook = ReadOnlyDB(
+    pool_size=int(os.getenv("SQL_POOL_SIZE", 4)),
+    max_rows=int(os.getenv("SQL_MAX_ROWS", 1000)),
+    timeout=float(os.getenv("SQL_TIMEOUT", 2)),
+    log=QueryLog(os.getenv("SQL_LOG_PATH", str(CACHE_DIR / "sql_log.jsonl"))),
+)
+
+
+# sync tools would run on the server's event loop; in a thread, calls use the pool side by side
+@mcp.tool()
+async def query_chinook(sql: str, page: int = 1, page_size: int = 50) -> Dict[str, Any]:
+    """Run a read-only SQL query against the Chinook music store database (SQLite)
+
+    Results come back in pages of `page_size` rows; ask for the next page while has_more is true.
+    """
+    try:
+        return await asyncio.to_thread(chinook.page, sql, page=page, page_size=min(page_size, 500))
+    except QueryTimeout as e:
+        return {"error": f"{e}, add a LIMIT or a more selective WHERE"}
+    except (sqlite3.Error, ValueError) as e:
+        return {"error": str(e)}
+
+
+# retrieval over the AcmeCorp employee handbook, vectors kept in .cache/handbook_index
+# the PDF is ingested on the first search, unchanged pages are never embedded again
+handbook = HandbookRetriever(index_dir=str(CACHE_DIR / "handbook_index"))
+
+
+# in a thread too: the first search ingests the whole PDF
+@mcp.tool()
+async def search_handbook(query: str, k: int = 4) -> Dict[str, Any]:
+    """Search the AcmeCorp employee handbook (PTO, travel & expenses, conduct, NDA) for relevant passages"""
+    try:
+        return {"results": await asyncio.to_thread(handbook.search, query, k=min(k, 10))}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# Hit/miss counters of the search cache
+@mcp.resource("cache://search_web/stats")
+def search_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the search_web cache"""
+    return {**search_cache.stats(), "single_flight": search_flight.stats()}
+
+
+# Hit/miss counters of the SQL result cache
+@mcp.resource("cache://query_chinook/stats")
+def sql_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the query_chinook result cache"""
+    return chinook.stats()
+
+
+# shared pooled http client with a memory + disk cache of the fetched files
+github_fetcher = CachedFetcher(
+    cache_dir=str(CACHE_DIR / "github"),
+    max_age=float(os.getenv("GITHUB_CACHE_MAX_AGE", 300)),
+)
+
+
 # Resources - provide access to langchain-ai repo files
 @mcp.resource("github://langchain-ai/langchain-mcp-adapters/blob/main/README.md")
-def github_file():
+async def github_file():
     """
     Resource for accessing langchain-ai/langchain-mcp-adapters/README.md file
     """
     url = "https://raw.githubusercontent.com/langchain-ai/langchain-mcp-adapters/main/README.md"
     try:
-        import time
-        time.sleep(5)
-        resp = get(url)
-        return resp.text
+        return await github_fetcher.get(url)
     except Exception as e:
         return f"Error: {str(e)}"
 
 
+# tables, columns, keys and sample rows, computed once and cached on disk
+chinook_schema = SchemaCache(chinook, path=str(CACHE_DIR / "chinook_schema.json"))
+
+
+# Resource - schema of the Chinook database for writing query_chinook SQL
+@mcp.resource("schema://chinook")
+async def chinook_schema_summary() -> str:
+    """
+    Tables, columns, keys, indexes and sample rows of the Chinook database
+    """
+    return await asyncio.to_thread(chinook_schema.get)
+
+
 # Prompt template
 @mcp.prompt()
 def prompt():
-    """Analyze data from a langchain-ai repo file with comprehensive insights"""
+    """Answer questions about the langchain-ai repos, the Chinook data and the AcmeCorp handbook"""
     return """
-    You are a helpful assistant that answers user questions about LangChain, LangGraph and LangSmith.
+    You are a helpful assistant that answers user questions about LangChain, LangGraph and LangSmith,
+    about the Chinook music store data (artists, albums, tracks, customers, invoices)
+    and about the AcmeCorp employee handbook (PTO, travel & expenses, conduct, NDA).
 
     You can use the following tools/resources to answer user questions:
     - search_web: Search the web for information
     - github_file: Access the langchain-ai repo files
+    - query_chinook: Run read-only SQL on the Chinook music store database
+    - chinook_schema_summary: Tables and sample rows of the Chinook database, read it before writing SQL
+    - search_handbook: Search the AcmeCorp employee handbook
 
-    If the user asks a question that is not related to LangChain, LangGraph or LangSmith, you should say "I'm sorry, I can only answer questions about LangChain, LangGraph and LangSmith."
+    Answer Chinook questions with query_chinook and handbook questions with search_handbook, quoting the passages you used.
+    If the user asks a question that is not related to any of these, you should say "I'm sorry, I can only answer questions about LangChain, LangGraph, LangSmith, the Chinook music store data and the AcmeCorp employee handbook."
 
     You may try multiple tool and resource calls to answer the user's question.
 
@@ -0,0 +1,80 @@
+"""
+github_file latency: a cold fetch, a fresh body from memory, a stale body while it revalidates.
+
+    python bench_github_cache.py [delay_ms] [reads]
+
+A local server stands in for raw.githubusercontent.com and answers after
+`delay_ms`; the cached reads are repeated `reads` times.
+"""
+import asyncio
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from github_cache import CachedFetcher
+
+BODY = b"# langchain-mcp-adapters\n" * 200
+ETAG = '"readme-v1"'
+
+
+def serve(delay):
+    class SlowGithub(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowGithub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def timed(fetcher, url, reads):
+    samples = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        await fetcher.get(url)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+async def run(url, reads):
+    fresh = CachedFetcher()
+    cold = await timed(fresh, url, 1)
+    warm = await timed(fresh, url, reads)
+    await fresh.aclose()
+
+    stale = CachedFetcher(max_age=0)
+    await stale.get(url)
+    revalidating = await timed(stale, url, reads)
+    await stale.wait_for_refresh()
+    await stale.aclose()
+    return [("cold fetch", cold), ("fresh, from memory", warm), ("stale, revalidating", revalidating)]
+
+
+def main(delay_ms=300, reads=100):
+    server = serve(delay_ms / 1000)
+    url = f"http://127.0.0.1:{server.server_port}/README.md"
+    try:
+        rows = asyncio.run(run(url, reads))
+    finally:
+        server.shutdown()
+    print(f"server answers after {delay_ms} ms, {reads} cached reads\n")
+    for label, samples in rows:
+        print(f"{label:<22} median {statistics.median(samples):10.1f} µs  max {max(samples):10.1f} µs")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
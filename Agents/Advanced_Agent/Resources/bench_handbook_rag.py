@@ -0,0 +1,82 @@
+"""
+search_handbook: ingestion cost, recall on handbook questions and search latency.
+
+    python bench_handbook_rag.py [synthetic_chunks]
+
+Recall is measured on questions worded differently from the handbook. The
+latency run also searches a synthetic index of `synthetic_chunks` random
+vectors to show how the memory-mapped scan grows.
+"""
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from handbook_rag import HANDBOOK_PATH, HashingEmbedder, VectorIndex, chunk_page, extract_pages
+
+QUESTIONS = [
+    ("How many PTO days does a new hire get in the first year?", "Paid Time Off"),
+    ("How much vacation after three years at the company?", "Paid Time Off"),
+    ("Can unused PTO roll over to next year?", "Paid Time Off"),
+    ("Who approves a leave longer than a week?", "Paid Time Off"),
+    ("Do I book time off in the HR system?", "Paid Time Off"),
+    ("How soon do I submit receipts after a trip?", "Travel & Expense"),
+    ("Is first-class travel reimbursed?", "Travel & Expense"),
+    ("Are hotel and meals covered on business travel?", "Travel & Expense"),
+    ("Can I expense personal purchases on a trip?", "Travel & Expense"),
+    ("Can I tell a friend about unreleased features?", "Non-Disclosure"),
+    ("Do confidentiality obligations end when I leave the company?", "Non-Disclosure"),
+    ("Is customer data confidential?", "Non-Disclosure"),
+    ("What happens if someone harasses a colleague?", "Workplace Conduct"),
+    ("Is verbal abuse at work allowed?", "Workplace Conduct"),
+    ("What behavior is expected from employees at work?", "Workplace Conduct"),
+    ("Can I misuse company systems?", "Workplace Conduct"),
+]
+
+
+def timed(fn, *args, repeat=1):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return result, samples
+
+
+def main(synthetic=100_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(f"{tmp}/index", HashingEmbedder())
+        stats, cold = timed(index.ingest, str(HANDBOOK_PATH))
+        _, warm = timed(index.ingest, str(HANDBOOK_PATH))
+        print(f"ingest: cold {cold[0]:.1f} ms ({stats['chunks']} chunks), unchanged {warm[0]:.1f} ms")
+
+        for k in (1, 3):
+            found = sum(section in " ".join(hit["text"] for hit in index.search(q, k)) for q, section in QUESTIONS)
+            print(f"recall@{k}: {found}/{len(QUESTIONS)} = {found / len(QUESTIONS):.2f}")
+
+        _, samples = timed(lambda: [index.search(q, 3) for q, _ in QUESTIONS], repeat=50)
+        per_query = [s * 1e3 / len(QUESTIONS) for s in samples]
+        print(f"search, {len(index.chunks)} chunks: median {statistics.median(per_query):.1f} us per query")
+
+        # a larger corpus: the handbook chunks plus random unit vectors
+        embedder = index.embedder
+        rng = np.random.default_rng(0)
+        filler = rng.standard_normal((synthetic, embedder.dim), dtype=np.float32)
+        filler /= np.linalg.norm(filler, axis=1, keepdims=True)
+        texts = chunk_page(extract_pages(str(HANDBOOK_PATH))[0])
+        vectors = np.concatenate([embedder.embed(texts), filler])
+        big = VectorIndex(f"{tmp}/big", embedder)
+        big._write([{"text": t, "page": 1, "hash": str(i), "source": ""} for i, t in enumerate(texts + [""] * synthetic)], vectors)
+
+        _, samples = timed(lambda: big.search(QUESTIONS[0][0], 3), repeat=30)
+        print(
+            f"search, {len(big.chunks)} chunks ({vectors.nbytes / 2**20:.0f} MiB mapped): "
+            f"median {statistics.median(samples):.1f} ms  p95 {statistics.quantiles(samples, n=20)[-1]:.1f} ms"
+        )
+        assert "Paid Time Off" in big.search(QUESTIONS[0][0], 1)[0]["text"]
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
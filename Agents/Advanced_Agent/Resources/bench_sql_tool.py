@@ -0,0 +1,74 @@
+"""
+query_chinook latency: a new connection per query vs the pool vs the result cache.
+
+    python bench_sql_tool.py [queries]
+
+Runs a mix of agent-style queries against the bundled Chinook.db. The cached
+run repeats the mix, as an agent does when it pages or retries.
+"""
+import sqlite3
+import statistics
+import sys
+import time
+
+from sql_tool import CHINOOK_PATH, ReadOnlyDB
+
+QUERIES = [
+    ("SELECT Name FROM Artist WHERE ArtistId = ?", lambda i: (i % 275 + 1,)),
+    ("SELECT Title FROM Album WHERE ArtistId = ? ORDER BY Title", lambda i: (i % 275 + 1,)),
+    ("SELECT COUNT(*), SUM(UnitPrice) FROM InvoiceLine WHERE InvoiceId = ?", lambda i: (i % 412 + 1,)),
+    (
+        "SELECT g.Name, COUNT(*) FROM Track t JOIN Genre g ON g.GenreId = t.GenreId "
+        "GROUP BY g.Name ORDER BY 2 DESC LIMIT 5",
+        lambda i: (),
+    ),
+    (
+        "SELECT c.Country, ROUND(SUM(i.Total), 2) FROM Invoice i JOIN Customer c ON c.CustomerId = i.CustomerId "
+        "WHERE c.Country = ? GROUP BY c.Country",
+        lambda i: (["USA", "Canada", "Brazil", "France", "Germany"][i % 5],),
+    ),
+]
+
+
+def workload(n):
+    return [(QUERIES[i % len(QUERIES)][0], QUERIES[i % len(QUERIES)][1](i // len(QUERIES) % 20)) for i in range(n)]
+
+
+def naive(sql, params):
+    conn = sqlite3.connect(f"{CHINOOK_PATH.as_uri()}?mode=ro", uri=True)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def timed(run, queries):
+    samples = []
+    for sql, params in queries:
+        start = time.perf_counter()
+        run(sql, params)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main(n=2000):
+    queries = workload(n)
+    pooled = ReadOnlyDB(cache_size=0)
+    cached = ReadOnlyDB()
+
+    rows = [
+        ("connect per query", timed(naive, queries)),
+        ("pooled", timed(pooled.query, queries)),
+        ("pooled + cache", timed(cached.query, queries)),
+    ]
+    print(f"{n} queries, {len({q for q in queries})} distinct")
+    for name, samples in rows:
+        print(
+            f"{name:>18}: {sum(samples) / 1e3:8.1f} ms total  "
+            f"median {statistics.median(samples):7.1f} us  p95 {statistics.quantiles(samples, n=20)[-1]:7.1f} us"
+        )
+    print(f"cache: {cached.stats()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+import httpx
+
+# how long a body is served without asking github again
+DEFAULT_MAX_AGE = 5 * 60
+
+
+class CachedFetcher:
+    """
+    Async fetcher for raw files, backed by one pooled httpx client.
+
+    Bodies are kept in memory and on disk together with their ETag. A fresh body is
+    returned straight from the cache. A stale body is still returned right away
+    while a background request revalidates it with If-None-Match.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+        timeout: float = 10.0,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_age = max_age
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # created lazily so it belongs to the event loop of the server
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            )
+        return self._client
+
+    def _disk_path(self, url: str) -> Path:
+        return self.cache_dir / (hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    # the disk cache is read and written in a thread, a slow disk doesn't stall the event loop
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict[str, Any]]:
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    @staticmethod
+    def _write(path: Path, entry: Dict[str, Any]) -> None:
+        # a temp file of its own, two writes of the same url can run at once
+        tmp = path.with_name(f"{path.stem}.{uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(entry), encoding="utf-8")
+        os.replace(tmp, path)
+
+    async def _load(self, url: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(url)
+        if entry is None and self.cache_dir:
+            entry = await asyncio.to_thread(self._read, self._disk_path(url))
+            if entry is not None:
+                # a fetch may have stored a newer body while the file was read
+                entry = self._memory.setdefault(url, entry)
+        return entry
+
+    async def _store(self, url: str, entry: Dict[str, Any]) -> None:
+        self._memory[url] = entry
+        if self.cache_dir:
+            await asyncio.to_thread(self._write, self._disk_path(url), entry)
+
+    async def get(self, url: str) -> str:
+        entry = await self._load(url)
+        if entry is None:
+            entry = await self._fetch(url, None)
+        elif time.time() - entry["fetched_at"] >= self.max_age:
+            # serve the stale body now, refresh it for the next read
+            if url not in self._refreshing:
+                task = asyncio.create_task(self._revalidate(url, entry))
+                self._refreshing[url] = task
+        return entry["body"]
+
+    async def _revalidate(self, url: str, entry: Dict[str, Any]) -> None:
+        try:
+            await self._fetch(url, entry)
+        except httpx.HTTPError:
+            pass  # keep serving the stale body
+        finally:
+            self._refreshing.pop(url, None)
+
+    async def _fetch(self, url: str, entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        resp = await self.client.get(url, headers=headers)
+        if resp.status_code == 304 and entry:
+            entry = dict(entry, fetched_at=time.time())
+        else:
+            resp.raise_for_status()
+            entry = {
+                "url": url,
+                "etag": resp.headers.get("ETag"),
+                "fetched_at": time.time(),
+                "body": resp.text,
+            }
+        await self._store(url, entry)
+        return entry
+
+    async def wait_for_refresh(self) -> None:
+        """Wait until the background revalidations are done"""
+        if self._refreshing:
+            await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+
+    async def aclose(self) -> None:
+        await self.wait_for_refresh()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,333 @@
+"""
+Local retrieval over the employee handbook PDF.
+
+Pages are extracted with pypdf, split into chunks per section and embedded on
+the CPU. The vectors live in a float32 file that is memory-mapped for search,
+next to a JSON file with the chunk texts. Ingestion is keyed by the hash of
+each page's text: pages that didn't change keep their vectors and aren't
+embedded again.
+
+    python handbook_rag.py "how many PTO days carry over?"
+
+The default embedder hashes words and word pairs into a fixed number of
+dimensions, it needs no model download. With sentence-transformers installed,
+HANDBOOK_EMBEDDER=sentence-transformers:all-MiniLM-L6-v2 uses that model.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+HANDBOOK_PATH = Path(__file__).resolve().parent / "acmecorp-employee-handbook.pdf"
+INDEX_DIR = Path(__file__).resolve().parent / ".cache" / "handbook_index"
+
+# bump when the layout of the index files changes
+INDEX_VERSION = 1
+CHUNK_SIZE = 800
+HASH_DIM = 1024
+# bump when tokenize() changes, hashed vectors of an older version don't match
+HASHING_VERSION = 1
+
+_WORD = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9])")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have how i if in is it may must not of on or "
+    "our per should that the their these this to up we what when which who will with within you your".split()
+)
+
+
+_SUFFIXES = ("ments", "ment", "ing", "ies", "ed", "es", "s")
+
+
+def _stem(word: str) -> str:
+    # close enough for matching a question to a policy: roadmaps/roadmap, harassment/harass
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[: -len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of words and word pairs, log-scaled and L2-normalized.
+
+    No vocabulary to fit, so a changed page never forces the others to be
+    embedded again.
+    """
+
+    def __init__(self, dim: int = HASH_DIM):
+        self.dim = dim
+        self.name = f"hashing-v{HASHING_VERSION}-{dim}"
+
+    def _bucket(self, feature: str):
+        h = zlib.crc32(feature.encode())
+        return h % self.dim, 1.0 if h & 0x80000000 else -1.0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = tokenize(text)
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                column, sign = self._bucket(feature)
+                vectors[row, column] += sign
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class SentenceTransformerEmbedder:
+    """A local sentence-transformers model, runs on the CPU"""
+
+    def __init__(self, model: str = "all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers:{model}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def default_embedder():
+    spec = os.getenv("HANDBOOK_EMBEDDER", "")
+    if spec.startswith("sentence-transformers"):
+        try:
+            return SentenceTransformerEmbedder(spec.partition(":")[2] or "all-MiniLM-L6-v2")
+        except ImportError:
+            print("sentence-transformers is not installed, using the hashing embedder", file=sys.stderr)
+    return HashingEmbedder()
+
+
+def extract_pages(pdf_path: str) -> List[str]:
+    from pypdf import PdfReader
+
+    pages = []
+    for page in PdfReader(pdf_path).pages:
+        text = page.extract_text() or ""
+        # the PDF encodes hyphens and list bullets as odd glyphs
+        pages.append(text.replace("■", "-").replace("\x7f", "\n-"))
+    return pages
+
+
+def _is_heading(line: str) -> bool:
+    return 0 < len(line) < 60 and line[0].isupper() and line[-1] not in ".,;:-"
+
+
+def chunk_page(text: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
+    """Split a page into chunks per section, each starting with its heading"""
+    sections: List[List[str]] = [[]]
+    headings = [""]
+    for line in (line.strip() for line in text.splitlines()):
+        if _is_heading(line):
+            if sections[-1]:
+                sections.append([])
+                headings.append(line)
+            else:
+                headings[-1] = f"{headings[-1]} - {line}" if headings[-1] else line
+        elif line:
+            sections[-1].append(line)
+
+    chunks = []
+    for heading, lines in zip(headings, sections):
+        if not lines:
+            continue
+        prefix = f"{heading}: " if heading else ""
+        current = ""
+        for sentence in _SENTENCE_END.split(" ".join(lines)):
+            if current and len(prefix) + len(current) + len(sentence) > chunk_size:
+                chunks.append(prefix + current)
+                current = ""
+            current = f"{current} {sentence}".strip()
+        if current:
+            chunks.append(prefix + current)
+    return chunks
+
+
+def _page_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class VectorIndex:
+    """
+    Chunks and their vectors on disk: meta.json plus a memory-mapped vectors-*.f32.
+
+    An ingest that changes something writes a new vectors file, copying the
+    vectors of unchanged pages and embedding the rest, then swaps meta.json.
+    The previous file may still be mapped (a search in progress, another
+    process), so it stays until `cleanup`, which runs on open and before the
+    next write.
+    """
+
+    def __init__(self, path: str = str(INDEX_DIR), embedder=None, chunk_size: int = CHUNK_SIZE):
+        self.path = Path(path)
+        self.embedder = embedder or default_embedder()
+        self.chunk_size = chunk_size
+        # chunks and their vectors, swapped as one so a search never sees one without the other
+        self._index: Tuple[List[Dict[str, Any]], Optional[np.ndarray]] = ([], None)
+        self._lock = threading.Lock()
+        self._mapped: Optional[str] = None
+        self._load()
+        self.cleanup()
+
+    @property
+    def chunks(self) -> List[Dict[str, Any]]:
+        return self._index[0]
+
+    @property
+    def vectors(self) -> Optional[np.ndarray]:
+        return self._index[1]
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return {"version": INDEX_VERSION, "embedder": self.embedder.name, "dim": self.embedder.dim, "chunk_size": self.chunk_size}
+
+    def _load(self) -> None:
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            return
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        # built with another embedder or layout: everything is embedded again
+        if meta.get("config") != self.config:
+            return
+        chunks = meta["chunks"]
+        vectors = (
+            np.memmap(self.path / meta["vectors"], dtype=np.float32, mode="r", shape=(len(chunks), self.embedder.dim))
+            if chunks
+            else None
+        )
+        self._mapped = meta["vectors"] if chunks else None
+        self._index = (chunks, vectors)
+
+    def ingest_pages(self, pages: Sequence[str], source: str = "") -> Dict[str, int]:
+        """Index the pages, embedding only those whose text changed since the last ingest"""
+        with self._lock:
+            current_chunks, current_vectors = self._index
+            known: Dict[str, List[int]] = {}
+            for row, chunk in enumerate(current_chunks):
+                known.setdefault(chunk["hash"], []).append(row)
+
+            chunks: List[Dict[str, Any]] = []
+            # row of each chunk in the old vectors, -1 for chunks embedded now
+            old_rows: List[int] = []
+            new_texts: List[str] = []
+            stats = {"pages": len(pages), "reused_pages": 0, "embedded_pages": 0}
+            for number, text in enumerate(pages, start=1):
+                digest = _page_hash(text)
+                if digest in known:
+                    for row in known[digest]:
+                        chunks.append({**current_chunks[row], "page": number, "source": source})
+                        old_rows.append(row)
+                    stats["reused_pages"] += 1
+                    continue
+                for chunk in chunk_page(text, self.chunk_size):
+                    chunks.append({"text": chunk, "page": number, "hash": digest, "source": source})
+                    old_rows.append(-1)
+                    new_texts.append(chunk)
+                stats["embedded_pages"] += 1
+
+            stats["chunks"] = len(chunks)
+            if chunks == current_chunks:
+                return stats
+
+            rows = np.array(old_rows, dtype=np.int64)
+            vectors = np.empty((len(chunks), self.embedder.dim), dtype=np.float32)
+            if (rows >= 0).any():
+                vectors[rows >= 0] = current_vectors[rows[rows >= 0]]
+            if new_texts:
+                vectors[rows < 0] = self.embedder.embed(new_texts)
+            self._write(chunks, vectors)
+            return stats
+
+    def ingest(self, pdf_path: str = str(HANDBOOK_PATH)) -> Dict[str, int]:
+        return self.ingest_pages(extract_pages(pdf_path), source=Path(pdf_path).name)
+
+    def cleanup(self) -> int:
+        """Remove the vectors files of older generations, returns how many went"""
+        current = {self._mapped}
+        meta_path = self.path / "meta.json"
+        if meta_path.exists():
+            current.add(json.loads(meta_path.read_text(encoding="utf-8")).get("vectors"))
+        removed = 0
+        for old in self.path.glob("vectors-*.f32"):
+            if old.name in current:
+                continue
+            try:
+                old.unlink()
+                removed += 1
+            except OSError:
+                # still mapped (Windows won't delete it) or already gone, try again next time
+                pass
+        return removed
+
+    def _write(self, chunks: List[Dict[str, Any]], vectors: np.ndarray) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.cleanup()
+        # a new file name each time, searches still reading the old map are not disturbed;
+        # the name is the content hash, so an existing file already holds these vectors
+        # (and may be the one mapped right now, which w+ would truncate)
+        name = f"vectors-{hashlib.sha256(vectors.tobytes()).hexdigest()[:12]}.f32"
+        existing = self.path / name
+        if len(chunks) and not (existing.exists() and existing.stat().st_size == vectors.nbytes):
+            out = np.memmap(self.path / name, dtype=np.float32, mode="w+", shape=vectors.shape)
+            out[:] = vectors
+            out.flush()
+            del out
+        meta = {"config": self.config, "vectors": name, "chunks": chunks}
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self.path / "meta.json")
+        if chunks:
+            self._load()
+        else:
+            self._index, self._mapped = ([], None), None
+
+    def search(self, query: str, k: int = 4) -> List[Dict[str, Any]]:
+        """The k chunks most similar to the query, best first"""
+        chunks, vectors = self._index
+        if vectors is None or k < 1:
+            return []
+        scores = vectors @ self.embedder.embed([query])[0]
+        k = min(k, len(chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {"text": chunks[i]["text"], "page": chunks[i]["page"], "source": chunks[i].get("source", ""), "score": round(float(scores[i]), 4)}
+            for i in top
+        ]
+
+
+class HandbookRetriever:
+    """The handbook index for the MCP tool: ingested on first use, then only searched"""
+
+    def __init__(self, pdf_path: str = str(HANDBOOK_PATH), index_dir: str = str(INDEX_DIR), embedder=None):
+        self.pdf_path = pdf_path
+        self.index = VectorIndex(index_dir, embedder)
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def search(self, query: str, k: int = 4) -> List[Dict[str, Any]]:
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self.index.ingest(self.pdf_path)
+                    self._ready = True
+        return self.index.search(query, k)
+
+
+if __name__ == "__main__":
+    index = VectorIndex()
+    print(index.ingest())
+    for hit in index.search(" ".join(sys.argv[1:]) or "How many days of PTO do I get?"):
+        print(f"{hit['score']:.3f}  p{hit['page']}  {hit['text'][:100]}")
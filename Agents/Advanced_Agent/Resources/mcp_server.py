@@ -2,52 +2,143 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import asyncio
 import os
+import sqlite3
+import sys
+from pathlib import Path
 from mcp.server.fastmcp import FastMCP
 from tavily import TavilyClient
 from typing import Dict, Any
-from requests import get
+from search_cache import SearchCache, normalize_query
+from github_cache import CachedFetcher
+from sql_tool import ReadOnlyDB, QueryTimeout
+from sql_schema import SchemaCache
+from sql_advisor import QueryLog
+from handbook_rag import HandbookRetriever
+
+sys.path.append(str(Path(__file__).resolve().parents[3] / "Essentials"))
+from single_flight import SingleFlight
 
 mcp = FastMCP("mcp_server")
 
 tavily_api_key = os.getenv("TAVILY_API_KEY")
 tavily_client = TavilyClient(api_key=tavily_api_key) if tavily_api_key else None
 
-# searching web
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
+# cache of search results, kept on disk so it survives a restart of the server
+# set SEARCH_CACHE_PATH="" to keep it in memory only
+search_cache = SearchCache(
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", 3600)),
+    max_size=int(os.getenv("SEARCH_CACHE_SIZE", 256)),
+    path=os.getenv("SEARCH_CACHE_PATH", str(CACHE_DIR / "search_cache.sqlite3")),
+)
+search_flight = SingleFlight(key=normalize_query)
+
+# searching web; runs in a thread so the server keeps answering, and the same
+# query asked by several sessions at once goes to tavily once
 @mcp.tool()
-def search_web(query: str) -> Dict[str, Any]:
+@search_flight.wrap
+async def search_web(query: str) -> Dict[str, Any]:
     """Search the web for the information."""
     if not tavily_client:
         return {"error": "TAVILY_API_KEY is not set."}
     try:
-        return tavily_client.search(query)
+        return await asyncio.to_thread(search_cache.get_or_search, query, tavily_client.search)
     except Exception as e:
         return {"error": str(e)}
 
+# chinook database, opened read only; results are cached and handed out in pages
+# executed queries get logged with their plan for sql_advisor.py (SQL_LOG_PATH="" keeps it in memory)
+chinook = ReadOnlyDB(
+    pool_size=int(os.getenv("SQL_POOL_SIZE", 4)),
+    max_rows=int(os.getenv("SQL_MAX_ROWS", 1000)),
+    timeout=float(os.getenv("SQL_TIMEOUT", 2)),
+    log=QueryLog(os.getenv("SQL_LOG_PATH", str(CACHE_DIR / "sql_log.jsonl"))),
+)
+
+# sync tools would run on the server's event loop; in a thread, calls use the pool side by side
+@mcp.tool()
+async def query_chinook(sql: str, page: int = 1, page_size: int = 50) -> Dict[str, Any]:
+    """run a read-only SQLite query on the Chinook music store database.
+
+    Results come back in pages of `page_size` rows; ask for the next page while has_more is true.
+    """
+    try:
+        return await asyncio.to_thread(chinook.page, sql, page=page, page_size=min(page_size, 500))
+    except QueryTimeout as e:
+        return {"error": f"{e}, add a LIMIT or a more selective WHERE"}
+    except (sqlite3.Error, ValueError) as e:
+        return {"error": str(e)}
+
+# local search over the acmecorp handbook pdf, embedded once and memory-mapped from .cache
+handbook = HandbookRetriever(index_dir=str(CACHE_DIR / "handbook_index"))
+
+# in a thread too: the first search ingests the whole PDF
+@mcp.tool()
+async def search_handbook(query: str, k: int = 4) -> Dict[str, Any]:
+    """search the acmecorp employee handbook (pto, travel & expenses, conduct, nda) for passages."""
+    try:
+        return {"results": await asyncio.to_thread(handbook.search, query, k=min(k, 10))}
+    except Exception as e:
+        return {"error": str(e)}
+
+# hit/miss counters of the search cache
+@mcp.resource("cache://search_web/stats")
+def search_cache_stats() -> Dict[str, Any]:
+    """hit/miss counters of the search_web cache"""
+    return {**search_cache.stats(), "single_flight": search_flight.stats()}
+
+# hit/miss counters of the sql result cache
+@mcp.resource("cache://query_chinook/stats")
+def sql_cache_stats() -> Dict[str, Any]:
+    """hit/miss counters of the query_chinook result cache"""
+    return chinook.stats()
+
+# one pooled http client for all reads, bodies cached and revalidated with ETag
+github_fetcher = CachedFetcher(
+    cache_dir=str(CACHE_DIR / "github"),
+    max_age=float(os.getenv("GITHUB_CACHE_MAX_AGE", 300)),
+)
+
 # providing data to ai to use it 
 @mcp.resource("github://langchain-ai/langchain-mcp-adapters/blob/main/README.md")
-def github_file():
+async def github_file():
     """
     Resource for accessing langchain-ai/langchain-mcp-adapters/README.md file
     """
     url = "https://raw.githubusercontent.com/langchain-ai/langchain-mcp-adapters/main/README.md"
     try:
-        resp = get(url)
-        return resp.text
+        return await github_fetcher.get(url)
     except Exception as e:
         return f"Error: {str(e)}"
 
+# schema and sample rows of chinook, built once and kept in .cache
+chinook_schema = SchemaCache(chinook, path=str(CACHE_DIR / "chinook_schema.json"))
+
+@mcp.resource("schema://chinook")
+async def chinook_schema_summary() -> str:
+    """tables, columns, keys, indexes and sample rows of the chinook database"""
+    return await asyncio.to_thread(chinook_schema.get)
+
 # prompt template
 @mcp.prompt()
 def prompt():
-    """analyze the data from the repo with insights"""
-    return """You are a helpful assistant that answers user questions about LangChain, LangGraph and LangSmith.
+    """answer questions about the langchain repos, the chinook data and the acmecorp handbook"""
+    return """You are a helpful assistant that answers user questions about LangChain, LangGraph and LangSmith,
+    about the Chinook music store data (artists, albums, tracks, customers, invoices)
+    and about the AcmeCorp employee handbook (PTO, travel & expenses, conduct, NDA).
 
     You can use the following tools/resources to answer user questions:
     - search_web: Search the web for information
     - github_file: Access the langchain-ai repo files
+    - query_chinook: Run read-only SQL on the Chinook music store database
+    - chinook_schema_summary: Tables and sample rows of the Chinook database, read it before writing SQL
+    - search_handbook: Search the AcmeCorp employee handbook
 
-    If the user asks a question that is not related to LangChain, LangGraph or LangSmith, you should say "I'm sorry, I can only answer questions about LangChain, LangGraph and LangSmith."
+    Answer Chinook questions with query_chinook and handbook questions with search_handbook, quoting the passages you used.
+    If the user asks a question that is not related to any of these, you should say "I'm sorry, I can only answer questions about LangChain, LangGraph, LangSmith, the Chinook music store data and the AcmeCorp employee handbook."
 
     You may try multiple tool and resource calls to answer the user's question.
 
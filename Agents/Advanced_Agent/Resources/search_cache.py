@@ -0,0 +1,137 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# results older than this are searched again
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_SIZE = 256
+
+
+def normalize_query(query: str) -> str:
+    """Build the cache key: case, extra spaces and trailing punctuation don't change a search"""
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip("?!.,;: ")
+
+
+class SearchCache:
+    """
+    TTL + LRU cache for search results.
+
+    The newest `max_size` results live in memory. If `path` is given the results
+    are also written to a SQLite file, so a restarted stdio server keeps its cache.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_size: int = DEFAULT_MAX_SIZE,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache "
+                "(key TEXT PRIMARY KEY, created REAL NOT NULL, result TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def _fresh(self, created: float) -> bool:
+        return self.clock() - created < self.ttl
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and self._fresh(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT created, result FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and self._fresh(row[0]):
+                    result = json.loads(row[1])
+                    self._remember(key, row[0], result)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    def set(self, query: str, result: Dict[str, Any]) -> None:
+        key = normalize_query(query)
+        created = self.clock()
+        with self._lock:
+            self._remember(key, created, result)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, created, result) VALUES (?, ?, ?)",
+                    (key, created, json.dumps(result)),
+                )
+                # drop expired rows so the file doesn't grow forever
+                self._db.execute(
+                    "DELETE FROM search_cache WHERE created <= ?", (created - self.ttl,)
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, created: float, result: Dict[str, Any]) -> None:
+        self._memory[key] = (created, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def get_or_search(
+        self, query: str, search: Callable[[str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Return the cached result or call `search` and cache what it returns"""
+        result = self.get(query)
+        if result is None:
+            result = search(query)
+            self.set(query, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._memory),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "persistent": self._db is not None,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM search_cache")
+                self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,372 @@
+"""
+Index advice from the SQL the agent actually runs.
+
+ReadOnlyDB(log=QueryLog(path)) records every executed query with its timing,
+its EXPLAIN QUERY PLAN and the columns it reads. recommend_indexes() looks for
+full scans and non-covering index lookups in that log and proposes covering
+indexes; try_indexes() creates them in a copy of the database and measures the
+logged queries before and after, the original file is never written.
+
+    python sql_advisor.py [.cache/sql_log.jsonl] [--apply .cache/Chinook.indexed.db]
+"""
+import argparse
+import json
+import re
+import shutil
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sql_tool import CHINOOK_PATH, DEFAULT_TIMEOUT, normalize_sql, read_only_authorizer, sandbox, time_limit
+
+DEFAULT_LOG_PATH = Path(__file__).resolve().parent / ".cache" / "sql_log.jsonl"
+# the log file is rotated to <path>.1 at this size, so at most twice this is kept
+DEFAULT_MAX_BYTES = 16 * 2**20
+# scanning smaller tables is cheaper than maintaining an index
+DEFAULT_MIN_ROWS = 500
+# wider indexes only cover the query, the key columns are recommended alone
+DEFAULT_MAX_COLUMNS = 5
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLAN = re.compile(r"^(SCAN|SEARCH) (\S+)(?: USING (COVERING )?INDEX (\S+))?")
+_OPERAND = r"(?:(\w+)\.)?(\w+)"
+_PREDICATE = re.compile(
+    _OPERAND + r"\s*(==|=|<>|!=|<=|>=|<|>|\bIN\b|\bIS\b|\bLIKE\b|\bBETWEEN\b)\s*(?:" + _OPERAND + r")?",
+    re.IGNORECASE,
+)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_ORDER = re.compile(
+    r"\b(?:ORDER|GROUP)\s+BY\s+(.+?)(?=\bLIMIT\b|\bHAVING\b|\bORDER\b|\bWINDOW\b|\)|$)", re.IGNORECASE | re.DOTALL
+)
+_KEYWORDS = {
+    "where", "on", "join", "inner", "left", "right", "full", "cross", "natural", "outer",
+    "group", "order", "limit", "using", "union", "except", "intersect", "having", "window",
+}
+_EQUALITY = {"=", "==", "in", "is"}
+
+
+class QueryLog:
+    """
+    SQL that ran against the database, with timings and query plans.
+
+    The newest `max_entries` stay in memory; with a `path` every entry is also
+    appended to a JSONL file, which is moved to <path>.1 once it reaches
+    `max_bytes`. The plan of a statement is looked up once.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10_000, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self._size = 0
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._size = self.path.stat().st_size if self.path.exists() else 0
+        self.entries: "deque[Dict[str, Any]]" = deque(maxlen=max_entries)
+        self._plans: Dict[str, Tuple[List[str], Dict[str, List[str]]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def explain(conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()) -> Tuple[List[str], Dict[str, List[str]]]:
+        """The query plan and the {table: columns} the statement reads"""
+        reads: Dict[str, set] = {}
+
+        def authorizer(action, table, column, db, trigger):
+            if action == sqlite3.SQLITE_READ and table and column:
+                reads.setdefault(table, set()).add(column)
+            return read_only_authorizer(action, table, column, db, trigger)
+
+        # the statement is checked as strictly as when it ran, and the pooled
+        # connection gets its sandbox back afterwards
+        conn.set_authorizer(authorizer)
+        try:
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, tuple(params))]
+        finally:
+            conn.set_authorizer(read_only_authorizer)
+        return plan, {table: sorted(columns) for table, columns in reads.items()}
+
+    def record(self, conn: sqlite3.Connection, sql: str, params: Sequence[Any], seconds: float, rows: int) -> None:
+        # statements come from the connection's cache after the first run and
+        # aren't authorized again, so the reads are only seen the first time
+        analysed = self._plans.get(sql)
+        if analysed is None:
+            try:
+                analysed = self.explain(conn, sql, params)
+            except Exception as e:
+                # the query already ran fine, only the advice goes without its plan
+                print(f"sql log: no plan for {sql!r}: {e}", file=sys.stderr)
+                analysed = ([], {})
+            if len(self._plans) >= 1000:
+                self._plans.clear()
+            self._plans[sql] = analysed
+        plan, reads = analysed
+        entry = {
+            "ts": time.time(),
+            "sql": sql,
+            "params": list(params),
+            "ms": round(seconds * 1000, 3),
+            "rows": rows,
+            "plan": plan,
+            "reads": reads,
+        }
+        with self._lock:
+            self.entries.append(entry)
+            if self.path is not None:
+                line = json.dumps(entry, default=str) + "\n"
+                if self._size + len(line) > self.max_bytes and self._size:
+                    self.path.replace(f"{self.path}.1")
+                    self._size = 0
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(line)
+                self._size += len(line.encode("utf-8"))
+
+    @staticmethod
+    def load(path: str) -> List[Dict[str, Any]]:
+        """The entries of the log file, the rotated one first"""
+        entries = []
+        for part in (Path(f"{path}.1"), Path(path)):
+            if not part.exists():
+                continue
+            with part.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entries.append(json.loads(line))
+        return entries
+
+
+@dataclass(slots=True)
+class IndexAdvice:
+    table: str
+    columns: Tuple[str, ...]
+    # the first `key_columns` are searched on, the rest only cover the query
+    key_columns: int
+    queries: List[str] = field(default_factory=list)
+    total_ms: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"advised_{self.table}_{'_'.join(self.columns[: self.key_columns])}"
+
+    @property
+    def sql(self) -> str:
+        columns = ", ".join(_quote(c) for c in self.columns)
+        return f"CREATE INDEX IF NOT EXISTS {_quote(self.name)} ON {_quote(self.table)} ({columns})"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _aliases(sql: str) -> Dict[str, str]:
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def _columns_used(sql: str, reads: Dict[str, List[str]]) -> Dict[str, Dict[str, List[str]]]:
+    """{table: {"eq": [...], "range": [...], "join": [...], "order": [...]}} from the SQL text"""
+    sql = _LITERAL.sub("?", sql)
+    aliases = _aliases(sql)
+    columns = {table: set(cols) for table, cols in reads.items()}
+    used: Dict[str, Dict[str, List[str]]] = {table: {"eq": [], "range": [], "join": [], "order": []} for table in reads}
+
+    def resolve(qualifier, column):
+        if column is None:
+            return None
+        if qualifier:
+            table = aliases.get(qualifier, qualifier)
+            return table if column in columns.get(table, ()) else None
+        owners = [table for table, cols in columns.items() if column in cols]
+        return owners[0] if len(owners) == 1 else None
+
+    def add(table, kind, column):
+        if column not in used[table][kind]:
+            used[table][kind].append(column)
+
+    for lq, lc, op, rq, rc in _PREDICATE.findall(sql):
+        left, right = resolve(lq, lc), resolve(rq, rc or None)
+        if left and right:
+            add(left, "join", lc)
+            add(right, "join", rc)
+        elif left and op.lower() in _EQUALITY:
+            add(left, "eq", lc)
+        elif left and op not in ("<>", "!="):
+            add(left, "range", lc)
+
+    for clause in _ORDER.findall(sql):
+        items = [re.sub(r"\s+(ASC|DESC)$", "", item.strip(), flags=re.IGNORECASE) for item in clause.split(",")]
+        resolved = [(m, resolve(m.group(1), m.group(2))) for m in (re.fullmatch(_OPERAND, i) for i in items) if m]
+        tables = {table for _, table in resolved}
+        # an index only gives the order if every sort column is in it
+        if len(resolved) == len(items) and len(tables) == 1 and None not in tables:
+            for m, table in resolved:
+                add(table, "order", m.group(2))
+    return used
+
+
+def _table_info(conn: sqlite3.Connection, table: str) -> Tuple[int, List[str], List[Tuple[str, ...]]]:
+    rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+    pk = [(name, type_) for _, name, type_, _, _, key in conn.execute(f'PRAGMA table_info("{table}")') if key]
+    # only an INTEGER PRIMARY KEY is the rowid, other keys aren't in every index
+    rowid = [pk[0][0]] if len(pk) == 1 and pk[0][1].upper() == "INTEGER" else []
+    indexes = [
+        tuple(row[2] for row in conn.execute(f'PRAGMA index_info("{index}")'))
+        for _, index, *_ in conn.execute(f'PRAGMA index_list("{table}")')
+    ]
+    return rows, rowid, indexes
+
+
+def recommend_indexes(
+    entries: Iterable[Dict[str, Any]],
+    conn: sqlite3.Connection,
+    min_rows: int = DEFAULT_MIN_ROWS,
+    max_columns: int = DEFAULT_MAX_COLUMNS,
+) -> List[IndexAdvice]:
+    """Covering indexes for the scans and lookups in the log, the costliest first"""
+    queries: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        query = queries.setdefault(normalize_sql(entry["sql"]), {**entry, "total_ms": 0.0})
+        query["total_ms"] += entry["ms"]
+
+    tables: Dict[str, Tuple[int, List[str], List[Tuple[str, ...]]]] = {}
+    advice: Dict[Tuple[str, Tuple[str, ...]], IndexAdvice] = {}
+    for query in queries.values():
+        aliases = _aliases(_LITERAL.sub("?", query["sql"]))
+        used = _columns_used(query["sql"], query["reads"])
+        for detail in query["plan"]:
+            m = _PLAN.match(detail)
+            if not m or m.group(3) or "PRIMARY KEY" in detail:
+                continue
+            table = aliases.get(m.group(2), m.group(2))
+            if table not in used:
+                continue
+            if table not in tables:
+                tables[table] = _table_info(conn, table)
+            rows, rowid, indexes = tables[table]
+            if rows < min_rows:
+                continue
+
+            cols = used[table]
+            if cols["eq"]:
+                key = cols["eq"] + (cols["range"][:1] or [c for c in cols["order"] if c not in cols["eq"]])
+            else:
+                key = cols["join"] or cols["range"][:1] or cols["order"]
+            if not key:
+                continue
+            # every index already ends with the rowid
+            rest = [c for c in query["reads"][table] if c not in key and c not in rowid]
+            columns = tuple(key + rest) if len(key) + len(rest) <= max_columns else tuple(key)
+            if any(index[: len(columns)] == columns for index in indexes):
+                continue
+
+            item = advice.setdefault((table, columns), IndexAdvice(table, columns, len(key)))
+            item.queries.append(query["sql"])
+            item.total_ms += query["total_ms"]
+    return sorted(advice.values(), key=lambda a: a.total_ms, reverse=True)
+
+
+def _measure(
+    conn: sqlite3.Connection, sql: str, params: Sequence[Any], repeat: int, timeout: float = DEFAULT_TIMEOUT
+) -> Tuple[float, List[str]]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # every run gets the deadline query_chinook gives it
+        with time_limit(conn, timeout):
+            conn.execute(sql, tuple(params)).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, tuple(params))]
+    return statistics.median(samples), plan
+
+
+def try_indexes(
+    advice: Sequence[IndexAdvice],
+    copy_path: str,
+    entries: Iterable[Dict[str, Any]] = (),
+    db_path: str = str(CHINOOK_PATH),
+    repeat: int = 5,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Dict[str, Any]:
+    """
+    Create the advised indexes in a copy of the database and time the logged queries on it.
+
+    The logged SQL was written by the model, it is replayed on a read-only
+    connection under the same authorizer and per-query timeout as query_chinook
+    (QueryTimeout). Only the indexes, built here from IndexAdvice, go through a
+    separate writable connection.
+    """
+    Path(copy_path).parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(db_path, copy_path)
+    queries = {normalize_sql(e["sql"]): (e["sql"], e["params"]) for e in entries}
+
+    def replay():
+        conn = sandbox(sqlite3.connect(f"{Path(copy_path).resolve().as_uri()}?mode=ro", uri=True))
+        try:
+            return {key: _measure(conn, sql, params, repeat, timeout) for key, (sql, params) in queries.items()}
+        finally:
+            conn.close()
+
+    before = replay()
+    writer = sqlite3.connect(copy_path)
+    try:
+        with writer:
+            for item in advice:
+                writer.execute(item.sql)
+    finally:
+        writer.close()
+    after = replay()
+
+    plans = " ".join(" ".join(plan) for _, plan in after.values())
+    return {
+        "path": str(copy_path),
+        "created": [item.sql for item in advice],
+        "unused": [item.name for item in advice if item.name not in plans],
+        "queries": [
+            {
+                "sql": sql,
+                "before_ms": round(before[key][0], 3),
+                "after_ms": round(after[key][0], 3),
+                "before_plan": before[key][1],
+                "after_plan": after[key][1],
+            }
+            for key, (sql, _) in queries.items()
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommend indexes from the query_chinook SQL log")
+    parser.add_argument("log", nargs="?", default=str(DEFAULT_LOG_PATH))
+    parser.add_argument("--db", default=str(CHINOOK_PATH))
+    parser.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS)
+    parser.add_argument("--apply", metavar="COPY", help="create the indexes in this copy of the database and compare")
+    args = parser.parse_args()
+
+    entries = QueryLog.load(args.log)
+    conn = sqlite3.connect(f"{Path(args.db).resolve().as_uri()}?mode=ro", uri=True)
+    advice = recommend_indexes(entries, conn, min_rows=args.min_rows)
+    conn.close()
+
+    print(f"{len(entries)} logged queries, {len(advice)} indexes advised")
+    for item in advice:
+        print(f"\n{item.sql};\n  {item.total_ms:.1f} ms in {len(item.queries)} queries, e.g. {item.queries[0]}")
+
+    if args.apply and advice:
+        report = try_indexes(advice, args.apply, entries, db_path=args.db)
+        print(f"\nindexes created in {report['path']}")
+        for query in report["queries"]:
+            print(f"  {query['before_ms']:8.3f} -> {query['after_ms']:8.3f} ms  {query['sql']}")
+        if report["unused"]:
+            print(f"not used by any logged query: {', '.join(report['unused'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+# bump when the layout of the summary changes
+SCHEMA_VERSION = 1
+SAMPLE_ROWS = 3
+# sample values longer than this are cut, the summary goes into every prompt
+MAX_VALUE_LENGTH = 40
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _short(value) -> str:
+    text = repr(value)
+    return text if len(text) <= MAX_VALUE_LENGTH else text[: MAX_VALUE_LENGTH - 3] + "..."
+
+
+def describe(conn, samples: int = SAMPLE_ROWS) -> str:
+    """Tables, columns, keys, indexes, row counts and a few sample rows, as text for an LLM"""
+    tables = [
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+    ]
+    sections = []
+    for table in tables:
+        t = _quote(table)
+        count = conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+        foreign = {
+            column: f"{ref_table}.{ref_column}"
+            for _, _, ref_table, column, ref_column, *_ in conn.execute(f"PRAGMA foreign_key_list({t})")
+        }
+        columns = []
+        for _, name, type_, notnull, _, pk in conn.execute(f"PRAGMA table_info({t})"):
+            column = f"{name} {type_}".strip()
+            if pk:
+                column += " PK"
+            elif notnull:
+                column += " NOT NULL"
+            if name in foreign:
+                column += f" -> {foreign[name]}"
+            columns.append(column)
+        lines = [f"## {table} ({count} rows)", "columns: " + ", ".join(columns)]
+
+        indexes = []
+        for _, index, unique, origin, _ in conn.execute(f"PRAGMA index_list({t})"):
+            if origin == "pk":
+                continue
+            indexed = ", ".join(row[2] for row in conn.execute(f"PRAGMA index_info({_quote(index)})"))
+            indexes.append(f"{index} ({indexed}){' UNIQUE' if unique else ''}")
+        if indexes:
+            lines.append("indexes: " + "; ".join(indexes))
+
+        if samples:
+            lines.append("sample rows:")
+            for row in conn.execute(f"SELECT * FROM {t} LIMIT {int(samples)}"):
+                lines.append("  (" + ", ".join(_short(value) for value in row) + ")")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+class SchemaCache:
+    """
+    The schema summary of a database, computed once.
+
+    Kept in memory and in a JSON file next to the other caches, so a restarted
+    server doesn't query every table again. The file is rebuilt when the
+    database file changes.
+    """
+
+    def __init__(self, db, path: Optional[str] = None, samples: int = SAMPLE_ROWS):
+        self.db = db
+        self.path = Path(path) if path else None
+        self.samples = samples
+        self._summary: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _fingerprint(self) -> list:
+        stat = os.stat(self.db.path)
+        return [SCHEMA_VERSION, self.samples, stat.st_size, stat.st_mtime_ns]
+
+    def get(self) -> str:
+        with self._lock:
+            if self._summary is not None:
+                return self._summary
+            fingerprint = self._fingerprint()
+            if self.path is not None and self.path.exists():
+                try:
+                    cached = json.loads(self.path.read_text(encoding="utf-8"))
+                    if cached.get("fingerprint") == fingerprint:
+                        self._summary = cached["summary"]
+                        return self._summary
+                except (OSError, ValueError, KeyError):
+                    pass
+
+            with self.db.introspection() as conn:
+                self._summary = describe(conn, self.samples)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(".tmp")
+                tmp.write_text(json.dumps({"fingerprint": fingerprint, "summary": self._summary}), encoding="utf-8")
+                os.replace(tmp, self.path)
+            return self._summary
+
+    def clear(self) -> None:
+        with self._lock:
+            self._summary = None
+            if self.path is not None:
+                self.path.unlink(missing_ok=True)
@@ -0,0 +1,236 @@
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CHINOOK_PATH = Path(__file__).resolve().parent / "Chinook.db"
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CACHE_SIZE = 128
+# most rows a query can return, the rest is cut off
+DEFAULT_MAX_ROWS = 1000
+DEFAULT_PAGE_SIZE = 50
+# seconds before a query is interrupted
+DEFAULT_TIMEOUT = 2.0
+# the deadline is checked every this many sqlite VM instructions
+PROGRESS_STEPS = 1000
+
+# string literals and quoted identifiers are kept as they are
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])""")
+
+
+# all the SQL of query_chinook may do: read tables, call functions, recurse in a CTE
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+
+def read_only_authorizer(action, arg1, arg2, db, trigger) -> int:
+    """sqlite3 authorizer that denies everything a SELECT doesn't need: PRAGMA, ATTACH, writes, DDL"""
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def sandbox(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Restrict a connection to what read_only_authorizer allows, with no attached databases"""
+    conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 0)
+    conn.set_authorizer(read_only_authorizer)
+    return conn
+
+
+class QueryTimeout(Exception):
+    """The query ran longer than the timeout and was interrupted"""
+
+
+@contextmanager
+def time_limit(conn: sqlite3.Connection, timeout: float) -> Iterator[sqlite3.Connection]:
+    """Interrupt what runs on `conn` once `timeout` seconds have passed, raised as QueryTimeout"""
+    deadline = time.monotonic() + timeout
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+    try:
+        yield conn
+    except sqlite3.OperationalError as e:
+        if str(e) == "interrupted":
+            raise QueryTimeout(f"query took longer than {timeout} s") from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def normalize_sql(sql: str) -> str:
+    """Build the cache key: case, spacing and a trailing ; don't change a query"""
+    parts = _QUOTED.split(sql.strip())
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i].lower())
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+class ReadOnlyDB:
+    """
+    Read-only SQL over a SQLite file.
+
+    Connections are opened with a mode=ro URI and handed out from a pool, each
+    one keeps its prepared statements. The SQL comes from the model, so every
+    statement is checked by read_only_authorizer when it is prepared: a
+    PRAGMA or ATTACH fails like a write does. Results are capped at `max_rows` and
+    kept in an LRU cache keyed by the normalized SQL and its parameters, so
+    the pages of a result don't run the query again.
+    """
+
+    def __init__(
+        self,
+        path: str = str(CHINOOK_PATH),
+        pool_size: int = DEFAULT_POOL_SIZE,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        timeout: float = DEFAULT_TIMEOUT,
+        log=None,
+    ):
+        if not Path(path).exists():
+            raise FileNotFoundError(path)
+        self.path = str(Path(path).resolve())
+        self.uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+        self.pool_size = pool_size
+        self.cache_size = cache_size
+        self.max_rows = max_rows
+        self.timeout = timeout
+        # sql_advisor.QueryLog, records what runs with its plan and timing
+        self.log = log
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, tuple], Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA query_only = ON")
+        return sandbox(conn)
+
+    @contextmanager
+    def introspection(self) -> Iterator[sqlite3.Connection]:
+        """
+        A separate read-only connection for the server's own schema queries
+        (PRAGMA table_info ...), never pooled, so nothing it prepares can be
+        reused by the model's SQL without being authorized.
+        """
+        conn = sqlite3.connect(self.uri, uri=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection; queries on it are interrupted after `timeout` seconds"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                opened = self._opened < self.pool_size
+                if opened:
+                    self._opened += 1
+            # all connections are busy: wait for one to come back
+            conn = self._connect() if opened else self._pool.get()
+
+        try:
+            with time_limit(conn, self.timeout if timeout is None else timeout):
+                yield conn
+        except QueryTimeout:
+            self.timeouts += 1
+            raise
+        finally:
+            self._pool.put(conn)
+
+    def iter_pages(
+        self, sql: str, params: Sequence[Any] = (), page_size: int = DEFAULT_PAGE_SIZE, timeout: Optional[float] = None
+    ) -> Iterator[List[tuple]]:
+        """Stream a result page by page without holding all of it in memory, no row cap"""
+        with self.connection(timeout) as conn:
+            cursor = conn.execute(sql, tuple(params))
+            try:
+                while rows := cursor.fetchmany(page_size):
+                    yield rows
+            finally:
+                cursor.close()
+
+    def _run(self, sql: str, params: tuple) -> Dict[str, Any]:
+        with self.connection() as conn:
+            start = time.perf_counter()
+            cursor = conn.execute(sql, params)
+            try:
+                columns = [c[0] for c in cursor.description or ()]
+                # one extra row tells whether the result was cut off
+                rows = cursor.fetchmany(self.max_rows + 1)
+            finally:
+                cursor.close()
+            if self.log is not None:
+                self.log.record(conn, sql, params, time.perf_counter() - start, len(rows))
+        truncated = len(rows) > self.max_rows
+        return {"columns": columns, "rows": rows[: self.max_rows], "truncated": truncated}
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> Dict[str, Any]:
+        """Run a query or return its cached result: {"columns", "rows", "truncated"}"""
+        key = (normalize_sql(sql), tuple(params))
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = self._run(sql, key[1])
+        with self._cache_lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def page(self, sql: str, params: Sequence[Any] = (), page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """One page of a query's result, numbered from 1"""
+        if page < 1 or page_size < 1:
+            raise ValueError("page and page_size start at 1")
+        result = self.query(sql, params)
+        start = (page - 1) * page_size
+        rows = result["rows"][start : start + page_size]
+        return {
+            "columns": result["columns"],
+            "rows": [list(row) for row in rows],
+            "page": page,
+            "page_size": page_size,
+            "total_rows": len(result["rows"]),
+            "has_more": start + page_size < len(result["rows"]),
+            "truncated": result["truncated"],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._cache),
+            "cache_size": self.cache_size,
+            "timeouts": self.timeouts,
+            "connections": self._opened,
+            "pool_size": self.pool_size,
+        }
+
+    def clear(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        with self._pool_lock:
+            while True:
+                try:
+                    self._pool.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._opened = 0
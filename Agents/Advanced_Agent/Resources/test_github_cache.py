@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from github_cache import CachedFetcher
+
+BODY = "# langchain-mcp-adapters\n"
+ETAG = '"readme-v1"'
+
+
+class FakeGithub(BaseHTTPRequestHandler):
+    requests = []
+    # requests are answered once this is set, so a test can hold them
+    gate = threading.Event()
+
+    def do_GET(self):
+        FakeGithub.requests.append(self.headers.get("If-None-Match"))
+        FakeGithub.gate.wait(10)
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        data = BODY.encode()
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def url():
+    FakeGithub.requests = []
+    FakeGithub.gate.set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGithub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/README.md"
+    FakeGithub.gate.set()
+    server.shutdown()
+
+
+async def requests_reached(n):
+    while len(FakeGithub.requests) < n:
+        await asyncio.sleep(0.001)
+
+
+def test_fresh_body_is_served_from_memory(url):
+    async def run():
+        fetcher = CachedFetcher()
+        cold = await fetcher.get(url)
+        # github doesn't answer any more, the fresh body doesn't need it to
+        FakeGithub.gate.clear()
+        warm = await asyncio.wait_for(fetcher.get(url), 5)
+        await fetcher.aclose()
+        return cold, warm
+
+    body, cached = asyncio.run(run())
+
+    assert body == cached == BODY
+    assert len(FakeGithub.requests) == 1
+
+
+def test_stale_body_is_served_while_revalidating(url):
+    async def run():
+        fetcher = CachedFetcher(max_age=0)
+        await fetcher.get(url)
+        FakeGithub.gate.clear()
+        # answered while github still holds the revalidation
+        stale = await asyncio.wait_for(fetcher.get(url), 5)
+        await asyncio.wait_for(requests_reached(2), 5)
+        FakeGithub.gate.set()
+        await fetcher.wait_for_refresh()
+        await fetcher.aclose()
+        return stale
+
+    assert asyncio.run(run()) == BODY
+    assert FakeGithub.requests == [None, ETAG]
+
+
+def test_body_is_reused_from_disk(url, tmp_path):
+    async def run():
+        first = CachedFetcher(cache_dir=str(tmp_path))
+        await first.get(url)
+        await first.aclose()
+
+        FakeGithub.gate.clear()
+        second = CachedFetcher(cache_dir=str(tmp_path))
+        body = await asyncio.wait_for(second.get(url), 5)
+        await second.aclose()
+        return body
+
+    assert asyncio.run(run()) == BODY
+    assert len(FakeGithub.requests) == 1
+
+
+def test_reads_do_not_block_each_other(url):
+    async def run():
+        FakeGithub.gate.clear()
+        fetchers = [CachedFetcher() for _ in range(5)]
+        reads = asyncio.gather(*(f.get(url) for f in fetchers))
+        # all five cold reads reach github before any of them is answered
+        await asyncio.wait_for(requests_reached(5), 5)
+        FakeGithub.gate.set()
+        bodies = await reads
+        for f in fetchers:
+            await f.aclose()
+        return bodies
+
+    assert asyncio.run(run()) == [BODY] * 5
+
+
+def test_disk_reads_run_off_the_event_loop(url, tmp_path, monkeypatch):
+    loop_ran = threading.Event()
+    read = CachedFetcher._read
+
+    def slow_read(path):
+        # only returns once the loop got to run something else meanwhile
+        assert loop_ran.wait(5)
+        return read(path)
+
+    async def run():
+        first = CachedFetcher(cache_dir=str(tmp_path))
+        await first.get(url)
+        await first.aclose()
+
+        monkeypatch.setattr(CachedFetcher, "_read", staticmethod(slow_read))
+        second = CachedFetcher(cache_dir=str(tmp_path))
+        pending = asyncio.create_task(second.get(url))
+        await asyncio.sleep(0.01)
+        loop_ran.set()
+        body = await asyncio.wait_for(pending, 5)
+        await second.aclose()
+        return body
+
+    assert asyncio.run(run()) == BODY
+    assert len(FakeGithub.requests) == 1
+
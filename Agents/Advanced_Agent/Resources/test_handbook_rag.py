@@ -0,0 +1,93 @@
+import numpy as np
+
+from handbook_rag import HashingEmbedder, HandbookRetriever, VectorIndex, chunk_page, extract_pages
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=256)
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+def test_chunks_follow_the_sections():
+    chunks = chunk_page(extract_pages_text())
+    assert [c.split(":")[0] for c in chunks] == [
+        "Employee Handbook - Non-Disclosure Agreement (NDA) Policy",
+        "Workplace Conduct Policy",
+        "Paid Time Off (PTO) Policy",
+        "Travel & Expense Policy",
+    ]
+    assert "Full-time employees" in chunks[2] and "\n- 0–1 years" not in chunks[2]
+
+    long_section = "Policy\n" + " ".join(f"Sentence number {i} is here." for i in range(100))
+    parts = chunk_page(long_section, chunk_size=300)
+    assert len(parts) > 5 and all(len(p) <= 300 for p in parts) and all(p.startswith("Policy: ") for p in parts)
+
+
+def extract_pages_text():
+    return extract_pages(str(HandbookRetriever().pdf_path))[0]
+
+
+def test_hashing_embedder_is_stable_and_normalized():
+    embedder = HashingEmbedder(dim=128)
+    a, b, empty = embedder.embed(["PTO carry over days", "PTO carry over days", ""])
+    assert np.array_equal(a, b) and a.dtype == np.float32
+    assert abs(np.linalg.norm(a) - 1) < 1e-6 and not empty.any()
+
+
+def test_handbook_questions_find_their_section(tmp_path):
+    retriever = HandbookRetriever(index_dir=str(tmp_path / "index"))
+    questions = {
+        "How many unused PTO days can I carry over to next year?": "Paid Time Off",
+        "What is the deadline to submit travel receipts?": "Travel & Expense",
+        "Can I share the product roadmap with a friend?": "Non-Disclosure",
+        "What happens if I harass a coworker?": "Workplace Conduct",
+    }
+    for question, section in questions.items():
+        assert section in retriever.search(question, k=1)[0]["text"], question
+    assert len(retriever.search("expenses", k=10)) == 4
+
+
+def test_ingest_only_embeds_changed_pages(tmp_path):
+    embedder = CountingEmbedder()
+    index = VectorIndex(str(tmp_path / "index"), embedder)
+    pages = ["Leave\nYou get ten days of leave.", "Travel\nReceipts are due within 14 days.", "Security\nLock your laptop."]
+    assert index.ingest_pages(pages) == {"pages": 3, "reused_pages": 0, "embedded_pages": 3, "chunks": 3}
+
+    embedder.embedded.clear()
+    pages[1] = "Travel\nReceipts are due within 30 days."
+    assert index.ingest_pages(pages)["embedded_pages"] == 1
+    assert embedder.embedded == ["Travel: Receipts are due within 30 days."]
+    # the replaced vectors may still be mapped, they are left for a later cleanup
+    assert len(list((tmp_path / "index").glob("vectors-*.f32"))) == 2
+
+    # a fresh process maps the vectors from disk, removes the old ones and embeds nothing
+    embedder.embedded.clear()
+    reopened = VectorIndex(str(tmp_path / "index"), embedder)
+    assert isinstance(reopened.vectors, np.memmap)
+    assert reopened.ingest_pages(pages)["reused_pages"] == 3 and embedder.embedded == []
+    assert "30 days" in reopened.search("when are receipts due", k=1)[0]["text"]
+    assert len(list((tmp_path / "index").glob("vectors-*.f32"))) == 1
+
+    # another embedder can't reuse the vectors
+    other = VectorIndex(str(tmp_path / "index"), HashingEmbedder(dim=64))
+    assert other.ingest_pages(pages)["embedded_pages"] == 3
+
+
+def test_unchanged_vectors_keep_the_mapped_file(tmp_path):
+    index = VectorIndex(str(tmp_path / "index"), HashingEmbedder(dim=64))
+    pages = ["Leave\nYou get ten days of leave.", "Travel\nReceipts are due within 14 days."]
+    index.ingest_pages(pages, source="v1.pdf")
+    mapped = index.vectors
+    (path,) = (tmp_path / "index").glob("vectors-*.f32")
+    written = path.stat().st_mtime_ns
+
+    # only the source changes: same vectors, same file name, the mapped file is reused as is
+    index.ingest_pages(pages, source="v2.pdf")
+    assert path.stat().st_mtime_ns == written
+    assert np.array_equal(mapped, index.vectors)
+    assert index.search("when are receipts due", k=1)[0]["source"] == "v2.pdf"
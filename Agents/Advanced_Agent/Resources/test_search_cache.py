@@ -0,0 +1,94 @@
+import pytest
+
+from search_cache import SearchCache, normalize_query
+
+
+class FakeTavily:
+    """Stands in for TavilyClient so the cache can be tested offline"""
+
+    def __init__(self):
+        self.calls = []
+
+    def search(self, query):
+        self.calls.append(query)
+        return {"query": query, "results": [{"title": f"result for {query}"}]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query():
+    assert normalize_query("  What is   LangGraph? ") == "what is langgraph"
+    assert normalize_query("what is langgraph") == normalize_query("What is LangGraph!")
+
+
+def test_repeated_queries_hit_the_cache():
+    client = FakeTavily()
+    cache = SearchCache()
+
+    first = cache.get_or_search("What is LangGraph?", client.search)
+    second = cache.get_or_search("what is   langgraph", client.search)
+
+    assert first == second
+    assert len(client.calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl():
+    client = FakeTavily()
+    clock = FakeClock()
+    cache = SearchCache(ttl=10, clock=clock)
+
+    cache.get_or_search("langchain", client.search)
+    clock.now += 11
+    cache.get_or_search("langchain", client.search)
+
+    assert len(client.calls) == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    client = FakeTavily()
+    cache = SearchCache(max_size=2)
+
+    cache.get_or_search("a", client.search)
+    cache.get_or_search("b", client.search)
+    cache.get_or_search("a", client.search)
+    cache.get_or_search("c", client.search)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.stats()["size"] == 2
+
+
+def test_cache_survives_restart(tmp_path):
+    client = FakeTavily()
+    path = tmp_path / "search_cache.sqlite3"
+
+    cache = SearchCache(path=str(path))
+    cache.get_or_search("langsmith tracing", client.search)
+    cache.close()
+
+    restarted = SearchCache(path=str(path))
+    result = restarted.get_or_search("Langsmith tracing?", client.search)
+
+    assert result["query"] == "langsmith tracing"
+    assert len(client.calls) == 1
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_failed_search_is_not_cached():
+    cache = SearchCache()
+
+    def failing(query):
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError, match="rate limited"):
+        cache.get_or_search("langgraph", failing)
+
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,125 @@
+import sqlite3
+
+import pytest
+
+from sql_advisor import QueryLog, recommend_indexes, try_indexes
+from sql_tool import CHINOOK_PATH, QueryTimeout, ReadOnlyDB
+
+QUERIES = [
+    (
+        "SELECT t.Name, a.Title FROM Track t JOIN Album a ON a.AlbumId = t.AlbumId "
+        "WHERE t.Composer = ? ORDER BY t.Milliseconds",
+        ("AC/DC",),
+    ),
+    ("SELECT Name FROM Track WHERE MediaTypeId = 2 AND UnitPrice > 1", ()),
+    ("SELECT COUNT(*) FROM InvoiceLine WHERE InvoiceId = ?", (5,)),
+    ("SELECT FirstName, LastName FROM Customer WHERE Country = 'USA'", ()),
+]
+
+
+def logged_queries(path=None):
+    log = QueryLog(path)
+    db = ReadOnlyDB(log=log)
+    for sql, params in QUERIES:
+        db.query(sql, params)
+    # cache hits don't run anything and aren't logged
+    db.query(*QUERIES[0])
+    db.close()
+    return log
+
+
+def test_log_records_plans_and_reads(tmp_path):
+    path = tmp_path / "sql_log.jsonl"
+    log = logged_queries(str(path))
+
+    assert len(log.entries) == len(QUERIES)
+    first = log.entries[0]
+    assert first["plan"][0] == "SCAN t" and first["rows"] == 8
+    assert first["reads"] == {"Album": ["AlbumId", "Title"], "Track": ["AlbumId", "Composer", "Milliseconds", "Name"]}
+    assert QueryLog.load(str(path)) == list(log.entries)
+
+
+def test_recommends_covering_indexes():
+    log = logged_queries()
+    conn = sqlite3.connect(f"{CHINOOK_PATH.as_uri()}?mode=ro", uri=True)
+    advice = recommend_indexes(log.entries, conn)
+    conn.close()
+
+    # InvoiceLine already has a covering index, Customer is too small to bother
+    assert sorted((a.table, a.columns) for a in advice) == [
+        ("Track", ("Composer", "Milliseconds", "AlbumId", "Name")),
+        ("Track", ("MediaTypeId", "UnitPrice", "Name")),
+    ]
+
+
+def test_indexes_are_tried_on_a_copy(tmp_path):
+    log = logged_queries()
+    conn = sqlite3.connect(f"{CHINOOK_PATH.as_uri()}?mode=ro", uri=True)
+    advice = recommend_indexes(log.entries, conn)
+    original = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'").fetchone()
+    report = try_indexes(advice, str(tmp_path / "indexed.db"), log.entries)
+
+    assert report["unused"] == []
+    by_sql = {q["sql"]: q for q in report["queries"]}
+    assert by_sql[QUERIES[0][0]]["after_plan"][0].startswith("SEARCH t USING COVERING INDEX advised_Track_Composer")
+    assert "USE TEMP B-TREE FOR ORDER BY" not in by_sql[QUERIES[0][0]]["after_plan"]
+    # the bundled database is untouched
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index'").fetchone() == original
+    conn.close()
+
+
+def test_replayed_sql_cannot_write(tmp_path):
+    log = logged_queries()
+    conn = sqlite3.connect(f"{CHINOOK_PATH.as_uri()}?mode=ro", uri=True)
+    advice = recommend_indexes(log.entries, conn)
+    conn.close()
+    outside = tmp_path / "x.db"
+    # a log file edited by hand, or written by anything but ReadOnlyDB
+    for sql in ("DELETE FROM Track", f"ATTACH DATABASE '{outside.as_uri()}?mode=rwc' AS e", "PRAGMA query_only = OFF"):
+        with pytest.raises(sqlite3.DatabaseError):
+            try_indexes(advice, str(tmp_path / "indexed.db"), [{"sql": sql, "params": []}])
+    assert not outside.exists()
+
+    copy = sqlite3.connect(tmp_path / "indexed.db")
+    assert copy.execute("SELECT COUNT(*) FROM Track").fetchone() == (3503,)
+    copy.close()
+
+
+def test_replayed_sql_is_interrupted_after_the_timeout(tmp_path):
+    runaway = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n"
+    log = logged_queries()
+    conn = sqlite3.connect(f"{CHINOOK_PATH.as_uri()}?mode=ro", uri=True)
+    advice = recommend_indexes(log.entries, conn)
+    conn.close()
+
+    with pytest.raises(QueryTimeout):
+        try_indexes(advice, str(tmp_path / "indexed.db"), [{"sql": runaway, "params": []}], timeout=0.1)
+
+
+def test_failing_plan_does_not_fail_the_query(monkeypatch, capsys):
+    def fail(conn, sql, params=()):
+        raise sqlite3.OperationalError("no plan")
+
+    monkeypatch.setattr(QueryLog, "explain", staticmethod(fail))
+    log = QueryLog()
+    db = ReadOnlyDB(log=log)
+
+    assert db.query("SELECT COUNT(*) FROM Genre")["rows"] == [(25,)]
+    assert (log.entries[0]["plan"], log.entries[0]["reads"]) == ([], {})
+    assert "no plan" in capsys.readouterr().err
+    db.close()
+
+
+def test_log_file_is_rotated(tmp_path):
+    path = tmp_path / "sql_log.jsonl"
+    log = QueryLog(str(path), max_bytes=2000)
+    db = ReadOnlyDB(log=log, cache_size=0)
+    for i in range(40):
+        db.query("SELECT Name FROM Genre WHERE GenreId = ?", (i,))
+    db.close()
+
+    assert path.stat().st_size <= 2000
+    assert (tmp_path / "sql_log.jsonl.1").stat().st_size <= 2000
+    loaded = QueryLog.load(str(path))
+    assert 0 < len(loaded) < 40
+    assert loaded[-1] == log.entries[-1]
@@ -0,0 +1,38 @@
+import sql_schema
+from sql_schema import SchemaCache, describe
+from sql_tool import ReadOnlyDB
+
+
+def test_summary_lists_every_table():
+    db = ReadOnlyDB()
+    with db.introspection() as conn:
+        summary = describe(conn)
+    db.close()
+
+    tables = [line.split()[1] for line in summary.splitlines() if line.startswith("## ")]
+    assert tables == [
+        "Album", "Artist", "Customer", "Employee", "Genre", "Invoice",
+        "InvoiceLine", "MediaType", "Playlist", "PlaylistTrack", "Track",
+    ]
+    assert "## Track (3503 rows)" in summary
+    assert "AlbumId INTEGER -> Album.AlbumId" in summary
+    assert "IFK_TrackAlbumId (AlbumId)" in summary
+    assert "(1, 'AC/DC')" in summary
+
+
+def test_summary_is_computed_once(tmp_path, monkeypatch):
+    path = tmp_path / "schema.json"
+    db = ReadOnlyDB()
+    cache = SchemaCache(db, path=str(path))
+    summary = cache.get()
+    assert path.exists()
+
+    def fail(conn, samples):
+        raise AssertionError("schema was described again")
+
+    # a restarted server reads the file instead of the database
+    monkeypatch.setattr(sql_schema, "describe", fail)
+    restarted = SchemaCache(db, path=str(path))
+    assert restarted.get() == summary
+    assert cache.get() is summary
+    db.close()
@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+
+import pytest
+
+from sql_tool import QueryTimeout, ReadOnlyDB, normalize_sql
+
+RUNAWAY = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n"
+
+
+def test_normalize_sql():
+    assert normalize_sql("  SELECT *\n  FROM   Artist ; ") == "select * from artist"
+    # literals are compared as written
+    assert normalize_sql("SELECT * FROM Artist WHERE Name = 'AC/DC'") == "select * from artist where name = 'AC/DC'"
+    assert normalize_sql("select 'A  B'") != normalize_sql("select 'a b'")
+
+
+def test_writes_are_rejected():
+    db = ReadOnlyDB()
+    for sql in ("DELETE FROM Artist", "CREATE TABLE t (x)", "PRAGMA query_only = OFF; DELETE FROM Artist"):
+        with pytest.raises(sqlite3.Error):
+            db.query(sql)
+    assert db.query("SELECT COUNT(*) FROM Artist")["rows"] == [(275,)]
+    db.close()
+
+
+def test_sandbox_cannot_be_turned_off_or_escaped(tmp_path):
+    db = ReadOnlyDB(pool_size=1)
+    outside = tmp_path / "x.db"
+    for sql in (
+        "PRAGMA query_only = OFF",
+        "PRAGMA table_info(Artist)",
+        f"ATTACH DATABASE '{outside.as_uri()}?mode=rwc' AS e",
+        "CREATE TABLE e.t (x)",
+        "INSERT INTO e.t VALUES (1)",
+        "CREATE TEMP TABLE t (x)",
+        "INSERT INTO Artist (Name) VALUES ('x')",
+        "BEGIN",
+    ):
+        with pytest.raises(sqlite3.DatabaseError):
+            db.query(sql)
+    assert not outside.exists()
+    with pytest.raises(sqlite3.DatabaseError, match="not authorized"):
+        db.query("PRAGMA query_only = OFF")
+
+    # no database can be attached even with the authorizer gone
+    with db.connection() as conn:
+        conn.set_authorizer(None)
+        with pytest.raises(sqlite3.OperationalError, match="too many attached"):
+            conn.execute(f"ATTACH DATABASE '{outside.as_uri()}?mode=rwc' AS e")
+        assert conn.execute("PRAGMA query_only").fetchone() == (1,)
+    assert not outside.exists()
+    db.close()
+
+
+def test_repeated_queries_hit_the_cache():
+    db = ReadOnlyDB(cache_size=2)
+    first = db.query("SELECT Name FROM Genre WHERE GenreId = ?", (1,))
+    again = db.query("select name\nfrom genre where genreid = ?;", [1])
+    other = db.query("SELECT Name FROM Genre WHERE GenreId = ?", (2,))
+
+    assert first is again and first["rows"] == [("Rock",)] and other["rows"] == [("Jazz",)]
+    assert (db.stats()["hits"], db.stats()["misses"]) == (1, 2)
+
+    db.query("SELECT 1")
+    db.query("SELECT Name FROM Genre WHERE GenreId = ?", (1,))
+    # the genre 1 query was evicted by the two after it
+    assert db.stats()["misses"] == 4
+    db.close()
+
+
+def test_pages_and_row_cap():
+    db = ReadOnlyDB(max_rows=100)
+    sql = "SELECT TrackId FROM Track ORDER BY TrackId"
+    pages = [db.page(sql, page=n, page_size=40) for n in (1, 2, 3)]
+
+    assert [len(p["rows"]) for p in pages] == [40, 40, 20]
+    assert [p["has_more"] for p in pages] == [True, True, False]
+    assert pages[2]["rows"][-1] == [100] and pages[0]["truncated"]
+    # later pages come from the cached result
+    assert db.stats()["misses"] == 1
+
+    # streaming has no cap
+    assert sum(len(rows) for rows in db.iter_pages(sql, page_size=500)) == 3503
+    db.close()
+
+
+def test_runaway_query_is_interrupted():
+    db = ReadOnlyDB(timeout=0.2, pool_size=1)
+    with pytest.raises(QueryTimeout):
+        db.query(RUNAWAY)
+    # the connection went back to the pool and still works
+    assert db.query("SELECT COUNT(*) FROM Album")["rows"] == [(347,)]
+    assert db.stats()["timeouts"] == 1 and db.stats()["connections"] == 1
+    db.close()
+
+
+def test_threads_share_the_pool():
+    db = ReadOnlyDB(pool_size=3, cache_size=0)
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(20):
+                rows = db.query("SELECT COUNT(*) FROM InvoiceLine WHERE InvoiceId = ?", (n * 20 + i + 1,))["rows"]
+                assert rows[0][0] > 0
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert db.stats()["connections"] <= 3
+    db.close()
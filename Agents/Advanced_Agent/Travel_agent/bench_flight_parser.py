@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: flight_parser.parse_flights vs the old parse_flight_data loop.
+
+    python bench_flight_parser.py [n_flights]
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import flight_parser
+from flight_samples import make_flights, tool_message
+from flight_parser import parse_flights
+
+
+def legacy_parse_flight_data(response):
+    """parse_flight_data as it was before flight_parser"""
+    flights = []
+
+    for msg in response['messages']:
+        if hasattr(msg, 'content') and isinstance(msg.content, list):
+            for content_item in msg.content:
+                if isinstance(content_item, dict) and content_item.get('type') == 'text':
+                    try:
+                        flight_data = json.loads(content_item['text'])
+                        if isinstance(flight_data, list):
+                            flights = flight_data
+                            break
+                    except:
+                        pass
+
+    return flights
+
+
+def conversation(n, tool_calls):
+    """A response with `tool_calls` flight searches between chatty AI messages"""
+    flights = list(make_flights(n))
+    per_call = n // tool_calls
+    messages = [HumanMessage("Get me a direct flight from Hyderabad to Chennai on March 31st")]
+    for i in range(tool_calls):
+        messages.append(AIMessage(content=[{"type": "text", "text": "Let me search for flights. " * 20}]))
+        messages.append(tool_message(flights[i * per_call:(i + 1) * per_call]))
+    messages.append(AIMessage(content=[{"type": "text", "text": "Here are the cheapest options. " * 50}]))
+    return {"messages": messages}
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def retained(fn):
+    tracemalloc.start()
+    result = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main(n):
+    for tool_calls in (1, 10):
+        response = conversation(n, tool_calls)
+        print(f"\n{n} flights in {tool_calls} tool result(s), {len(response['messages'])} messages")
+
+        legacy, legacy_time = best_of(lambda: legacy_parse_flight_data(response))
+        fast, fast_time = best_of(lambda: parse_flights(response["messages"]))
+        _, legacy_mem = retained(lambda: legacy_parse_flight_data(response))
+        _, fast_mem = retained(lambda: parse_flights(response["messages"]))
+
+        backend = flight_parser.loads
+        flight_parser.loads = json.loads
+        _, stdlib_time = best_of(lambda: parse_flights(response["messages"]))
+        flight_parser.loads = backend
+
+        print(f"legacy              {legacy_time * 1000:8.1f} ms  {len(legacy):7} flights  {legacy_mem / 2**20:7.1f} MiB kept")
+        print(f"parse_flights json  {stdlib_time * 1000:8.1f} ms  {len(fast):7} flights")
+        print(f"parse_flights {flight_parser.JSON_BACKEND:<6}{fast_time * 1000:8.1f} ms  {len(fast):7} flights  {fast_mem / 2**20:7.1f} MiB kept")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
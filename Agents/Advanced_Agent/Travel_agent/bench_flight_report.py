@@ -0,0 +1,54 @@
+"""
+Flight report benchmark on a synthetic Kiwi payload.
+
+    python bench_flight_report.py [n_flights]
+
+batch  : generate_html_report on one agent response holding every flight
+stream : stream_html_report fed by a fake agent that streams tool results in chunks
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from flight_samples import FakeStreamingAgent, make_flights, tool_message
+from travel_Agent_With_html import generate_html_report, stream_html_report
+
+
+def measure(fn):
+    # timed without tracemalloc (it slows python down a lot), then run again for the peak
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, start, elapsed, peak
+
+
+def main(n):
+    os.chdir(tempfile.mkdtemp())
+
+    def batch():
+        response = {"messages": [tool_message(list(make_flights(n)))]}
+        return generate_html_report(response)
+
+    def stream():
+        agent = FakeStreamingAgent(n, "flight_results_stream.html")
+        asyncio.run(stream_html_report(agent, {}, "flight_results_stream.html"))
+        return agent
+
+    _, _, batch_time, batch_peak = measure(batch)
+    agent, start, stream_time, stream_peak = measure(stream)
+
+    print(f"\n{n} flights")
+    print(f"batch   total {batch_time:6.2f} s   peak memory {batch_peak / 2**20:8.1f} MiB")
+    print(f"stream  total {stream_time:6.2f} s   peak memory {stream_peak / 2**20:8.1f} MiB"
+          f"   first rows on disk after {(agent.first_rows_at - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,68 @@
+"""
+Report statistics with FlightTable vs list-comprehension passes.
+
+    python bench_flight_table.py [sizes...]      (default 10000 100000 1000000)
+
+lists : split direct/connecting, sort by price, min price, min duration, average
+table : the same through FlightTable, plus top-k and grouped stats
+"""
+import sys
+import time
+
+from flight_samples import make_flights
+from flight_parser import Flight
+from flight_table import FlightTable
+
+
+def list_passes(flights):
+    direct = [f for f in flights if f.is_direct]
+    connecting = [f for f in flights if not f.is_direct]
+    direct.sort(key=lambda x: x.price)
+    cheapest = min(f.price for f in direct)
+    shortest = min(f.duration for f in direct)
+    average = sum(f.price for f in direct) / len(direct)
+    return direct, connecting, cheapest, shortest, average
+
+
+def table_passes(table):
+    direct = table.filter(direct=True).sort("price")
+    connecting = table.filter(direct=False)
+    return direct, connecting, direct.stats()
+
+
+def list_extras(flights):
+    # what top-k and per-carrier stats cost without the table
+    top = sorted(flights, key=lambda f: (f.price, f.duration))[:10]
+    groups = {}
+    for f in flights:
+        groups.setdefault(f.carrier, []).append(f.price)
+    return top, {c: (min(p), sum(p) / len(p)) for c, p in groups.items()}
+
+
+def table_extras(table):
+    return table.top_k(10), table.group_stats("carrier"), table.group_stats("hour")
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(sizes):
+    print(f"{'rows':>9} {'build':>9} {'lists':>9} {'table':>9} {'lists+':>9} {'table+':>9}  (ms)")
+    for n in sizes:
+        flights = [Flight.from_json(f) for f in make_flights(n)]
+        build = timed(lambda: FlightTable.from_flights(flights), repeat=1)
+        table = FlightTable.from_flights(flights)
+        print(
+            f"{n:>9} {build:9.1f} {timed(lambda: list_passes(flights)):9.1f} {timed(lambda: table_passes(table)):9.1f}"
+            f" {timed(lambda: list_extras(flights)):9.1f} {timed(lambda: table_extras(table)):9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
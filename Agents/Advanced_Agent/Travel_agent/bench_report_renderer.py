@@ -0,0 +1,67 @@
+"""
+Report renderer startup and per-report render time.
+
+    python bench_report_renderer.py [reports] [flights_per_report]
+
+startup  : compiling the templates (once per process)
+single   : one report with renderer.write
+batch    : many reports in a loop vs render_many with a process pool
+pages    : a 100k-flight result set split into pages
+"""
+import os
+import sys
+import tempfile
+import time
+
+import report_renderer
+from flight_samples import make_flights
+from flight_parser import Flight
+from report_renderer import ReportRenderer, get_renderer, render_many
+
+CITIES = [("HYD", "Hyderabad"), ("MAA", "Chennai"), ("BLR", "Bengaluru"), ("DEL", "Delhi"), ("BOM", "Mumbai")]
+
+
+def jobs(reports, per_report):
+    for i in range(reports):
+        (origin, origin_city), (destination, destination_city) = CITIES[i % 5], CITIES[(i + 1) % 5]
+        flights = [Flight.from_json(f) for f in make_flights(per_report, seed=i)]
+        params = {"origin": origin, "origin_city": origin_city, "destination": destination,
+                  "destination_city": destination_city, "currency": "INR" if i % 2 else "EUR"}
+        yield f"report-{i}.html", flights, params
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(reports, per_report):
+    out = tempfile.mkdtemp()
+    work = list(jobs(reports, per_report))
+
+    report_renderer.compile_template.cache_clear()
+    get_renderer.cache_clear()
+    _, startup = timed(lambda: get_renderer())
+    renderer = get_renderer()
+    print(f"startup (compile templates)     {startup:8.2f} ms")
+
+    name, flights, params = work[0]
+    _, single = timed(lambda: renderer.write(os.path.join(out, name), flights, **params))
+    _, cold = timed(lambda: ReportRenderer().write(os.path.join(out, name), flights, **params))
+    print(f"single report, {per_report} flights     {single:8.2f} ms   (new renderer each time: {cold:.2f} ms)")
+
+    _, loop = timed(lambda: [renderer.write(os.path.join(out, n), f, **p) for n, f, p in work])
+    _, pooled = timed(lambda: render_many(work, out))
+    print(f"{reports} reports in a loop          {loop:8.1f} ms   ({loop / reports:.2f} ms/report)")
+    print(f"{reports} reports, process pool      {pooled:8.1f} ms   ({pooled / reports:.2f} ms/report, {os.cpu_count()} cpus)")
+
+    big = [Flight.from_json(f) for f in make_flights(100_000)]
+    pages, paged = timed(lambda: renderer.write_pages(os.path.join(out, "big.html"), big, page_size=5000))
+    _, whole = timed(lambda: renderer.write(os.path.join(out, "big-single.html"), big))
+    print(f"100k flights, {len(pages)} pages            {paged:8.1f} ms   (one file: {whole:.1f} ms)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [200, 200][len(args):]))
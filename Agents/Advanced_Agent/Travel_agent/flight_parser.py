@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    # orjson decodes large flight payloads several times faster, use it when installed
+    from orjson import loads
+
+    JSON_BACKEND = "orjson"
+except ImportError:
+    import json
+
+    loads = json.loads
+    JSON_BACKEND = "json"
+
+# keys a tool may wrap its flight list in
+LIST_KEYS = ("flights", "data", "results", "itineraries")
+
+
+class InvalidFlight(ValueError):
+    """A flight item is missing a required field or has one of the wrong type"""
+
+
+def _text(value) -> str:
+    # optional text fields, anything but a string counts as missing
+    return value if type(value) is str else ""
+
+
+@dataclass(slots=True)
+class Flight:
+    """One itinerary from the Kiwi search tool"""
+
+    fly_from: str
+    fly_to: str
+    city_from: str
+    city_to: str
+    departure: str
+    arrival: str
+    duration: int
+    price: float
+    currency: str
+    deep_link: str
+    layovers: Tuple[str, ...] = ()
+    carrier: str = ""
+
+    @property
+    def is_direct(self) -> bool:
+        return not self.layovers
+
+    @classmethod
+    def from_json(cls, item: Dict[str, Any]) -> "Flight":
+        """
+        Validate a Kiwi item and build the record, raising InvalidFlight when
+        flyFrom/flyTo, departure/arrival.local (str), durationInSeconds (int)
+        or price (number) is missing or of another type, or a layover has no "at".
+        """
+        get = item.get
+        try:
+            fly_from, fly_to = item["flyFrom"], item["flyTo"]
+            departure, arrival = item["departure"]["local"], item["arrival"]["local"]
+            duration, price = item["durationInSeconds"], item["price"]
+            layovers = tuple([layover["at"] for layover in get("layovers") or ()])
+        except (KeyError, TypeError) as e:
+            raise InvalidFlight(f"missing or malformed field {e}") from None
+        # exact type checks, bool is an int but never a duration or a price
+        if not (
+            type(fly_from) is str and type(fly_to) is str
+            and type(departure) is str and type(arrival) is str
+            and type(duration) is int and type(price) in (int, float)
+            and all(type(at) is str for at in layovers)
+        ):
+            raise InvalidFlight("a required field has the wrong type")
+        # positional arguments, this runs once per itinerary
+        return cls(
+            fly_from,
+            fly_to,
+            _text(get("cityFrom")),
+            _text(get("cityTo")),
+            departure,
+            arrival,
+            duration,
+            price,
+            _text(get("currency")),
+            _text(get("deepLink")),
+            layovers,
+            _text(get("carrier")),
+        )
+
+
+def _is_tool_result(msg) -> bool:
+    return getattr(msg, "type", None) == "tool"
+
+
+def _texts(content) -> Iterable[str]:
+    if isinstance(content, str):
+        yield content
+    elif isinstance(content, list):
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == "text":
+                yield block["text"]
+            elif isinstance(block, str):
+                yield block
+
+
+def _flight_list(data) -> List[Dict[str, Any]]:
+    if isinstance(data, dict):
+        for key in LIST_KEYS:
+            if isinstance(data.get(key), list):
+                return data[key]
+        return []
+    return data if isinstance(data, list) else []
+
+
+def flights_from_message(msg, rejected: Optional[List[Tuple[Dict[str, Any], str]]] = None) -> List[Flight]:
+    """
+    Flights in one tool result message ([] for any other message).
+
+    Items that look like flights but don't validate are skipped, with
+    `rejected` they are collected there as (item, reason).
+    """
+    if not _is_tool_result(msg):
+        return []
+    flights = []
+    for text in _texts(msg.content):
+        text = text.lstrip()
+        # only JSON arrays/objects can hold flights, skip prose without decoding it
+        if not text.startswith(("[", "{")):
+            continue
+        try:
+            data = loads(text)
+        except ValueError:
+            continue
+        from_json = Flight.from_json
+        for item in _flight_list(data):
+            if not (isinstance(item, dict) and "flyFrom" in item):
+                continue
+            try:
+                flights.append(from_json(item))
+            except InvalidFlight as e:
+                if rejected is not None:
+                    rejected.append((item, str(e)))
+    return flights
+
+
+def parse_flights(messages, rejected: Optional[List[Tuple[Dict[str, Any], str]]] = None) -> List[Flight]:
+    """Flights from every tool call in the conversation, duplicates and malformed items removed"""
+    flights = []
+    seen = set()
+    for msg in messages:
+        for flight in flights_from_message(msg, rejected):
+            key = flight.deep_link or (flight.fly_from, flight.fly_to, flight.departure, flight.price)
+            if key not in seen:
+                seen.add(key)
+                flights.append(flight)
+    return flights
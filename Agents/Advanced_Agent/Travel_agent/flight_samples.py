@@ -0,0 +1,65 @@
+"""
+Synthetic Kiwi search results shared by the flight tests and benchmarks.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+
+from langchain_core.messages import ToolMessage
+
+CHUNK = 1000
+AIRPORTS = ["MAA", "BLR", "BOM", "DEL", "CCU", "GOI", "COK", "PNQ"]
+CARRIERS = ["6E", "AI", "UK", "SG", "QP", "IX"]
+
+
+def make_flights(n, seed=0):
+    """Synthetic flights shaped like the Kiwi MCP search results"""
+    rng = random.Random(seed)
+    for i in range(n):
+        hour, minute = rng.randrange(24), rng.randrange(0, 60, 5)
+        duration = rng.randrange(70, 900) * 60
+        stops = rng.choice([0, 0, 0, 1, 1, 2])
+        arrival_minutes = hour * 60 + minute + duration // 60
+        yield {
+            "flyFrom": "HYD",
+            "flyTo": "MAA",
+            "cityFrom": "Hyderabad",
+            "cityTo": "Chennai",
+            "departure": {"local": f"2026-03-31T{hour:02d}:{minute:02d}:00.000"},
+            "arrival": {"local": f"2026-03-31T{arrival_minutes // 60 % 24:02d}:{arrival_minutes % 60:02d}:00.000"},
+            "durationInSeconds": duration,
+            "price": rng.randrange(35, 400),
+            "currency": "EUR",
+            "carrier": rng.choice(CARRIERS),
+            "layovers": [{"at": rng.choice(AIRPORTS)} for _ in range(stops)],
+            "deepLink": f"https://www.kiwi.com/deep?flight={i}",
+        }
+
+
+def tool_message(flights):
+    return ToolMessage(
+        content=[{"type": "text", "text": json.dumps(flights)}],
+        tool_call_id="search-flight",
+    )
+
+
+class FakeStreamingAgent:
+    """Yields the flights as many tool messages, like an agent paging through results"""
+
+    def __init__(self, n, output_path):
+        self.n = n
+        self.output_path = output_path
+        self.first_rows_at = None
+
+    async def astream(self, inputs, config=None, stream_mode="updates"):
+        flights = make_flights(self.n)
+        while True:
+            chunk = [f for _, f in zip(range(CHUNK), flights)]
+            if not chunk:
+                return
+            if self.first_rows_at is None and os.path.exists(self.output_path) and os.path.getsize(self.output_path) > 20_000:
+                self.first_rows_at = time.perf_counter()
+            yield {"tools": {"messages": [tool_message(chunk)]}}
+            await asyncio.sleep(0)
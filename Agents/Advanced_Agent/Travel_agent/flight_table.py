@@ -0,0 +1,159 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from flight_parser import Flight
+
+SORT_COLUMNS = ("price", "duration", "stops", "departure")
+
+
+def _minute_of_day(timestamp: str) -> int:
+    # "2026-03-31T10:05:00.000" -> 605
+    return int(timestamp[11:13]) * 60 + int(timestamp[14:16])
+
+
+def _to_minutes(value: Union[int, str]) -> int:
+    if isinstance(value, str):
+        hours, minutes = value.split(":")
+        return int(hours) * 60 + int(minutes)
+    return value
+
+
+class FlightTable:
+    """
+    Flight results as NumPy columns (one array per field).
+
+    Filters, sorts and statistics are vectorized over the columns. Every
+    operation returns a new table holding row numbers into the same Flight
+    records, so the records are never copied and rows can still be rendered.
+    """
+
+    def __init__(self, records: Sequence[Flight], columns: Dict[str, np.ndarray], carriers: List[str]):
+        self.records = records
+        self.columns = columns
+        self.carriers = carriers
+
+    @classmethod
+    def from_flights(cls, flights: Sequence[Flight]) -> "FlightTable":
+        n = len(flights)
+        codes: Dict[str, int] = {}
+        carrier = np.fromiter(
+            (codes.setdefault(f.carrier, len(codes)) for f in flights), dtype=np.int32, count=n
+        )
+        carriers = list(codes)
+        columns = {
+            "row": np.arange(n, dtype=np.int64),
+            "price": np.fromiter((f.price for f in flights), dtype=np.float64, count=n),
+            "duration": np.fromiter((f.duration for f in flights), dtype=np.int64, count=n),
+            "stops": np.fromiter((len(f.layovers) for f in flights), dtype=np.int16, count=n),
+            "departure": np.fromiter((_minute_of_day(f.departure) for f in flights), dtype=np.int16, count=n),
+            "carrier": carrier,
+        }
+        return cls(flights, columns, carriers)
+
+    def __len__(self) -> int:
+        return len(self.columns["row"])
+
+    def _take(self, index: np.ndarray) -> "FlightTable":
+        columns = {name: column[index] for name, column in self.columns.items()}
+        return FlightTable(self.records, columns, self.carriers)
+
+    def slice(self, start: int, stop: int) -> "FlightTable":
+        """Rows start..stop of the table (a view, nothing is copied)"""
+        columns = {name: column[start:stop] for name, column in self.columns.items()}
+        return FlightTable(self.records, columns, self.carriers)
+
+    def filter(
+        self,
+        direct: Optional[bool] = None,
+        max_price: Optional[float] = None,
+        depart_after: Union[int, str, None] = None,
+        depart_before: Union[int, str, None] = None,
+        carrier: Optional[str] = None,
+    ) -> "FlightTable":
+        """Rows matching every given condition (times are "HH:MM" or minutes after midnight)"""
+        mask = np.ones(len(self), dtype=bool)
+        if direct is not None:
+            mask &= (self.columns["stops"] == 0) if direct else (self.columns["stops"] > 0)
+        if max_price is not None:
+            mask &= self.columns["price"] <= max_price
+        if depart_after is not None:
+            mask &= self.columns["departure"] >= _to_minutes(depart_after)
+        if depart_before is not None:
+            mask &= self.columns["departure"] <= _to_minutes(depart_before)
+        if carrier is not None:
+            code = self.carriers.index(carrier) if carrier in self.carriers else -1
+            mask &= self.columns["carrier"] == code
+        return self._take(np.flatnonzero(mask))
+
+    def sort(self, by: Union[str, Sequence[str]] = "price", descending: bool = False) -> "FlightTable":
+        """Stable sort on one or more columns, the first key is the most significant"""
+        keys = [by] if isinstance(by, str) else list(by)
+        for key in keys:
+            if key not in SORT_COLUMNS:
+                raise ValueError(f"Can't sort by {key!r}, expected one of {SORT_COLUMNS}")
+        # lexsort treats the last key as the primary one
+        order = np.lexsort([self.columns[key] for key in reversed(keys)])
+        if descending:
+            order = order[::-1]
+        return self._take(order)
+
+    def top_k(self, k: int, by: str = "price") -> "FlightTable":
+        """The k smallest rows by one column, in order"""
+        if k >= len(self):
+            return self.sort(by)
+        candidates = np.argpartition(self.columns[by], k)[:k]
+        order = candidates[np.argsort(self.columns[by][candidates], kind="stable")]
+        return self._take(order)
+
+    def stats(self) -> Dict[str, Any]:
+        if not len(self):
+            return {"count": 0, "min_price": 0, "avg_price": 0, "min_duration": 0}
+        cheapest = self.records[self.columns["row"][np.argmin(self.columns["price"])]]
+        return {
+            "count": len(self),
+            # taken from the record so the price keeps its original type (int stays int)
+            "min_price": cheapest.price,
+            "avg_price": float(self.columns["price"].mean()),
+            "min_duration": int(self.columns["duration"].min()),
+        }
+
+    def group_stats(self, by: str = "carrier") -> Dict[Any, Dict[str, Any]]:
+        """count / min / mean price and min duration per carrier or per departure "hour" """
+        if by == "carrier":
+            keys = self.columns["carrier"]
+        elif by == "hour":
+            keys = self.columns["departure"] // 60
+        else:
+            raise ValueError("group_stats(by=...) expects 'carrier' or 'hour'")
+        if not len(self):
+            return {}
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        counts = np.diff(np.r_[starts, len(order)])
+        prices = self.columns["price"][order]
+        durations = self.columns["duration"][order]
+        min_price = np.minimum.reduceat(prices, starts)
+        sum_price = np.add.reduceat(prices, starts)
+        min_duration = np.minimum.reduceat(durations, starts)
+
+        groups = {}
+        for i, start in enumerate(starts):
+            key = int(sorted_keys[start])
+            if by == "carrier":
+                key = self.carriers[key]
+            groups[key] = {
+                "count": int(counts[i]),
+                "min_price": float(min_price[i]),
+                "avg_price": float(sum_price[i] / counts[i]),
+                "min_duration": int(min_duration[i]),
+            }
+        return groups
+
+    def flights(self) -> Iterator[Flight]:
+        """The Flight records of this table, in table order"""
+        records = self.records
+        for row in self.columns["row"].tolist():
+            yield records[row]
@@ -0,0 +1,482 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flight_parser import Flight
+from flight_table import FlightTable
+
+# the stylesheet is static, it is emitted once: inlined as a constant or written to report.css
+REPORT_CSS = """        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 20px;
+            color: #333;
+            line-height: 1.6;
+        }
+        
+        .container {
+            max-width: 1400px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 15px;
+            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
+            overflow: hidden;
+        }
+        
+        .header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 40px;
+            text-align: center;
+        }
+        
+        .header h1 {
+            font-size: 2.8em;
+            margin-bottom: 10px;
+            font-weight: 700;
+        }
+        
+        .header p {
+            font-size: 1.3em;
+            opacity: 0.95;
+            margin: 5px 0;
+        }
+        
+        .stats {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+            gap: 20px;
+            padding: 30px 40px;
+            background: #f8f9ff;
+        }
+        
+        .stat-card {
+            background: white;
+            padding: 25px;
+            border-radius: 10px;
+            box-shadow: 0 3px 10px rgba(0,0,0,0.1);
+            text-align: center;
+            border-left: 5px solid #667eea;
+        }
+        
+        .stat-card h4 {
+            color: #667eea;
+            font-size: 0.9em;
+            text-transform: uppercase;
+            letter-spacing: 1px;
+            margin-bottom: 10px;
+        }
+        
+        .stat-card p {
+            font-size: 2em;
+            font-weight: bold;
+            color: #333;
+        }
+        
+        .content {
+            padding: 40px;
+        }
+        
+        h3 {
+            color: #667eea;
+            margin: 40px 0 20px 0;
+            font-size: 1.8em;
+            border-bottom: 3px solid #667eea;
+            padding-bottom: 10px;
+            display: flex;
+            align-items: center;
+            gap: 10px;
+        }
+        
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin: 20px 0 40px 0;
+            background: white;
+            box-shadow: 0 2px 15px rgba(0,0,0,0.1);
+            border-radius: 10px;
+            overflow: hidden;
+        }
+        
+        thead {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        }
+        
+        th {
+            color: white;
+            padding: 18px 15px;
+            text-align: left;
+            font-weight: 600;
+            text-transform: uppercase;
+            font-size: 0.85em;
+            letter-spacing: 0.5px;
+        }
+        
+        td {
+            padding: 18px 15px;
+            border-bottom: 1px solid #e0e0e0;
+        }
+        
+        tbody tr:hover {
+            background-color: #f8f9ff;
+            transform: scale(1.01);
+            transition: all 0.2s ease;
+        }
+        
+        tbody tr:last-child td {
+            border-bottom: none;
+        }
+        
+        a {
+            color: white;
+            background: #667eea;
+            text-decoration: none;
+            font-weight: 600;
+            padding: 10px 20px;
+            border-radius: 5px;
+            transition: all 0.3s ease;
+            display: inline-block;
+        }
+        
+        a:hover {
+            background: #764ba2;
+            transform: translateY(-2px);
+            box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
+        }
+        
+        .price {
+            font-weight: bold;
+            color: #27ae60;
+            font-size: 1.2em;
+        }
+        
+        .duration {
+            color: #e74c3c;
+            font-weight: 600;
+        }
+        
+        .footer {
+            background: #f5f5f5;
+            padding: 25px;
+            text-align: center;
+            color: #666;
+            font-size: 0.9em;
+        }
+        
+        .footer p {
+            margin: 5px 0;
+        }
+        
+        small {
+            color: #888;
+            font-size: 0.85em;
+        }
+        
+        .no-flights {
+            text-align: center;
+            padding: 40px;
+            color: #666;
+            font-size: 1.2em;
+        }
+"""
+
+PAGE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Flight Search Results - {origin_city} to {destination_city}</title>
+{style}</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>✈️ Flight Search Results</h1>
+            <p><strong>{origin_city} ({origin})</strong> → <strong>{destination_city} ({destination})</strong></p>
+            <p>📅 {date}</p>
+        </div>
+        
+"""
+
+STATS = """        <div class="stats">
+            <div class="stat-card">
+                <h4>Total Flights Found</h4>
+                <p>{total}</p>
+            </div>
+            <div class="stat-card">
+                <h4>Cheapest Price</h4>
+                <p>{cheapest_price} {currency}</p>
+            </div>
+            <div class="stat-card">
+                <h4>Shortest Duration</h4>
+                <p>{shortest_duration}</p>
+            </div>
+            <div class="stat-card">
+                <h4>Direct Flights</h4>
+                <p>{direct_count}</p>
+            </div>
+        </div>
+        
+"""
+
+TABLE_START = """
+            <h3>{title}</h3>
+            <table>
+                <thead>
+                    <tr>
+                        <th>Route</th>
+                        <th>Date & Time</th>
+                        <th>Duration</th>
+                        <th>Price</th>
+                        <th>Action</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    """
+
+TABLE_END = """
+                </tbody>
+            </table>
+        """
+
+TIP = """
+            <div style="background: #fff4e6; border-left: 5px solid #ff9800; padding: 20px; margin: 30px 0; border-radius: 5px;">
+                <h4 style="color: #ff9800; margin-bottom: 10px;">💡 Travel Tip</h4>
+                <p><strong>Did you know?</strong> {tip}</p>
+            </div>"""
+
+PAGER = """
+            <p class="pager">Page {page} of {pages} {links}</p>"""
+
+PAGE_FOOT = """        <div class="footer">
+            <p><strong>Generated on {generated_at}</strong></p>
+            <p>Powered by Kiwi.com Flight Search API | Data subject to availability and change</p>
+            <p style="margin-top: 10px; color: #999; font-size: 0.85em;">All prices shown are in {currency}. Please check the booking site for final prices and availability.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+TRAVEL_TIPS = {
+    "MAA": 'Chennai is often referred to as the "Detroit of India" due to its significant automobile industry. It\'s also home to Marina Beach, one of the longest urban beaches in the world!',
+}
+
+Compiled = Tuple[Tuple[str, Optional[str]], ...]
+
+
+@lru_cache(maxsize=None)
+def compile_template(text: str) -> Compiled:
+    """Split a template into (literal, field) pairs once; rendering is then a single join"""
+    return tuple((literal, field) for literal, field, _, _ in Formatter().parse(text))
+
+
+def fill(template: str, **values: Any) -> str:
+    return "".join(
+        literal + (str(values[field]) if field is not None else "")
+        for literal, field in compile_template(template)
+    )
+
+
+def format_duration(seconds):
+    """Convert seconds to human readable format"""
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    return f"{hours}h {minutes}m"
+
+
+def flight_row(flight: Flight) -> str:
+    """One <tr> of the flight table"""
+    departure_date, departure_clock = flight.departure.split('T')
+    departure_time = departure_clock[:5]
+    arrival_time = flight.arrival.split('T')[1][:5]
+    duration = format_duration(flight.duration)
+
+    # Handle layovers
+    route = f"{flight.fly_from} → {flight.fly_to}"
+    if flight.layovers:
+        route = f"{flight.fly_from} → {' → '.join(flight.layovers)} → {flight.fly_to}"
+
+    return f"""
+                <tr>
+                    <td><strong>{route}</strong><br><small>{flight.city_from} to {flight.city_to}</small></td>
+                    <td>{departure_date}<br>{departure_time} → {arrival_time}</td>
+                    <td class="duration">{duration}</td>
+                    <td class="price">{flight.price} {flight.currency}</td>
+                    <td><a href="{flight.deep_link}" target="_blank">Book Now</a></td>
+                </tr>
+            """
+
+
+def flight_rows(flights: Iterable[Flight]) -> Iterator[str]:
+    # a generator, so rows can go straight to a file with writelines
+    for flight in flights:
+        yield flight_row(flight)
+
+
+def report_params(flights: Sequence[Flight], **overrides: Any) -> Dict[str, Any]:
+    """Route, date and currency of a report, read from the first flight unless given"""
+    first = flights[0] if flights else None
+    params = {
+        "origin": first.fly_from if first else "",
+        "origin_city": first.city_from if first else "",
+        "destination": first.fly_to if first else "",
+        "destination_city": first.city_to if first else "",
+        "date": datetime.strptime(first.departure[:10], "%Y-%m-%d").strftime("%B %d, %Y") if first else "",
+        "currency": first.currency if first else "EUR",
+    }
+    params.update(overrides)
+    params.setdefault("tip", TRAVEL_TIPS.get(params["destination"]))
+    return params
+
+
+class ReportRenderer:
+    """
+    Renders flight reports from templates compiled once per process.
+
+    With `css_href` the pages link to a shared stylesheet (see `write_css`)
+    instead of inlining the CSS in every file.
+    """
+
+    def __init__(self, css_href: Optional[str] = None):
+        self.css_href = css_href
+        if css_href:
+            self.style = f'    <link rel="stylesheet" href="{css_href}">\n'
+        else:
+            self.style = f"    <style>\n{REPORT_CSS}    </style>\n"
+        for template in (PAGE_HEAD, STATS, TABLE_START, TIP, PAGER, PAGE_FOOT):
+            compile_template(template)
+
+    def write_css(self, directory: str) -> str:
+        path = os.path.join(directory, self.css_href or "report.css")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(REPORT_CSS)
+        return path
+
+    def head(self, params: Dict[str, Any]) -> str:
+        return fill(PAGE_HEAD, style=self.style, **params)
+
+    def stats(self, total, cheapest_price, shortest_duration, direct_count, currency) -> str:
+        return fill(
+            STATS,
+            total=total,
+            cheapest_price=cheapest_price,
+            currency=currency,
+            shortest_duration=format_duration(shortest_duration),
+            direct_count=direct_count,
+        )
+
+    def table(self, title: str, flights: FlightTable) -> Iterator[str]:
+        if not len(flights):
+            yield ""
+            return
+        yield fill(TABLE_START, title=title)
+        yield from flight_rows(flights.flights())
+        yield TABLE_END
+
+    def foot(self, currency: str, generated_at: Optional[datetime] = None) -> str:
+        generated_at = (generated_at or datetime.now()).strftime('%B %d, %Y at %H:%M')
+        return fill(PAGE_FOOT, generated_at=generated_at, currency=currency)
+
+    def page(
+        self,
+        params: Dict[str, Any],
+        total: int,
+        direct: FlightTable,
+        connecting: FlightTable,
+        stats_from: Optional[FlightTable] = None,
+        pager: str = "",
+    ) -> Iterator[str]:
+        """The chunks of one HTML page, for writelines"""
+        yield self.head(params)
+        stats_from = stats_from if stats_from is not None else direct
+        stats = stats_from.stats()
+        yield self.stats(total, stats["min_price"], stats["min_duration"], len(stats_from), params["currency"])
+        yield '        <div class="content">\n            '
+        yield from self.table("✈️ Direct Flights", direct)
+        yield "\n            "
+        yield from self.table("🔄 Connecting Flights", connecting)
+        yield "\n            "
+        if params.get("tip"):
+            yield fill(TIP, tip=params["tip"])
+        yield pager
+        yield "\n        </div>\n        \n"
+        yield self.foot(params["currency"])
+
+    def write(self, path: str, flights: Sequence[Flight], **params: Any) -> str:
+        """Write one report, direct flights sorted by price and connecting ones after them"""
+        params = report_params(flights, **params)
+        table = FlightTable.from_flights(flights)
+        direct = table.filter(direct=True).sort("price")
+        connecting = table.filter(direct=False)
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(self.page(params, len(flights), direct, connecting))
+        return path
+
+    def write_pages(self, path: str, flights: Sequence[Flight], page_size: int = 1000, **params: Any) -> List[str]:
+        """
+        Split a large report into pages of `page_size` rows: report.html, report-2.html, ...
+
+        Every page carries the statistics of the whole result set.
+        """
+        params = report_params(flights, **params)
+        table = FlightTable.from_flights(flights)
+        direct = table.filter(direct=True).sort("price")
+        connecting = table.filter(direct=False)
+        n_direct = len(direct)
+        pages = max(1, -(-len(flights) // page_size))
+
+        stem, ext = os.path.splitext(path)
+        names = [path] + [f"{stem}-{i}{ext}" for i in range(2, pages + 1)]
+        for page, name in enumerate(names):
+            start, stop = page * page_size, (page + 1) * page_size
+            links = " ".join(
+                f'<a href="{os.path.basename(other)}">{i + 1}</a>' for i, other in enumerate(names) if i != page
+            )
+            pager = fill(PAGER, page=page + 1, pages=pages, links=links) if pages > 1 else ""
+            with open(name, "w", encoding="utf-8") as f:
+                f.writelines(self.page(
+                    params,
+                    len(flights),
+                    direct.slice(start, stop),
+                    connecting.slice(max(start - n_direct, 0), max(stop - n_direct, 0)),
+                    stats_from=direct,
+                    pager=pager,
+                ))
+        return names
+
+
+@lru_cache(maxsize=None)
+def get_renderer(css_href: Optional[str] = None) -> ReportRenderer:
+    """One renderer per process and stylesheet setting"""
+    return ReportRenderer(css_href)
+
+
+def _render_job(job: Tuple[str, Sequence[Flight], Dict[str, Any], Optional[str]]) -> str:
+    path, flights, params, css_href = job
+    return get_renderer(css_href).write(path, flights, **params)
+
+
+def render_many(
+    jobs: Iterable[Tuple[str, Sequence[Flight], Dict[str, Any]]],
+    output_dir: str,
+    workers: Optional[int] = None,
+) -> List[str]:
+    """
+    Render many reports into `output_dir` with a process pool.
+
+    Each job is (file name, flights, params). The pages share one report.css.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    get_renderer("report.css").write_css(output_dir)
+    tasks = [(os.path.join(output_dir, name), flights, params, "report.css") for name, flights, params in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_job, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count() or 1)))))
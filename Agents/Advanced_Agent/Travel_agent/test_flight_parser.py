@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from flight_samples import make_flights, tool_message
+from flight_parser import Flight, InvalidFlight, parse_flights
+
+
+def test_flights_are_parsed_into_records():
+    raw = list(make_flights(5))
+    flights = parse_flights([tool_message(raw)])
+
+    assert all(isinstance(f, Flight) for f in flights)
+    assert [f.price for f in flights] == [r["price"] for r in raw]
+    assert [f.is_direct for f in flights] == [not r["layovers"] for r in raw]
+    assert not hasattr(flights[0], "__dict__")
+
+
+def test_results_of_every_tool_call_are_merged():
+    raw = list(make_flights(20))
+    messages = [
+        HumanMessage("flights to Chennai"),
+        tool_message(raw[:10]),
+        AIMessage(content=[{"type": "text", "text": "Searching again with other dates"}]),
+        tool_message(raw[10:]),
+        # the same result twice is only reported once
+        tool_message(raw[:3]),
+    ]
+
+    assert [f.deep_link for f in parse_flights(messages)] == [r["deepLink"] for r in raw]
+
+
+def test_only_tool_results_are_decoded():
+    raw = list(make_flights(3))
+    messages = [
+        AIMessage(content=[{"type": "text", "text": json.dumps(raw)}]),
+        ToolMessage(content="[not json", tool_call_id="1"),
+        ToolMessage(content=json.dumps({"flights": raw}), tool_call_id="2"),
+        ToolMessage(content=json.dumps([{"city": "Chennai"}]), tool_call_id="3"),
+    ]
+
+    assert len(parse_flights(messages)) == 3
+
+
+def test_malformed_items_are_skipped_and_collected():
+    raw = list(make_flights(4))
+    broken = [
+        {k: v for k, v in raw[0].items() if k != "departure"},
+        {**raw[1], "departure": None},
+        {**raw[2], "price": "cheap"},
+        {**raw[3], "durationInSeconds": True},
+        {**raw[3], "layovers": [{"city": "Bengaluru"}]},
+        {**raw[3], "flyTo": None},
+    ]
+    rejected = []
+
+    flights = parse_flights([tool_message(broken + raw)], rejected)
+
+    assert [f.deep_link for f in flights] == [r["deepLink"] for r in raw]
+    assert [item for item, _ in rejected] == broken
+    assert "departure" in rejected[0][1]
+    # without a list to collect them in they are skipped all the same
+    assert len(parse_flights([tool_message(broken)])) == 0
+    with pytest.raises(InvalidFlight):
+        Flight.from_json(broken[1])
+
+
+def test_optional_fields_of_the_wrong_type_count_as_missing():
+    item = {**next(make_flights(1)), "cityTo": None, "carrier": 6, "layovers": None}
+
+    flight = Flight.from_json(item)
+
+    assert (flight.city_to, flight.carrier, flight.layovers) == ("", "", ())
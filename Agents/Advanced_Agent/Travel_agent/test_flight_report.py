@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+from langchain_core.messages import HumanMessage
+
+from flight_samples import FakeStreamingAgent, make_flights, tool_message
+from travel_Agent_With_html import generate_html_report, stream_html_report
+
+
+def test_batch_report_lists_every_flight(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    flights = list(make_flights(30))
+
+    path = generate_html_report({"messages": [tool_message(flights)]})
+    html = open(path, encoding="utf-8").read()
+
+    assert html.count("Book Now") == 30
+    assert f"<p>{sum(not f['layovers'] for f in flights)}</p>" in html
+
+
+def test_batch_report_leaves_out_earlier_turns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    old, new = list(make_flights(5)), list(make_flights(3))
+    messages = [HumanMessage("first search"), tool_message(old), HumanMessage("again"), tool_message(new)]
+
+    html = open(generate_html_report({"messages": messages}), encoding="utf-8").read()
+
+    assert html.count("Book Now") == 3
+
+
+def test_streamed_report_matches_flights(tmp_path):
+    path = str(tmp_path / "stream.html")
+    flights = list(make_flights(2500))
+    cheapest = min(f["price"] for f in flights if not f["layovers"])
+
+    agent = FakeStreamingAgent(2500, path)
+    asyncio.run(stream_html_report(agent, {}, path))
+    html = open(path, encoding="utf-8").read()
+
+    assert html.count("Book Now") == 2500
+    assert f"<p>{cheapest} EUR</p>" in html
+    assert html.rstrip().endswith("</html>")
+    # rows were on disk before the agent sent its last result
+    assert agent.first_rows_at is not None
+
+
+def test_empty_stream_keeps_the_previous_report(tmp_path):
+    path = tmp_path / "stream.html"
+    path.write_text("previous report", encoding="utf-8")
+
+    assert asyncio.run(stream_html_report(FakeStreamingAgent(0, str(path)), {}, str(path))) is None
+    assert path.read_text(encoding="utf-8") == "previous report"
+    assert os.listdir(tmp_path) == ["stream.html"]
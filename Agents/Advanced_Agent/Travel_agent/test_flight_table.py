@@ -0,0 +1,56 @@
+import pytest
+
+from flight_samples import make_flights
+from flight_parser import Flight
+from flight_table import FlightTable
+
+
+@pytest.fixture(scope="module")
+def flights():
+    return [Flight.from_json(f) for f in make_flights(2000)]
+
+
+def test_filters_match_list_comprehensions(flights):
+    table = FlightTable.from_flights(flights)
+
+    direct = table.filter(direct=True, max_price=150, depart_after="06:00", depart_before="12:30")
+    expected = [
+        f for f in flights
+        if f.is_direct and f.price <= 150 and "06:00" <= f.departure[11:16] <= "12:30"
+    ]
+
+    assert list(direct.flights()) == expected
+
+
+def test_multi_key_sort_and_top_k(flights):
+    table = FlightTable.from_flights(flights)
+
+    ordered = list(table.sort(["stops", "price", "duration"]).flights())
+    assert ordered == sorted(flights, key=lambda f: (len(f.layovers), f.price, f.duration))
+
+    cheapest = [f.price for f in table.top_k(15).flights()]
+    assert cheapest == sorted(f.price for f in flights)[:15]
+
+
+def test_stats_and_groups(flights):
+    table = FlightTable.from_flights(flights)
+    direct = [f for f in flights if f.is_direct]
+
+    stats = table.filter(direct=True).stats()
+    assert stats["min_price"] == min(f.price for f in direct)
+    assert stats["min_duration"] == min(f.duration for f in direct)
+    assert stats["avg_price"] == pytest.approx(sum(f.price for f in direct) / len(direct))
+
+    groups = table.group_stats("carrier")
+    for carrier, group in groups.items():
+        prices = [f.price for f in flights if f.carrier == carrier]
+        assert group["count"] == len(prices)
+        assert group["min_price"] == min(prices)
+    assert sum(g["count"] for g in table.group_stats("hour").values()) == len(flights)
+
+
+def test_empty_table():
+    table = FlightTable.from_flights([])
+    assert len(table.filter(direct=True).sort("price")) == 0
+    assert table.stats()["count"] == 0
+    assert table.group_stats("hour") == {}
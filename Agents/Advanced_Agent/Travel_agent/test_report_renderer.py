@@ -0,0 +1,54 @@
+import os
+
+from flight_samples import make_flights
+from flight_parser import Flight
+from report_renderer import REPORT_CSS, ReportRenderer, render_many
+
+
+def flights(n, seed=0):
+    return [Flight.from_json(f) for f in make_flights(n, seed=seed)]
+
+
+def test_route_date_and_currency_are_parameters(tmp_path):
+    path = ReportRenderer().write(
+        str(tmp_path / "report.html"), flights(10),
+        origin="BLR", origin_city="Bengaluru", destination="DEL",
+        destination_city="Delhi", date="April 2, 2026", currency="INR",
+    )
+    html = open(path, encoding="utf-8").read()
+
+    assert "<strong>Bengaluru (BLR)</strong> → <strong>Delhi (DEL)</strong>" in html
+    assert "📅 April 2, 2026" in html
+    assert "All prices shown are in INR" in html
+    # no travel tip for a destination without one
+    assert "Travel Tip" not in html
+
+
+def test_defaults_come_from_the_flights(tmp_path):
+    html = open(ReportRenderer().write(str(tmp_path / "r.html"), flights(5)), encoding="utf-8").read()
+
+    assert "<strong>Hyderabad (HYD)</strong> → <strong>Chennai (MAA)</strong>" in html
+    assert "📅 March 31, 2026" in html
+    assert "Marina Beach" in html
+
+
+def test_large_reports_are_paginated(tmp_path):
+    data = flights(2500)
+    pages = ReportRenderer().write_pages(str(tmp_path / "report.html"), data, page_size=1000)
+
+    assert [os.path.basename(p) for p in pages] == ["report.html", "report-2.html", "report-3.html"]
+    rows = [open(p, encoding="utf-8").read().count("Book Now") for p in pages]
+    assert rows == [1000, 1000, 500]
+    assert "Page 2 of 3" in open(pages[1], encoding="utf-8").read()
+
+
+def test_batch_reports_share_one_stylesheet(tmp_path):
+    jobs = [(f"r{i}.html", flights(20, seed=i), {"currency": "EUR"}) for i in range(6)]
+    paths = render_many(jobs, str(tmp_path), workers=2)
+
+    assert len(paths) == 6
+    assert open(tmp_path / "report.css", encoding="utf-8").read() == REPORT_CSS
+    html = open(paths[3], encoding="utf-8").read()
+    assert '<link rel="stylesheet" href="report.css">' in html
+    assert "<style>" not in html
+    assert html.count("Book Now") == 20
@@ -1,11 +1,31 @@
 from dotenv import load_dotenv
-import json
 from datetime import datetime
 
 load_dotenv()
 
+import sys
+from pathlib import Path
+from uuid import uuid4
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.append(str(BASE_DIR.parent))
+sys.path.append(str(BASE_DIR.parents[2] / "Essentials"))
+from mcp_manifest import load_context, tools_from_manifest
+from mcp_pool import MCPSessionPool
+from sqlite_checkpointer import SqliteCheckpointer
+from agent_trace import trace_config
+from flight_parser import flights_from_message, parse_flights
+from report_renderer import TABLE_END, TABLE_START, fill, flight_rows, get_renderer, report_params
+
+# templates are compiled once, when the script starts
+renderer = get_renderer()
+
+# cached kiwi tool schemas, so a start doesn't wait for a round trip to mcp.kiwi.com
+MANIFEST_PATH = BASE_DIR / ".cache" / "travel_server_manifest.json"
+# conversation state per thread_id, kept across runs
+CHECKPOINT_PATH = BASE_DIR / ".cache" / "travel_checkpoints.sqlite3"
+
 def build_client() -> MultiServerMCPClient:
     return MultiServerMCPClient(
         {
@@ -22,30 +42,46 @@ async def fetch_mcp_context(client: MultiServerMCPClient):
     print("Tools retrieved")
     return tools
 
+async def load_mcp_context(client: MultiServerMCPClient, pool: MCPSessionPool):
+    # tools come from the manifest, the live server is checked in the background
+    # the tool calls of a run share one pooled session instead of opening one each
+    manifest, refresh = await load_context(client, MANIFEST_PATH, pool=pool)
+    tools = await tools_from_manifest(client, manifest, pool=pool)
+    return tools, refresh
+
 from langchain.agents import create_agent
 from langchain_google_genai import ChatGoogleGenerativeAI
 
-def build_agent(tools):
+def build_agent(tools, checkpointer=None):
     model = ChatGoogleGenerativeAI(model='gemini-2.5-flash')
 
     agent = create_agent(
         model=model,
         tools=tools,
-        system_prompt="You are a travel agent. Today is Friday, Feb 6, 2026. Use the tools to get the perfect plan."
+        system_prompt="You are a travel agent. Today is Friday, Feb 6, 2026. Use the tools to get the perfect plan.",
+        checkpointer=checkpointer or SqliteCheckpointer(str(CHECKPOINT_PATH), keep_last=20)
     )
     return agent
 
-def config():
-    return {
+def config(thread_id=None):
+    # AGENT_TRACE=trace.jsonl records node, model and tool timings
+    # a new conversation per run unless --thread names one, a reused thread
+    # brings back the flights of every earlier search
+    return trace_config({
         "configurable": {
-            "thread_id": "1"
+            "thread_id": thread_id or str(uuid4())
         }
-    }
+    })
+
+def thread_arg():
+    return sys.argv[sys.argv.index("--thread") + 1] if "--thread" in sys.argv[:-1] else None
 
 from langchain.messages import HumanMessage
 
+FLIGHT_QUERY = "Get me a direct flight from Hyderabad to Chennai on March 31st"
+
 async def run_Agent(agent, config):
-    query = HumanMessage(content="Get me a direct flight from Hyderabad to Chennai on March 31st")
+    query = HumanMessage(content=FLIGHT_QUERY)
     response = await agent.ainvoke(
         {
             'messages': [query],
@@ -53,30 +89,12 @@ async def run_Agent(agent, config):
     )
     return response
 
-def format_duration(seconds):
-    """Convert seconds to human readable format"""
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    return f"{hours}h {minutes}m"
-
 def parse_flight_data(response):
-    """Extract flight data from the response messages"""
-    flights = []
-    
-    for msg in response['messages']:
-        if hasattr(msg, 'content') and isinstance(msg.content, list):
-            for content_item in msg.content:
-                if isinstance(content_item, dict) and content_item.get('type') == 'text':
-                    try:
-                        # Try to parse JSON from the text content
-                        flight_data = json.loads(content_item['text'])
-                        if isinstance(flight_data, list):
-                            flights = flight_data
-                            break
-                    except:
-                        pass
-    
-    return flights
+    """Extract flight data from the messages this run added"""
+    # every flight search of this turn, not the ones of earlier turns of a resumed thread
+    messages = response['messages']
+    turn = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+    return parse_flights(messages[turn + 1:])
 
 def generate_html_report(response):
     """Generate comprehensive HTML file from the agent response"""
@@ -87,325 +105,114 @@ def generate_html_report(response):
     if not flights:
         return None
     
-    # Separate direct and connecting flights
-    direct_flights = [f for f in flights if 'layovers' not in f or not f['layovers']]
-    connecting_flights = [f for f in flights if 'layovers' in f and f['layovers']]
-    
-    # Sort by price
-    direct_flights.sort(key=lambda x: x['price'])
-    
-    def create_flight_table(flights_list, table_title):
-        if not flights_list:
-            return ""
-        
-        rows = ""
-        for flight in flights_list:
-            departure_time = flight['departure']['local'].split('T')[1][:5]
-            arrival_time = flight['arrival']['local'].split('T')[1][:5]
-            departure_date = flight['departure']['local'].split('T')[0]
-            duration = format_duration(flight['durationInSeconds'])
-            
-            # Handle layovers
-            route = f"{flight['flyFrom']} → {flight['flyTo']}"
-            if 'layovers' in flight and flight['layovers']:
-                layover_codes = [layover['at'] for layover in flight['layovers']]
-                route = f"{flight['flyFrom']} → {' → '.join(layover_codes)} → {flight['flyTo']}"
-            
-            rows += f"""
-                <tr>
-                    <td><strong>{route}</strong><br><small>{flight['cityFrom']} to {flight['cityTo']}</small></td>
-                    <td>{departure_date}<br>{departure_time} → {arrival_time}</td>
-                    <td class="duration">{duration}</td>
-                    <td class="price">{flight['price']} {flight['currency']}</td>
-                    <td><a href="{flight['deepLink']}" target="_blank">Book Now</a></td>
-                </tr>
-            """
-        
-        return f"""
-            <h3>{table_title}</h3>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Route</th>
-                        <th>Date & Time</th>
-                        <th>Duration</th>
-                        <th>Price</th>
-                        <th>Action</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {rows}
-                </tbody>
-            </table>
-        """
-    
-    # Generate tables
-    direct_table = create_flight_table(direct_flights, "✈️ Direct Flights")
-    connecting_table = create_flight_table(connecting_flights, "🔄 Connecting Flights")
-    
-    # Calculate statistics
-    if direct_flights:
-        cheapest_price = min(f['price'] for f in direct_flights)
-        shortest_duration = min(f['durationInSeconds'] for f in direct_flights)
-        avg_price = sum(f['price'] for f in direct_flights) / len(direct_flights)
-    else:
-        cheapest_price = 0
-        shortest_duration = 0
-        avg_price = 0
-    
-    html_template = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Flight Search Results - Hyderabad to Chennai</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            padding: 20px;
-            color: #333;
-            line-height: 1.6;
-        }}
-        
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 15px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            overflow: hidden;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-        
-        .header h1 {{
-            font-size: 2.8em;
-            margin-bottom: 10px;
-            font-weight: 700;
-        }}
-        
-        .header p {{
-            font-size: 1.3em;
-            opacity: 0.95;
-            margin: 5px 0;
-        }}
-        
-        .stats {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            padding: 30px 40px;
-            background: #f8f9ff;
-        }}
-        
-        .stat-card {{
-            background: white;
-            padding: 25px;
-            border-radius: 10px;
-            box-shadow: 0 3px 10px rgba(0,0,0,0.1);
-            text-align: center;
-            border-left: 5px solid #667eea;
-        }}
-        
-        .stat-card h4 {{
-            color: #667eea;
-            font-size: 0.9em;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            margin-bottom: 10px;
-        }}
-        
-        .stat-card p {{
-            font-size: 2em;
-            font-weight: bold;
-            color: #333;
-        }}
-        
-        .content {{
-            padding: 40px;
-        }}
-        
-        h3 {{
-            color: #667eea;
-            margin: 40px 0 20px 0;
-            font-size: 1.8em;
-            border-bottom: 3px solid #667eea;
-            padding-bottom: 10px;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }}
-        
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin: 20px 0 40px 0;
-            background: white;
-            box-shadow: 0 2px 15px rgba(0,0,0,0.1);
-            border-radius: 10px;
-            overflow: hidden;
-        }}
-        
-        thead {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        }}
-        
-        th {{
-            color: white;
-            padding: 18px 15px;
-            text-align: left;
-            font-weight: 600;
-            text-transform: uppercase;
-            font-size: 0.85em;
-            letter-spacing: 0.5px;
-        }}
-        
-        td {{
-            padding: 18px 15px;
-            border-bottom: 1px solid #e0e0e0;
-        }}
-        
-        tbody tr:hover {{
-            background-color: #f8f9ff;
-            transform: scale(1.01);
-            transition: all 0.2s ease;
-        }}
-        
-        tbody tr:last-child td {{
-            border-bottom: none;
-        }}
-        
-        a {{
-            color: white;
-            background: #667eea;
-            text-decoration: none;
-            font-weight: 600;
-            padding: 10px 20px;
-            border-radius: 5px;
-            transition: all 0.3s ease;
-            display: inline-block;
-        }}
-        
-        a:hover {{
-            background: #764ba2;
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-        }}
-        
-        .price {{
-            font-weight: bold;
-            color: #27ae60;
-            font-size: 1.2em;
-        }}
-        
-        .duration {{
-            color: #e74c3c;
-            font-weight: 600;
-        }}
-        
-        .footer {{
-            background: #f5f5f5;
-            padding: 25px;
-            text-align: center;
-            color: #666;
-            font-size: 0.9em;
-        }}
-        
-        .footer p {{
-            margin: 5px 0;
-        }}
-        
-        small {{
-            color: #888;
-            font-size: 0.85em;
-        }}
-        
-        .no-flights {{
-            text-align: center;
-            padding: 40px;
-            color: #666;
-            font-size: 1.2em;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>✈️ Flight Search Results</h1>
-            <p><strong>Hyderabad (HYD)</strong> → <strong>Chennai (MAA)</strong></p>
-            <p>📅 March 31, 2026</p>
-        </div>
-        
-        <div class="stats">
-            <div class="stat-card">
-                <h4>Total Flights Found</h4>
-                <p>{len(flights)}</p>
-            </div>
-            <div class="stat-card">
-                <h4>Cheapest Price</h4>
-                <p>{cheapest_price} EUR</p>
-            </div>
-            <div class="stat-card">
-                <h4>Shortest Duration</h4>
-                <p>{format_duration(shortest_duration)}</p>
-            </div>
-            <div class="stat-card">
-                <h4>Direct Flights</h4>
-                <p>{len(direct_flights)}</p>
-            </div>
-        </div>
-        
-        <div class="content">
-            {direct_table}
-            {connecting_table if connecting_flights else ''}
-            
-            <div style="background: #fff4e6; border-left: 5px solid #ff9800; padding: 20px; margin: 30px 0; border-radius: 5px;">
-                <h4 style="color: #ff9800; margin-bottom: 10px;">💡 Travel Tip</h4>
-                <p><strong>Did you know?</strong> Chennai is often referred to as the "Detroit of India" due to its significant automobile industry. It's also home to Marina Beach, one of the longest urban beaches in the world!</p>
-            </div>
-        </div>
-        
-        <div class="footer">
-            <p><strong>Generated on {datetime.now().strftime('%B %d, %Y at %H:%M')}</strong></p>
-            <p>Powered by Kiwi.com Flight Search API | Data subject to availability and change</p>
-            <p style="margin-top: 10px; color: #999; font-size: 0.85em;">All prices shown are in EUR. Please check the booking site for final prices and availability.</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-    
     # Save to file - use current directory for cross-platform compatibility
     import os
     output_path = os.path.join(os.getcwd(), 'flight_results.html')
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_template)
+    # route, date and currency are taken from the flights themselves
+    renderer.write(output_path, flights)
     
+    n_direct = sum(f.is_direct for f in flights)
     print(f"\n✅ HTML report generated: {output_path}")
-    print(f"📊 Found {len(flights)} flights ({len(direct_flights)} direct, {len(connecting_flights)} connecting)")
+    print(f"📊 Found {len(flights)} flights ({n_direct} direct, {len(flights) - n_direct} connecting)")
+    return output_path
+
+class RunningStats:
+    """Report statistics updated row by row, so the flights never have to be kept"""
+
+    def __init__(self):
+        self.total = 0
+        self.direct = 0
+        self.cheapest_price = None
+        self.shortest_duration = None
+
+    def track(self, flights):
+        for flight in flights:
+            self.total += 1
+            if flight.is_direct:
+                self.direct += 1
+                price = flight.price
+                duration = flight.duration
+                if self.cheapest_price is None or price < self.cheapest_price:
+                    self.cheapest_price = price
+                if self.shortest_duration is None or duration < self.shortest_duration:
+                    self.shortest_duration = duration
+            yield flight
+
+async def stream_html_report(agent, config, output_path=None):
+    """
+    Write the report while the agent is still running.
+
+    Flight rows are appended (and flushed) as each tool result arrives, so the file
+    shows partial results early and no flight list is held longer than one message.
+    Rows stay in arrival order; the statistics are written once the run is done.
+
+    The page starts in `<output_path>.part` and replaces the previous report with
+    the first rows, a run that finds no flights leaves the previous report alone.
+    """
+    import os
+    output_path = output_path or os.path.join(os.getcwd(), 'flight_results.html')
+    part_path = output_path + '.part'
+    stats = RunningStats()
+    query = HumanMessage(content=FLIGHT_QUERY)
+
+    params = None
+    f = open(part_path, 'w', encoding='utf-8')
+    try:
+        async for update in agent.astream({'messages': [query]}, config, stream_mode="updates"):
+            for node_update in update.values():
+                for msg in (node_update or {}).get('messages', []):
+                    flights = flights_from_message(msg)
+                    if not flights:
+                        continue
+                    first = params is None
+                    if first:
+                        # the page header needs the route, so it goes out with the first result
+                        params = report_params(flights)
+                        f.write(renderer.head(params))
+                        f.write('        <div class="content">\n')
+                        f.write(fill(TABLE_START, title="✈️ Flights"))
+                    f.writelines(flight_rows(stats.track(flights)))
+                    f.flush()
+                    if first:
+                        # closed before the rename, Windows can't rename an open file
+                        f.close()
+                        os.replace(part_path, output_path)
+                        f = open(output_path, 'a', encoding='utf-8')
+        if params is not None:
+            f.write(TABLE_END)
+            f.write('        </div>\n')
+            f.write(renderer.stats(stats.total, stats.cheapest_price or 0, stats.shortest_duration or 0, stats.direct, params["currency"]))
+            f.write(renderer.foot(params["currency"]))
+    finally:
+        f.close()
+        if params is None and os.path.exists(part_path):
+            os.remove(part_path)
+
+    if not stats.total:
+        print("  No flight data found in the stream")
+        return None
+    print(f"\n✅ HTML report streamed to: {output_path}")
+    print(f"📊 Found {stats.total} flights ({stats.direct} direct)")
     return output_path
 
 async def main():
     client = build_client()
-    tools = await fetch_mcp_context(client=client)
-    agent = build_agent(tools)
-    my_config = config()
-    response = await run_Agent(agent, my_config)
-    
-    # Generate HTML report
-    html_path = generate_html_report(response)
+    pool = MCPSessionPool(client)
+    try:
+        tools, refresh = await load_mcp_context(client, pool)
+        agent = build_agent(tools)
+        my_config = config(thread_arg())
+        if "--stream" in sys.argv:
+            # rows show up in the file while the agent is still working
+            html_path = await stream_html_report(agent, my_config)
+        else:
+            response = await run_Agent(agent, my_config)
+            # Generate HTML report
+            html_path = generate_html_report(response)
+        if refresh and await refresh:
+            print("Travel tool manifest updated")
+    finally:
+        await pool.aclose()
     
     if html_path:
         print("\n" + "="*60)
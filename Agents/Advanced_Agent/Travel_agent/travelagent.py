@@ -2,8 +2,24 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import sys
+from pathlib import Path
+from uuid import uuid4
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.append(str(BASE_DIR.parent))
+sys.path.append(str(BASE_DIR.parents[2] / "Essentials"))
+from mcp_manifest import load_context, tools_from_manifest
+from mcp_pool import MCPSessionPool
+from sqlite_checkpointer import SqliteCheckpointer
+from agent_trace import trace_config
+
+# cached kiwi tool schemas, so a start doesn't wait for a round trip to mcp.kiwi.com
+MANIFEST_PATH = BASE_DIR / ".cache" / "travel_server_manifest.json"
+# conversation state per thread_id, kept across runs
+CHECKPOINT_PATH = BASE_DIR / ".cache" / "travel_checkpoints.sqlite3"
+
 def build_client() -> MultiServerMCPClient :
     return MultiServerMCPClient(
         {
@@ -23,33 +39,41 @@ async def fetch_mcp_context(client : MultiServerMCPClient):
     
     return tools
 
+async def load_mcp_context(client: MultiServerMCPClient, pool: MCPSessionPool):
+    # tools come from the manifest, the live server is checked in the background
+    # the tool calls of a run share one pooled session instead of opening one each
+    manifest, refresh = await load_context(client, MANIFEST_PATH, pool=pool)
+    tools = await tools_from_manifest(client, manifest, pool=pool)
+    return tools, refresh
 
-from langchain.agents import create_agent
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.checkpoint.memory import InMemorySaver
-
-# 1. Updated Import
 
 from langchain.agents import create_agent
+from langchain_google_genai import ChatGoogleGenerativeAI
 
-def build_agent(tools):
+def build_agent(tools, checkpointer=None):
     model = ChatGoogleGenerativeAI(model='gemini-2.5-flash')
 
     agent = create_agent(
         model=model,
         tools=tools,
-        system_prompt="You are a travel agent. Today is Friday, Feb 6, 2026. Use the tools to get the perfect plan."
+        system_prompt="You are a travel agent. Today is Friday, Feb 6, 2026. Use the tools to get the perfect plan.",
+        checkpointer=checkpointer or SqliteCheckpointer(str(CHECKPOINT_PATH), keep_last=20)
     )
     return agent
 
 
-def config():
-    return {
-        "configurable" : {
-            "thread_id" : "1"
+def config(thread_id=None):
+    # AGENT_TRACE=trace.jsonl records node, model and tool timings
+    # a new conversation per run unless --thread names one, a reused thread
+    # brings back the flights of every earlier search
+    return trace_config({
+        "configurable": {
+            "thread_id": thread_id or str(uuid4())
         }
-    }
+    })
+
+def thread_arg():
+    return sys.argv[sys.argv.index("--thread") + 1] if "--thread" in sys.argv[:-1] else None
 from langchain.messages import HumanMessage
 
 async def run_Agent(agent,config):
@@ -64,13 +88,19 @@ async def run_Agent(agent,config):
 
 async def main():
     client = build_client()
-    tools = await fetch_mcp_context(client=client)
-    agent = build_agent(tools)
-    my_config = config() 
-    response = await run_Agent(agent, my_config)
-    
-    from pprint import pprint
-    print(response)
+    pool = MCPSessionPool(client)
+    try:
+        tools, refresh = await load_mcp_context(client, pool)
+        agent = build_agent(tools)
+        my_config = config(thread_arg()) 
+        response = await run_Agent(agent, my_config)
+        
+        from pprint import pprint
+        print(response)
+        if refresh and await refresh:
+            print("Travel tool manifest updated")
+    finally:
+        await pool.aclose()
 
 import asyncio
 if __name__ == "__main__":
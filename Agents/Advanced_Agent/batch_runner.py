@@ -0,0 +1,199 @@
+"""
+Run many queries through one compiled agent.
+
+    python batch_runner.py queries.jsonl results.jsonl [--agent mcp|travel] [--concurrency 8]
+
+Every line of the input is {"id": ..., "query": "..."} (or just a JSON string).
+Lines are read as workers free up, so the input can be larger than memory.
+Results are appended to the output as soon as each query finishes.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from uuid import uuid4
+
+from langchain.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+BASE_DIR = Path(__file__).resolve().parent
+
+sys.path.append(str(BASE_DIR.parents[1] / "Essentials"))
+from agent_trace import percentile
+
+RATE_LIMIT_MARKERS = ("429", "rate limit", "resource_exhausted", "resource exhausted", "quota")
+
+
+def read_queries(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"query": item}
+            item.setdefault("id", n)
+            yield item
+
+
+def is_rate_limited(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in RATE_LIMIT_MARKERS)
+
+
+def answer_text(response: Dict[str, Any]) -> str:
+    content = response["messages"][-1].content
+    if isinstance(content, list):
+        return "".join(c.get("text", "") if isinstance(c, dict) else str(c) for c in content)
+    return content
+
+
+class BatchRunner:
+    """
+    Pushes queries through `agent.ainvoke` with `concurrency` workers.
+
+    The workers take the queries from one shared iterator, so only the queries
+    in flight are held. Each query gets its own thread_id, under a prefix that
+    is new for every runner, so a persistent checkpointer never continues the
+    thread of an earlier batch. Rate limit errors are retried with exponential
+    backoff and jitter, other errors are written to the output.
+    """
+
+    def __init__(
+        self,
+        agent,
+        concurrency: int = 8,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        thread_prefix: Optional[str] = None,
+    ):
+        self.agent = agent
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.thread_prefix = thread_prefix or f"batch-{uuid4().hex[:8]}"
+
+    async def _invoke(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        config = {"configurable": {"thread_id": f"{self.thread_prefix}-{item['id']}"}}
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await self.agent.ainvoke(
+                    {"messages": [HumanMessage(item["query"])]}, config
+                )
+                return {"answer": answer_text(response), "attempts": attempt,
+                        "latency": time.perf_counter() - start}
+            except Exception as e:
+                if attempt > self.max_retries or not is_rate_limited(e):
+                    return {"error": f"{type(e).__name__}: {e}", "attempts": attempt,
+                            "latency": time.perf_counter() - start}
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def run(self, queries: Iterable[Dict[str, Any]], output_path: Path) -> Dict[str, Any]:
+        items = iter(queries)
+        latencies: List[float] = []
+        errors = 0
+
+        async def worker(out):
+            nonlocal errors
+            # next() never awaits, so the workers can share the iterator
+            for item in items:
+                result = await self._invoke(item)
+                if "error" in result:
+                    errors += 1
+                else:
+                    latencies.append(result["latency"])
+                out.write(json.dumps({"id": item["id"], "query": item["query"], **result}) + "\n")
+                out.flush()
+
+        start = time.perf_counter()
+        with open(output_path, "w", encoding="utf-8") as out:
+            await asyncio.gather(*(worker(out) for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        done = len(latencies) + errors
+        return {
+            "queries": done,
+            "errors": errors,
+            "seconds": elapsed,
+            "throughput": done / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        }
+
+
+def print_stats(stats: Dict[str, Any]) -> None:
+    print(f"{stats['queries']} queries ({stats['errors']} failed) in {stats['seconds']:.1f}s"
+          f" -> {stats['throughput']:.2f} queries/s")
+    print(f"latency p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  p99 {stats['p99']:.2f}s")
+
+
+def _load_script(path: Path):
+    # the agent scripts have names like 2_mcp.py, so they are loaded by path
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def _cancel(task: Optional[asyncio.Task]) -> None:
+    # the manifest refresh still running in the background, it may be using the pool
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def main(args) -> Optional[Dict[str, Any]]:
+    queries = read_queries(args.queries)
+    if args.agent == "travel":
+        script = _load_script(BASE_DIR / "Travel_agent" / "travelagent.py")
+        client = script.build_client()
+        pool = script.MCPSessionPool(client)
+        refresh = None
+        try:
+            tools, refresh = await script.load_mcp_context(client, pool)
+            # one-off questions, their threads don't belong in the travel agent's checkpoint file
+            agent = script.build_agent(tools, checkpointer=InMemorySaver())
+            stats = await BatchRunner(agent, args.concurrency).run(queries, args.output)
+        finally:
+            await _cancel(refresh)
+            await pool.aclose()
+    else:
+        script = _load_script(BASE_DIR / "2_mcp.py")
+        client = script.build_client()
+        pool = script.MCPSessionPool(client)
+        refresh = None
+        try:
+            tools, prompt, refresh = await script.load_mcp_context(client, pool)
+            agent = script.build_agent(tools, prompt)
+            stats = await BatchRunner(agent, args.concurrency).run(queries, args.output)
+        finally:
+            await _cancel(refresh)
+            await pool.aclose()
+    print_stats(stats)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a JSONL file of queries through an agent")
+    parser.add_argument("queries", type=Path)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--agent", choices=["mcp", "travel"], default="mcp")
+    parser.add_argument("--concurrency", type=int, default=8)
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    asyncio.run(main(parser.parse_args()))
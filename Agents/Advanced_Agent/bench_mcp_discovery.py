@@ -0,0 +1,88 @@
+"""
+Cold vs warm MCP discovery time for the local stdio server.
+
+    python bench_mcp_discovery.py [rounds]
+
+cold   : MultiServerMCPClient, one new server process per get_* call
+pooled : MCPSessionPool, first discovery (starts the server once)
+warm   : MCPSessionPool, every discovery after the first
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp_pool import MCPSessionPool
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+# discovery never calls Tavily, the server only needs a key to start
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+BASE_DIR = Path(__file__).resolve().parent
+SERVER_PATH = BASE_DIR / "Resources" / "2.1_mcp_server.py"
+
+
+def build_client() -> MultiServerMCPClient:
+    return MultiServerMCPClient(
+        {
+            "local_server": {
+                "transport": "stdio",
+                "command": sys.executable,
+                "args": [str(SERVER_PATH)],
+            }
+        }
+    )
+
+
+async def cold_discovery(client):
+    await client.get_tools()
+    await client.get_resources("local_server")
+    await client.get_prompt("local_server", "prompt")
+
+
+async def pooled_discovery(pool):
+    await asyncio.gather(
+        pool.get_tools(),
+        pool.get_resources("local_server"),
+        pool.get_prompt("local_server", "prompt"),
+    )
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+def report(name, times):
+    times = [t * 1000 for t in times]
+    print(f"{name:<8} mean {statistics.mean(times):8.1f} ms   min {min(times):8.1f} ms   n={len(times)}")
+
+
+async def main(rounds: int):
+    client = build_client()
+    # one untimed call so the github README is already in the server's disk cache
+    await cold_discovery(client)
+
+    cold = [await timed(cold_discovery(client)) for _ in range(rounds)]
+
+    pooled, warm = [], []
+    for _ in range(rounds):
+        pool = MCPSessionPool(client)
+        pooled.append(await timed(pooled_discovery(pool)))
+        warm.extend([await timed(pooled_discovery(pool)) for _ in range(rounds)])
+        await pool.aclose()
+
+    report("cold", cold)
+    report("pooled", pooled)
+    report("warm", warm)
+    print(f"warm discovery is {statistics.mean(cold) / statistics.mean(warm):.0f}x faster than cold")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
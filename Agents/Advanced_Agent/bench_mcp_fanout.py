@@ -0,0 +1,60 @@
+"""
+Tail latency of an MCP tool with and without hedged requests.
+
+    python bench_mcp_fanout.py [calls]
+
+The stand-in server answers a lookup in 10 ms, but 5% of lookups take 500 ms.
+The hedged client sends a duplicate after 50 ms without an answer.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from mcp_fanout import MCPFanOut, ToolPolicy
+from mcp_pool import MCPSessionPool
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+SERVER_PATH = Path(__file__).resolve().parent / "stand_in_mcp_server.py"
+
+
+def connection():
+    return {
+        "transport": "stdio",
+        "command": sys.executable,
+        "args": [str(SERVER_PATH)],
+        "env": {**os.environ, "STAND_IN_SLOW": "0.5", "STAND_IN_SLOW_RATE": "0.05"},
+    }
+
+
+async def measure(policy, calls):
+    fanout = MCPFanOut({"server": connection()}, default=policy)
+    pool = MCPSessionPool(fanout.client)
+    try:
+        lookup = {t.name: t for t in await fanout.get_tools(pool)}["lookup"]
+        samples = []
+        for i in range(calls):
+            start = time.perf_counter()
+            await lookup.ainvoke({"key": str(i)})
+            samples.append((time.perf_counter() - start) * 1e3)
+        return samples, fanout.stats()["server"]
+    finally:
+        await pool.aclose()
+
+
+async def main(calls=300):
+    for label, policy in (("timeout only", ToolPolicy(timeout=5)), ("hedged", ToolPolicy(timeout=5, hedge_after=0.05))):
+        samples, stats = await measure(policy, calls)
+        cuts = statistics.quantiles(samples, n=100)
+        print(
+            f"{label:>12}: p50 {cuts[49]:6.1f} ms  p95 {cuts[94]:6.1f} ms  p99 {cuts[98]:6.1f} ms  "
+            f"max {max(samples):6.1f} ms  hedged {stats['hedged']}, won {stats['hedge_wins']}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 300))
@@ -0,0 +1,84 @@
+"""
+Agent startup time: booting from the schema manifest vs live discovery.
+
+    python bench_startup.py [rounds] [--kiwi]
+
+Measures the time until build_agent has its tools and prompt. --kiwi also
+benchmarks the remote https://mcp.kiwi.com server used by the travel agents.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp_manifest import discover, load_manifest, prompt_from_manifest, save_manifest, tools_from_manifest
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+# discovery never calls Tavily, the server only needs a key to start
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+BASE_DIR = Path(__file__).resolve().parent
+SERVER_PATH = BASE_DIR / "Resources" / "2.1_mcp_server.py"
+
+SERVERS = {
+    "local_server": {
+        "transport": "stdio",
+        "command": sys.executable,
+        "args": [str(SERVER_PATH)],
+    },
+    "travel_server": {
+        "transport": "streamable_http",
+        "url": "https://mcp.kiwi.com",
+    },
+}
+
+
+async def live_boot(client, name):
+    tools = await client.get_tools()
+    if name == "local_server":
+        await client.get_prompt(name, "prompt")
+    return tools
+
+
+async def manifest_boot(client, name, path):
+    manifest = load_manifest(path, client)
+    tools = await tools_from_manifest(client, manifest)
+    if name == "local_server":
+        prompt_from_manifest(manifest, name, "prompt")
+    return tools
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def bench(name, rounds, path):
+    client = MultiServerMCPClient({name: SERVERS[name]})
+    save_manifest(path, await discover(client))
+
+    live = [await timed(live_boot(client, name)) for _ in range(rounds)]
+    cached = [await timed(manifest_boot(client, name, path)) for _ in range(rounds)]
+
+    live_ms = statistics.mean(live) * 1000
+    cached_ms = statistics.mean(cached) * 1000
+    print(f"{name:<14} live {live_ms:9.1f} ms   manifest {cached_ms:8.2f} ms   {live_ms / cached_ms:6.0f}x")
+
+
+async def main(rounds, names):
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            await bench(name, rounds, Path(tmp) / f"{name}.json")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    names = ["local_server"] + (["travel_server"] if "--kiwi" in sys.argv else [])
+    asyncio.run(main(int(args[0]) if args else 5, names))
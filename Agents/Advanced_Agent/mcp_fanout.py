@@ -0,0 +1,224 @@
+"""
+Tool calls to several MCP servers at once, each with a deadline.
+
+    fanout = MCPFanOut(
+        {"time": {...}, "local_server": {...}, "travel_server": {...}},
+        policies={"time": ToolPolicy(timeout=5), "travel_server:search-flight": ToolPolicy(timeout=60)},
+    )
+    pool = MCPSessionPool(fanout.client)
+    tools = await fanout.get_tools(pool)
+
+Discovery asks every server in parallel and gives up on a server after
+`discovery_timeout`, the agent starts with the tools of the others.
+
+Every tool call has a timeout. With `hedge_after`, a call that got no answer
+by then is sent a second time and the first answer wins; only use it for
+tools that can safely run twice (searches, lookups), and only where the second
+request can be answered sooner than the first. Tools from a pool share one
+session per server, so the duplicate reaches the same process: that helps
+when single requests stall at random, not when the work itself is slow (the
+same flight search takes as long twice). Calls that time out or fail count
+against their server: after `failures` in a row its circuit opens and calls
+are answered with an error right away, until `reset_after` seconds later a
+single call is let through to probe it.
+
+Timeouts, failures and open circuits come back as MCP tool errors, so the
+model sees what happened and the run goes on.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.interceptors import MCPToolCallRequest
+from mcp.types import CallToolResult, TextContent
+
+DEFAULT_TIMEOUT = 30.0
+DISCOVERY_TIMEOUT = 10.0
+FAILURES = 3
+RESET_AFTER = 30.0
+
+
+@dataclass(slots=True)
+class ToolPolicy:
+    timeout: float = DEFAULT_TIMEOUT
+    # seconds without an answer before a duplicate request is sent, None = never
+    hedge_after: Optional[float] = None
+
+
+class CircuitBreaker:
+    """
+    Closed until `failures` calls in a row failed, then open for `reset_after`
+    seconds, then half open: one probe call decides whether it closes again.
+    """
+
+    def __init__(self, failures: int = FAILURES, reset_after: float = RESET_AFTER, clock=time.monotonic):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.clock = clock
+        self.failed = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.clock() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def success(self) -> None:
+        self.failed = 0
+        self.opened_at = None
+        self._probing = False
+
+    def failure(self) -> None:
+        self.failed += 1
+        if self._probing or self.failed >= self.failures:
+            self.opened_at = self.clock()
+        self._probing = False
+
+    def release(self) -> None:
+        # the call was cancelled by the caller, it says nothing about the server
+        self._probing = False
+
+
+def _error(text: str) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=text)], isError=True)
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    # a losing attempt is cancelled and never awaited, don't log its exception
+    if not task.cancelled():
+        task.exception()
+
+
+class MCPFanOut:
+    """
+    A MultiServerMCPClient whose tool calls go through timeouts, hedging and
+    a circuit breaker per server.
+
+    Policies are looked up as "server:tool", then "server", then `default`.
+    """
+
+    def __init__(
+        self,
+        connections: Dict[str, Dict[str, Any]],
+        policies: Optional[Dict[str, ToolPolicy]] = None,
+        default: Optional[ToolPolicy] = None,
+        discovery_timeout: float = DISCOVERY_TIMEOUT,
+        failures: int = FAILURES,
+        reset_after: float = RESET_AFTER,
+        clock=time.monotonic,
+        **client_kwargs,
+    ):
+        self.client = MultiServerMCPClient(connections, tool_interceptors=[self.intercept], **client_kwargs)
+        self.policies = policies or {}
+        self.default = default or ToolPolicy()
+        self.discovery_timeout = discovery_timeout
+        self.breakers = {name: CircuitBreaker(failures, reset_after, clock) for name in connections}
+        self.discovery_errors: Dict[str, str] = {}
+        self._stats = {
+            name: {"calls": 0, "failures": 0, "timeouts": 0, "rejected": 0, "hedged": 0, "hedge_wins": 0}
+            for name in connections
+        }
+
+    def policy(self, server_name: str, tool_name: str) -> ToolPolicy:
+        return self.policies.get(f"{server_name}:{tool_name}") or self.policies.get(server_name) or self.default
+
+    async def get_tools(self, pool=None) -> List[Any]:
+        """Tools of every server that answers within `discovery_timeout`, asked in parallel"""
+
+        async def load(name):
+            if pool is not None:
+                return await pool.get_tools(name)
+            return await self.client.get_tools(server_name=name)
+
+        names = [name for name in self.client.connections if self.breakers[name].allow()]
+        results = await asyncio.gather(
+            *(asyncio.wait_for(load(name), self.discovery_timeout) for name in names), return_exceptions=True
+        )
+        tools = []
+        self.discovery_errors = {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                self.breakers[name].failure()
+                self.discovery_errors[name] = (
+                    f"no answer within {self.discovery_timeout:g}s"
+                    if isinstance(result, asyncio.TimeoutError)
+                    else f"{type(result).__name__}: {result}"
+                )
+                continue
+            self.breakers[name].success()
+            tools.extend(result)
+        return tools
+
+    async def intercept(self, request: MCPToolCallRequest, handler):
+        """Tool interceptor: the deadline, hedging and the circuit breaker of one call"""
+        name = request.server_name
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            return await handler(request)
+        stats = self._stats[name]
+        if not breaker.allow():
+            stats["rejected"] += 1
+            return _error(f"{name} is unavailable (circuit open after repeated failures), try again later")
+
+        policy = self.policy(name, request.name)
+        stats["calls"] += 1
+        try:
+            result = await asyncio.wait_for(self._hedged(request, handler, policy, stats), policy.timeout)
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            breaker.failure()
+            return _error(f"{request.name} on {name} did not answer within {policy.timeout:g}s")
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            stats["failures"] += 1
+            breaker.failure()
+            return _error(f"{request.name} on {name} failed: {type(e).__name__}: {e}")
+        # an error result from the tool still means the server is up
+        breaker.success()
+        return result
+
+    async def _hedged(self, request, handler, policy: ToolPolicy, stats: Dict[str, int]):
+        first = asyncio.create_task(handler(request))
+        pending = {first}
+        try:
+            if policy.hedge_after is not None:
+                done, _ = await asyncio.wait(pending, timeout=policy.hedge_after)
+                if not done:
+                    stats["hedged"] += 1
+                    pending.add(asyncio.create_task(handler(request)))
+            # the first attempt that succeeds wins, an error only counts once none is left
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.add_done_callback(_retrieve)
+                task.cancel()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {**counts, "state": self.breakers[name].state, "discovery_error": self.discovery_errors.get(name)}
+            for name, counts in self._stats.items()
+        }
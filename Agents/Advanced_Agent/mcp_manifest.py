@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.prompts import convert_mcp_prompt_message_to_langchain_message
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp import ClientSession
+from mcp.types import PromptMessage, Tool
+
+# bump when the layout of the manifest file changes
+MANIFEST_VERSION = 1
+
+
+def _fingerprint(client: MultiServerMCPClient) -> str:
+    # a manifest only belongs to the servers it was discovered from
+    config = json.dumps(client.connections, sort_keys=True, default=str)
+    return hashlib.sha256(config.encode()).hexdigest()
+
+
+def _digest(servers: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(servers, sort_keys=True).encode()).hexdigest()
+
+
+async def _paginate(list_page, field: str) -> List[Any]:
+    items, cursor = [], None
+    while True:
+        page = await list_page(cursor=cursor)
+        items.extend(getattr(page, field))
+        if not page.nextCursor:
+            return items
+        cursor = page.nextCursor
+
+
+async def _discover_server(session: ClientSession) -> Dict[str, Any]:
+    capabilities = session.get_server_capabilities()
+    tools = await _paginate(session.list_tools, "tools")
+    resources, prompts = [], []
+    if capabilities and capabilities.resources:
+        resources = await _paginate(session.list_resources, "resources")
+    if capabilities and capabilities.prompts:
+        prompts = await _paginate(session.list_prompts, "prompts")
+
+    # prompts without required arguments are stored with their messages
+    messages = {}
+    for prompt in prompts:
+        if not any(arg.required for arg in prompt.arguments or []):
+            result = await session.get_prompt(prompt.name)
+            messages[prompt.name] = [m.model_dump(mode="json") for m in result.messages]
+
+    return {
+        "tools": [t.model_dump(mode="json", exclude_none=True) for t in tools],
+        "resources": [r.model_dump(mode="json", exclude_none=True) for r in resources],
+        "prompts": [p.model_dump(mode="json", exclude_none=True) for p in prompts],
+        "prompt_messages": messages,
+    }
+
+
+async def discover(client: MultiServerMCPClient, pool=None) -> Dict[str, Any]:
+    """Ask every server for its tools, resources and prompts (uses the pool's sessions if given)"""
+
+    async def one(name):
+        if pool is not None:
+            return await _discover_server(await pool.session(name))
+        async with client.session(name) as session:
+            return await _discover_server(session)
+
+    names = list(client.connections)
+    results = await asyncio.gather(*(one(name) for name in names))
+    servers = dict(zip(names, results))
+    return {
+        "version": MANIFEST_VERSION,
+        "fingerprint": _fingerprint(client),
+        "digest": _digest(servers),
+        "created_at": time.time(),
+        "servers": servers,
+    }
+
+
+def load_manifest(path: Path, client: MultiServerMCPClient) -> Optional[Dict[str, Any]]:
+    """Read the manifest, or None if it is missing, outdated or for other servers"""
+    try:
+        manifest = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    if manifest.get("fingerprint") != _fingerprint(client):
+        return None
+    return manifest
+
+
+def save_manifest(path: Path, manifest: Dict[str, Any]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+async def revalidate(
+    client: MultiServerMCPClient, path: Path, manifest: Dict[str, Any], pool=None
+) -> bool:
+    """Compare the manifest with the live servers, rewrite it only if something changed"""
+    try:
+        live = await discover(client, pool=pool)
+    except Exception as e:
+        print(f"Could not revalidate MCP manifest: {e}")
+        return False
+    if live["digest"] == manifest["digest"]:
+        return False
+    save_manifest(path, live)
+    return True
+
+
+async def load_context(
+    client: MultiServerMCPClient, path: Path, pool=None
+) -> Tuple[Dict[str, Any], Optional[asyncio.Task]]:
+    """
+    Return the manifest to build the agent from, plus the background revalidation task.
+
+    With no usable manifest on disk the servers are discovered now and the task is None.
+    """
+    manifest = load_manifest(path, client)
+    if manifest is None:
+        manifest = await discover(client, pool=pool)
+        save_manifest(path, manifest)
+        return manifest, None
+    task = asyncio.create_task(revalidate(client, path, manifest, pool=pool))
+    return manifest, task
+
+
+async def tools_from_manifest(
+    client: MultiServerMCPClient, manifest: Dict[str, Any], pool=None
+) -> List[Any]:
+    """
+    Build LangChain tools from the stored schemas without asking the servers.
+
+    With a pool the tools fetch its session when they are called, so nothing
+    waits here for a server to start; without one every call opens its own session.
+    """
+    tools = []
+    for name, server in manifest["servers"].items():
+        session = pool.bound(name) if pool is not None else None
+        for tool in server["tools"]:
+            tools.append(
+                convert_mcp_tool_to_langchain_tool(
+                    session,
+                    Tool.model_validate(tool),
+                    connection=client.connections[name],
+                    callbacks=client.callbacks,
+                    server_name=name,
+                    tool_interceptors=client.tool_interceptors,
+                    tool_name_prefix=client.tool_name_prefix,
+                    handle_tool_errors=client.handle_tool_errors,
+                )
+            )
+    return tools
+
+
+def prompt_from_manifest(manifest: Dict[str, Any], server_name: str, prompt_name: str) -> List[Any]:
+    messages = manifest["servers"][server_name]["prompt_messages"][prompt_name]
+    return [
+        convert_mcp_prompt_message_to_langchain_message(PromptMessage.model_validate(m))
+        for m in messages
+    ]
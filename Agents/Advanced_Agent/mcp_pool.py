@@ -0,0 +1,185 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.prompts import load_mcp_prompt
+from langchain_mcp_adapters.resources import load_mcp_resources
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp import ClientSession
+
+from mcp_manifest import _paginate
+
+
+class PooledSession:
+    """
+    Stands in for a server's ClientSession inside tools.
+
+    A tool built on a ClientSession keeps calling that object, even after the
+    pool has replaced it with a new one. This looks the session up in the pool on
+    every call instead, so it starts the server on first use and follows a reopen.
+    A call that raises asks the pool to check the session on its next hand-out.
+    """
+
+    def __init__(self, pool: "MCPSessionPool", server_name: str):
+        self.pool = pool
+        self.server_name = server_name
+
+    async def call_tool(self, *args, **kwargs):
+        session = await self.pool.session(self.server_name)
+        try:
+            return await session.call_tool(*args, **kwargs)
+        except Exception:
+            self.pool.suspect(self.server_name)
+            raise
+
+
+class MCPSessionPool:
+    """
+    Long-lived MCP sessions keyed by server name.
+
+    MultiServerMCPClient opens a new session (a new subprocess for stdio servers)
+    for every get_tools / get_resources / get_prompt call. The pool opens one
+    session per server, keeps it alive and hands it out again, so tools loaded
+    from it keep talking to the same process across agent invocations.
+
+    A session is pinged when its last check is older than check_every seconds
+    or a call on it failed, never on every hand-out and never under the lock,
+    so concurrent callers don't queue behind a round trip. One that doesn't
+    answer is closed and a new one opened, so a crashed server is restarted
+    instead of failing forever.
+    """
+
+    def __init__(
+        self,
+        client: MultiServerMCPClient,
+        ping_timeout: float = 5.0,
+        check_every: float = 30.0,
+        clock=time.monotonic,
+    ):
+        self.client = client
+        self.ping_timeout = ping_timeout
+        self.check_every = check_every
+        self.clock = clock
+        self._sessions: Dict[str, Tuple[ClientSession, asyncio.Event, asyncio.Task]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._checked: Dict[str, float] = {}
+        self.reopened = 0
+
+    async def _hold(self, server_name: str, ready: asyncio.Future, closed: asyncio.Event):
+        # the session context has to be entered and left by the same task,
+        # so every session lives in its own task until the pool closes it
+        try:
+            async with self.client.session(server_name) as session:
+                ready.set_result(session)
+                await closed.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+
+    async def session(self, server_name: str) -> ClientSession:
+        """Return the open session of a server, starting it on first use and again once it stops answering"""
+        held = self._sessions.get(server_name)
+        if held is not None and self._due(server_name, held[2]):
+            # a server that exited or hangs leaves a dead session behind, is_healthy drops it;
+            # the check is stamped first so callers arriving during the ping don't ping too
+            self._checked[server_name] = self.clock()
+            if not await self.is_healthy(server_name):
+                self.reopened += 1
+            held = self._sessions.get(server_name)
+        if held is not None:
+            return held[0]
+        lock = self._locks.setdefault(server_name, asyncio.Lock())
+        async with lock:
+            if server_name not in self._sessions:
+                ready = asyncio.get_running_loop().create_future()
+                closed = asyncio.Event()
+                task = asyncio.create_task(self._hold(server_name, ready, closed))
+                try:
+                    session = await ready
+                except BaseException:
+                    # cancelled while the server starts (a discovery timeout): stop it here,
+                    # nothing else would, and the next call would start a second one
+                    closed.set()
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                    raise
+                self._sessions[server_name] = (session, closed, task)
+                self._checked[server_name] = self.clock()
+        return self._sessions[server_name][0]
+
+    def _due(self, server_name: str, task: asyncio.Task) -> bool:
+        return task.done() or self.clock() - self._checked.get(server_name, 0.0) >= self.check_every
+
+    def suspect(self, server_name: str) -> None:
+        """Have the next hand-out ping the session (a call on it just failed)"""
+        self._checked[server_name] = float("-inf")
+
+    def bound(self, server_name: str) -> PooledSession:
+        """A session stand-in for tools that fetches the pooled session on every call"""
+        return PooledSession(self, server_name)
+
+    async def warm_up(self, *server_names: str) -> None:
+        """Start the sessions ahead of the first request (all servers by default)"""
+        names = server_names or tuple(self.client.connections)
+        await asyncio.gather(*(self.session(name) for name in names))
+
+    async def is_healthy(self, server_name: str) -> bool:
+        """Ping the server; a session that doesn't answer is dropped and reopened on next use"""
+        if server_name not in self._sessions:
+            return False
+        session, _, task = self._sessions[server_name]
+        if task.done():
+            await self._close(server_name, session)
+            return False
+        try:
+            await asyncio.wait_for(session.send_ping(), timeout=self.ping_timeout)
+            return True
+        except Exception:
+            await self._close(server_name, session)
+            return False
+
+    async def get_tools(self, server_name: Optional[str] = None) -> List[Any]:
+        names = [server_name] if server_name else list(self.client.connections)
+
+        async def load(name):
+            tools = await _paginate((await self.session(name)).list_tools, "tools")
+            # bound to the pool, not to this session, so the tools survive a reopen
+            return [
+                convert_mcp_tool_to_langchain_tool(
+                    self.bound(name),
+                    tool,
+                    callbacks=self.client.callbacks,
+                    server_name=name,
+                    tool_interceptors=self.client.tool_interceptors,
+                    tool_name_prefix=self.client.tool_name_prefix,
+                    handle_tool_errors=self.client.handle_tool_errors,
+                )
+                for tool in tools
+            ]
+
+        tools_list = await asyncio.gather(*(load(name) for name in names))
+        return [tool for tools in tools_list for tool in tools]
+
+    async def get_resources(self, server_name: str, uris=None) -> List[Any]:
+        return await load_mcp_resources(await self.session(server_name), uris=uris)
+
+    async def get_prompt(
+        self, server_name: str, prompt_name: str, arguments: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        return await load_mcp_prompt(
+            await self.session(server_name), prompt_name, arguments=arguments
+        )
+
+    async def _close(self, server_name: str, session: Optional[ClientSession] = None) -> None:
+        held = self._sessions.get(server_name)
+        # a check that raced a reopen must not close the session that replaced its own
+        if held is None or (session is not None and held[0] is not session):
+            return
+        del self._sessions[server_name]
+        _, closed, task = held
+        closed.set()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(self._close(name) for name in list(self._sessions)))
@@ -0,0 +1,56 @@
+"""
+Offline MCP server for the fan-out tests and benchmark, with injected latency.
+
+    STAND_IN_NAME        server name, also prefixed to the answers
+    STAND_IN_START_DELAY seconds before the server starts answering
+    STAND_IN_LIST_DELAY  seconds every tools/list takes
+    STAND_IN_SLOW        seconds a slow lookup takes
+    STAND_IN_SLOW_RATE   share of lookups that are slow (seeded, so repeatable)
+    STAND_IN_SLOW_FIRST  "1": the first lookup of every key is slow
+"""
+import asyncio
+import os
+import random
+import time
+from collections import Counter
+
+from mcp.server.fastmcp import FastMCP
+
+NAME = os.getenv("STAND_IN_NAME", "stand_in")
+START_DELAY = float(os.getenv("STAND_IN_START_DELAY", 0))
+LIST_DELAY = float(os.getenv("STAND_IN_LIST_DELAY", 0))
+SLOW = float(os.getenv("STAND_IN_SLOW", 1.0))
+SLOW_RATE = float(os.getenv("STAND_IN_SLOW_RATE", 0))
+SLOW_FIRST = os.getenv("STAND_IN_SLOW_FIRST") == "1"
+
+
+class StandInServer(FastMCP):
+    async def list_tools(self):
+        await asyncio.sleep(LIST_DELAY)
+        return await super().list_tools()
+
+
+mcp = StandInServer(NAME, log_level="WARNING")
+lookups = Counter()
+rng = random.Random(0)
+
+
+@mcp.tool()
+async def lookup(key: str) -> str:
+    """Look a key up, fast unless this call is picked to be slow"""
+    lookups[key] += 1
+    slow = (SLOW_FIRST and lookups[key] == 1) or rng.random() < SLOW_RATE
+    await asyncio.sleep(SLOW if slow else 0.01)
+    return f"{NAME}:{key}"
+
+
+@mcp.tool()
+async def sleep(seconds: float) -> str:
+    """Answer after the given number of seconds"""
+    await asyncio.sleep(seconds)
+    return f"{NAME}: slept {seconds}"
+
+
+if __name__ == "__main__":
+    time.sleep(START_DELAY)
+    mcp.run(transport="stdio")
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import InMemorySaver
+
+from batch_runner import BatchRunner, read_queries
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeModel(GenericFakeChatModel):
+    """Slow offline chat model that answers with the question and rate limits every few calls"""
+
+    delay: float = 0.02
+    fail_every: int = 0
+    calls: int = 0
+    running: int = 0
+    max_running: int = 0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise RateLimitError("429 Too Many Requests")
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        answer = AIMessage(f"answer: {messages[-1].content}")
+        return ChatResult(generations=[ChatGeneration(message=answer)])
+
+
+def write_queries(path, n):
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": i, "query": f"question {i}"}) + "\n")
+
+
+def test_batch_runs_with_bounded_concurrency(tmp_path):
+    write_queries(tmp_path / "queries.jsonl", 50)
+    model = FakeModel(messages=iter([]))
+    agent = create_agent(model=model, tools=[], checkpointer=InMemorySaver())
+    runner = BatchRunner(agent, concurrency=5)
+
+    stats = asyncio.run(runner.run(read_queries(tmp_path / "queries.jsonl"), tmp_path / "out.jsonl"))
+    results = [json.loads(line) for line in open(tmp_path / "out.jsonl")]
+
+    assert stats["queries"] == 50 and stats["errors"] == 0
+    assert model.max_running <= 5
+    assert sorted(r["id"] for r in results) == list(range(50))
+    assert all(r["answer"] == f"answer: {r['query']}" for r in results)
+    assert stats["p50"] <= stats["p95"] <= stats["p99"]
+
+    # every query ran in its own thread, under a prefix of this runner's own
+    state = agent.get_state({"configurable": {"thread_id": f"{runner.thread_prefix}-7"}})
+    assert len(state.values["messages"]) == 2
+    assert BatchRunner(agent).thread_prefix != runner.thread_prefix
+
+
+def test_queries_are_taken_only_as_workers_free_up(tmp_path):
+    model = FakeModel(messages=iter([]))
+    runner = BatchRunner(create_agent(model=model, tools=[]), concurrency=3)
+    out_path = tmp_path / "out.jsonl"
+    taken = []
+
+    def queries():
+        for i in range(30):
+            answered = out_path.read_text().count("\n") if out_path.exists() else 0
+            assert len(taken) - answered <= 3
+            taken.append(i)
+            yield {"id": i, "query": f"question {i}"}
+
+    stats = asyncio.run(runner.run(queries(), out_path))
+
+    assert stats["queries"] == 30 and stats["errors"] == 0
+    assert model.max_running <= 3
+
+
+def test_rate_limited_queries_are_retried(tmp_path):
+    write_queries(tmp_path / "queries.jsonl", 20)
+    model = FakeModel(messages=iter([]), fail_every=3)
+    agent = create_agent(model=model, tools=[])
+    runner = BatchRunner(agent, concurrency=4, base_delay=0.001)
+
+    stats = asyncio.run(runner.run(read_queries(tmp_path / "queries.jsonl"), tmp_path / "out.jsonl"))
+    results = [json.loads(line) for line in open(tmp_path / "out.jsonl")]
+
+    assert stats["errors"] == 0
+    assert any(r["attempts"] > 1 for r in results)
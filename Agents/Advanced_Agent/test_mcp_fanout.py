@@ -0,0 +1,158 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from mcp_fanout import CircuitBreaker, MCPFanOut, ToolPolicy
+from mcp_pool import MCPSessionPool
+
+SERVER_PATH = Path(__file__).resolve().parent / "stand_in_mcp_server.py"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def stand_in(name, **env):
+    return {
+        "transport": "stdio",
+        "command": sys.executable,
+        "args": [str(SERVER_PATH)],
+        "env": {**os.environ, "STAND_IN_NAME": name, **{f"STAND_IN_{k.upper()}": str(v) for k, v in env.items()}},
+    }
+
+
+def text(result):
+    return result if isinstance(result, str) else " ".join(block["text"] for block in result)
+
+
+class GatedPool:
+    """Stands in for MCPSessionPool: a server's tools come back only once every answering server was asked"""
+
+    def __init__(self, answering, stuck):
+        self.answering = answering
+        self.stuck = stuck
+        self.asked = []
+        self.all_asked = asyncio.Event()
+
+    async def get_tools(self, name):
+        self.asked.append(name)
+        if set(self.answering) <= set(self.asked):
+            self.all_asked.set()
+        if name in self.stuck:
+            await asyncio.Event().wait()
+        # asked one after the other, the first server would wait here for ever
+        await self.all_asked.wait()
+        return [f"{name}_tool"]
+
+
+def test_discovery_is_parallel_and_skips_a_server_that_hangs():
+    fanout = MCPFanOut({"a": stand_in("a"), "b": stand_in("b"), "stuck": stand_in("stuck")}, discovery_timeout=1.0)
+    pool = GatedPool(answering=["a", "b"], stuck=["stuck"])
+
+    tools = asyncio.run(fanout.get_tools(pool))
+
+    assert sorted(tools) == ["a_tool", "b_tool"]
+    assert sorted(pool.asked) == ["a", "b", "stuck"]
+    assert "no answer within 1s" in fanout.stats()["stuck"]["discovery_error"]
+    assert fanout.breakers["stuck"].failed == 1
+    assert fanout.breakers["a"].failed == 0
+
+
+def test_hedged_call_is_answered_by_the_faster_attempt():
+    fanout = MCPFanOut(
+        {"kiwi": stand_in("kiwi", slow=30, slow_first=1)},
+        policies={"kiwi:lookup": ToolPolicy(timeout=60, hedge_after=0.2)},
+    )
+    pool = MCPSessionPool(fanout.client)
+
+    async def run():
+        try:
+            tools = {t.name: t for t in await fanout.get_tools(pool)}
+            return await tools["lookup"].ainvoke({"key": "PRG-LIS"})
+        finally:
+            await pool.aclose()
+
+    result = asyncio.run(run())
+
+    # the first attempt sleeps 30s, the answer came from the duplicate
+    assert text(result) == "kiwi:PRG-LIS"
+    assert fanout.stats()["kiwi"]["hedged"] == 1
+    assert fanout.stats()["kiwi"]["hedge_wins"] == 1
+
+
+def test_timeouts_open_the_circuit_until_a_probe_succeeds():
+    clock = FakeClock()
+    fanout = MCPFanOut(
+        {"time": stand_in("time")},
+        default=ToolPolicy(timeout=0.3),
+        failures=2,
+        reset_after=30,
+        clock=clock,
+    )
+    pool = MCPSessionPool(fanout.client)
+
+    async def run():
+        try:
+            sleep = {t.name: t for t in await fanout.get_tools(pool)}["sleep"]
+            answers = [text(await sleep.ainvoke({"seconds": 5})) for _ in range(2)]
+            answers.append(text(await sleep.ainvoke({"seconds": 0})))
+            clock.now += 30
+            answers.append(text(await sleep.ainvoke({"seconds": 0})))
+            return answers
+        finally:
+            await pool.aclose()
+
+    answers = asyncio.run(run())
+
+    assert all("did not answer within 0.3s" in a for a in answers[:2])
+    assert "circuit open" in answers[2]
+    assert answers[3] == "time: slept 0.0"
+    stats = fanout.stats()["time"]
+    # the rejected call never reached the server: two timeouts and the probe
+    assert (stats["calls"], stats["timeouts"], stats["rejected"], stats["state"]) == (3, 2, 1, "closed")
+
+
+def test_breaker_lets_one_probe_through_when_half_open():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failures=1, reset_after=10, clock=clock)
+
+    breaker.failure()
+    assert (breaker.state, breaker.allow()) == ("open", False)
+
+    clock.now += 10
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.failure()
+    assert breaker.state == "open"
+
+    clock.now += 10
+    assert breaker.allow() is True
+    breaker.success()
+    assert (breaker.state, breaker.allow()) == ("closed", True)
+
+
+def test_discovery_timeout_stops_a_server_that_is_still_starting():
+    fanout = MCPFanOut({"a": stand_in("a"), "slow": stand_in("slow", start_delay=60)}, discovery_timeout=1.0)
+    pool = MCPSessionPool(fanout.client)
+
+    async def run():
+        await pool.warm_up("a")
+        before = asyncio.all_tasks()
+        try:
+            tools = await fanout.get_tools(pool)
+            # the tasks running the slow server's session were stopped with it
+            return tools, set(pool._sessions), asyncio.all_tasks() == before
+        finally:
+            await pool.aclose()
+
+    tools, sessions, nothing_left = asyncio.run(run())
+
+    assert sorted(t.name for t in tools) == ["lookup", "sleep"]
+    assert "no answer within 1s" in fanout.stats()["slow"]["discovery_error"]
+    assert sessions == {"a"}
+    assert nothing_left
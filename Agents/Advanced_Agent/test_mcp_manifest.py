@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp_manifest import discover, load_context, load_manifest, prompt_from_manifest, tools_from_manifest
+from mcp_pool import MCPSessionPool
+
+SERVER_PATH = Path(__file__).resolve().parent / "Resources" / "2.1_mcp_server.py"
+STAND_IN_PATH = Path(__file__).resolve().parent / "stand_in_mcp_server.py"
+
+
+def build_client():
+    return MultiServerMCPClient(
+        {
+            "local_server": {
+                "transport": "stdio",
+                "command": sys.executable,
+                "args": [str(SERVER_PATH)],
+                # the server only needs a key to start, discovery never searches
+                "env": {**os.environ, "TAVILY_API_KEY": "test", "SEARCH_CACHE_PATH": ""},
+            }
+        }
+    )
+
+
+def test_agent_context_is_built_from_the_manifest(tmp_path):
+    path = tmp_path / "manifest.json"
+    client = build_client()
+
+    async def run():
+        first, refresh = await load_context(client, path)
+        assert refresh is None
+
+        second, refresh = await load_context(client, path)
+        changed = await refresh
+        tools = await tools_from_manifest(client, second)
+        return first, second, changed, tools
+
+    first, second, changed, tools = asyncio.run(run())
+
+    assert first["digest"] == second["digest"]
+    assert changed is False
+    assert [t.name for t in tools] == ["search_web", "query_chinook", "search_handbook"]
+    assert "LangChain" in prompt_from_manifest(second, "local_server", "prompt")[0].content
+
+
+def test_outdated_manifest_is_ignored(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"version": 0, "servers": {}}))
+
+    assert load_manifest(path, build_client()) is None
+
+
+def test_pooled_manifest_tools_start_the_server_on_first_call():
+    client = MultiServerMCPClient(
+        {
+            "stand_in": {
+                "transport": "stdio",
+                "command": sys.executable,
+                "args": [str(STAND_IN_PATH)],
+                "env": {**os.environ, "STAND_IN_NAME": "stand_in"},
+            }
+        }
+    )
+    pool = MCPSessionPool(client)
+
+    async def run():
+        try:
+            manifest = await discover(client)
+            lookup = {t.name: t for t in await tools_from_manifest(client, manifest, pool=pool)}["lookup"]
+            started_before_a_call = dict(pool._sessions)
+            first = await lookup.ainvoke({"key": "a"})
+            session = await pool.session("stand_in")
+            second = await lookup.ainvoke({"key": "b"})
+            return started_before_a_call, first, second, session is await pool.session("stand_in")
+        finally:
+            await pool.aclose()
+
+    started_before_a_call, first, second, same_session = asyncio.run(run())
+
+    assert started_before_a_call == {}
+    assert "stand_in:a" in str(first) and "stand_in:b" in str(second)
+    assert same_session
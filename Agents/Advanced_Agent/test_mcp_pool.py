@@ -0,0 +1,173 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from mcp_pool import MCPSessionPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSession:
+    def __init__(self, name):
+        self.name = name
+        self.alive = True
+        self.pings = 0
+        self.calls = []
+        self.ping_gate = None
+
+    async def send_ping(self):
+        self.pings += 1
+        if self.ping_gate is not None:
+            await self.ping_gate.wait()
+        if not self.alive:
+            raise ConnectionError(f"{self.name} exited")
+
+    async def call_tool(self, name, arguments=None, **kwargs):
+        if not self.alive:
+            raise ConnectionError(f"{self.name} exited")
+        self.calls.append(name)
+        return name
+
+
+class FakeClient:
+    """Stands in for MultiServerMCPClient: records the sessions it opened and closed"""
+
+    def __init__(self, *names):
+        self.connections = {name: {} for name in names}
+        self.opened = []
+        self.closed = []
+
+    @asynccontextmanager
+    async def session(self, server_name):
+        session = FakeSession(server_name)
+        self.opened.append(session)
+        try:
+            yield session
+        finally:
+            self.closed.append(session)
+
+
+def test_sessions_are_opened_once_and_reused():
+    client = FakeClient("a", "b")
+    pool = MCPSessionPool(client)
+
+    async def run():
+        try:
+            first = await asyncio.gather(*(pool.session("a") for _ in range(5)))
+            again = await pool.session("a")
+            other = await pool.session("b")
+            return first, again, other
+        finally:
+            await pool.aclose()
+
+    first, again, other = asyncio.run(run())
+
+    assert all(session is again for session in first)
+    assert other is not again
+    assert [s.name for s in client.opened] == ["a", "b"]
+    # a hand-out inside the check interval doesn't ping
+    assert sum(s.pings for s in client.opened) == 0
+    assert pool.reopened == 0
+
+
+def test_dead_session_is_reopened_once_the_check_is_due():
+    clock = FakeClock()
+    client = FakeClient("a")
+    pool = MCPSessionPool(client, check_every=30, clock=clock)
+
+    async def run():
+        try:
+            dead = await pool.session("a")
+            dead.alive = False
+            early = await pool.session("a")
+            clock.now += 30
+            fresh = await pool.session("a")
+            return dead, early, fresh, await pool.session("a")
+        finally:
+            await pool.aclose()
+
+    dead, early, fresh, again = asyncio.run(run())
+
+    assert early is dead
+    assert fresh is not dead and again is fresh
+    assert client.opened == [dead, fresh]
+    assert client.closed == [dead, fresh]
+    assert pool.reopened == 1
+
+
+def test_failed_call_checks_the_session_and_bound_tools_follow_the_reopen():
+    client = FakeClient("a")
+    pool = MCPSessionPool(client, check_every=3600, clock=FakeClock())
+    bound = pool.bound("a")
+
+    async def run():
+        try:
+            assert await bound.call_tool("lookup", {}) == "lookup"
+            dead = client.opened[0]
+            dead.alive = False
+            with pytest.raises(ConnectionError):
+                await bound.call_tool("lookup", {})
+            assert await bound.call_tool("lookup", {}) == "lookup"
+            return dead
+        finally:
+            await pool.aclose()
+
+    dead = asyncio.run(run())
+
+    fresh = client.opened[1]
+    assert client.opened == [dead, fresh]
+    assert dead.calls == ["lookup"] and fresh.calls == ["lookup"]
+    assert pool.reopened == 1
+
+
+def test_a_slow_ping_does_not_hold_up_other_callers():
+    clock = FakeClock()
+    client = FakeClient("a")
+    pool = MCPSessionPool(client, check_every=30, clock=clock)
+
+    async def run():
+        try:
+            session = await pool.session("a")
+            session.ping_gate = asyncio.Event()
+            clock.now += 30
+            checking = asyncio.create_task(pool.session("a"))
+            while session.pings == 0:
+                await asyncio.sleep(0)
+            # the check is in flight; everyone else gets the session right away
+            others = await asyncio.wait_for(
+                asyncio.gather(*(pool.session("a") for _ in range(3))), timeout=1
+            )
+            session.ping_gate.set()
+            return session, others, await checking
+        finally:
+            await pool.aclose()
+
+    session, others, checked = asyncio.run(run())
+
+    assert all(other is session for other in others) and checked is session
+    assert session.pings == 1
+    assert pool.reopened == 0
+
+
+def test_aclose_closes_every_session():
+    client = FakeClient("a", "b", "c")
+    pool = MCPSessionPool(client)
+
+    async def run():
+        await pool.warm_up()
+        held = [task for _, _, task in pool._sessions.values()]
+        await pool.aclose()
+        return held
+
+    held = asyncio.run(run())
+
+    assert sorted(s.name for s in client.closed) == ["a", "b", "c"]
+    assert all(task.done() for task in held)
+    assert pool._sessions == {}
@@ -0,0 +1,299 @@
+"""
+Local ASGI server for the personal chef agent, streaming the answer as server-sent events.
+
+    python chef_server.py --port 8000 [--workers 4]
+    curl -N localhost:8000/threads/1/stream -H 'Content-Type: application/json' -d '{"message": "I have chicken and rice"}'
+
+POST /stream starts a new thread, POST /threads/<id>/stream continues one.
+Events: "thread" ({"thread_id"}), "token" for every piece of the answer,
+"tool" for tool results, then "end" or "error". GET /stats shows the counters,
+web_search's included (identical searches in flight at once share a request).
+
+Runs of a thread never overlap. Messages that arrive while their thread is
+busy wait, and everything that waited is answered in one run: every waiting
+request gets that run's stream. Backpressure:
+    CHEF_MAX_RUNNING   runs executing at once (default 16)
+    CHEF_MAX_PENDING   waiting messages per thread, then 429 (default 8)
+    CHEF_MAX_WAITING   waiting messages in the server, then 503 (default 512)
+A client that reads slower than the answer is produced gets an "error" event
+and is dropped once `buffer` events are queued for it.
+
+Conversations are checkpointed to CHEF_CHECKPOINTS (empty: in memory). With
+--workers the app runs in that many processes; they share the checkpoints,
+a lock file per thread keeps a thread's runs in order across processes and
+coalescing happens within each process.
+
+CHEF_AGENT=module:function builds the agent from function(checkpointer)
+instead, load_chef.py uses it to serve a fake model.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import tempfile
+import zlib
+from contextlib import asynccontextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from langchain_core.messages import AIMessageChunk, HumanMessage, ToolMessage
+from sse_starlette.sse import EventSourceResponse
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+BASE_DIR = Path(__file__).resolve().parent
+CHECKPOINT_PATH = BASE_DIR / ".cache" / "chef_checkpoints.sqlite3"
+
+MAX_RUNNING = 16
+MAX_PENDING = 8
+MAX_WAITING = 512
+BUFFER = 1024
+
+Event = Optional[Tuple[str, Dict[str, Any]]]
+
+
+class Busy(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ThreadLocks:
+    """
+    Per-thread locks shared by processes: an flock on one of `buckets` files.
+
+    Threads that hash to the same bucket wait for each other too, which only
+    costs a little concurrency.
+    """
+
+    def __init__(self, directory: str, buckets: int = 256, poll: float = 0.005):
+        import fcntl
+
+        self._fcntl = fcntl
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.buckets = buckets
+        self.poll = poll
+
+    @asynccontextmanager
+    async def hold(self, thread_id: str):
+        path = self.directory / f"{zlib.crc32(thread_id.encode()) % self.buckets}.lock"
+        fd = os.open(path, os.O_RDWR | os.O_CREAT)
+        try:
+            # non-blocking attempts, so waiting for a lock doesn't take an executor thread
+            while True:
+                try:
+                    self._fcntl.flock(fd, self._fcntl.LOCK_EX | self._fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(self.poll)
+            yield
+        finally:
+            # closing the file releases the lock
+            os.close(fd)
+
+
+def _event(message) -> Event:
+    if isinstance(message, AIMessageChunk):
+        return ("token", {"content": message.text}) if message.text else None
+    if isinstance(message, ToolMessage):
+        return "tool", {"name": message.name, "content": message.text}
+    return None
+
+
+class ThreadScheduler:
+    """Runs the agent for incoming messages: one run at a time per thread, coalescing what waited"""
+
+    def __init__(
+        self,
+        agent,
+        max_running: int = MAX_RUNNING,
+        max_pending: int = MAX_PENDING,
+        max_waiting: int = MAX_WAITING,
+        locks: Optional[ThreadLocks] = None,
+        buffer: int = BUFFER,
+    ):
+        self.agent = agent
+        self.max_pending = max_pending
+        self.max_waiting = max_waiting
+        self.locks = locks
+        self.buffer = buffer
+        self._slots = asyncio.Semaphore(max_running)
+        self._pending: Dict[str, List[Tuple[str, asyncio.Queue]]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self.waiting = 0
+        self.running = 0
+        self.requests = 0
+        self.runs = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def submit(self, thread_id: str, text: str) -> asyncio.Queue:
+        """Queue a message; its events arrive on the returned queue, None ends them"""
+        pending = self._pending.get(thread_id, [])
+        if len(pending) >= self.max_pending:
+            self.rejected += 1
+            raise Busy(429, f"thread {thread_id} has {len(pending)} messages waiting")
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise Busy(503, "server is busy, try again later")
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.buffer)
+        self._pending.setdefault(thread_id, []).append((text, queue))
+        self.waiting += 1
+        self.requests += 1
+        if thread_id not in self._workers:
+            self._workers[thread_id] = asyncio.create_task(self._drain(thread_id))
+        return queue
+
+    async def _drain(self, thread_id: str) -> None:
+        try:
+            while self._pending.get(thread_id):
+                # the thread's file lock before a run slot: waiting for another process
+                # to finish this thread must not keep a slot from the other threads
+                async with self.locks.hold(thread_id) if self.locks is not None else nullcontext():
+                    async with self._slots:
+                        await self._run(thread_id)
+        finally:
+            self._workers.pop(thread_id, None)
+            if not self._pending.get(thread_id):
+                self._pending.pop(thread_id, None)
+
+    async def _run(self, thread_id: str) -> None:
+        # everything that arrived while this thread waited for its turn goes in this run
+        batch = self._pending.pop(thread_id, [])
+        self.waiting -= len(batch)
+        queues = [queue for _, queue in batch]
+        self.runs += 1
+        self.coalesced += len(batch) - 1
+        self.running += 1
+        config = {"configurable": {"thread_id": thread_id}}
+        inputs = {"messages": [HumanMessage(text) for text, _ in batch]}
+        try:
+            async for message, _ in self.agent.astream(inputs, config, stream_mode="messages"):
+                event = _event(message)
+                if event is not None:
+                    self._publish(queues, event)
+            self._publish(queues, ("end", {"thread_id": thread_id, "messages": len(batch)}))
+        except Exception as e:
+            self.errors += 1
+            self._publish(queues, ("error", {"error": f"{type(e).__name__}: {e}"}))
+        finally:
+            self.running -= 1
+            self._publish(queues, None)
+
+    def _publish(self, queues: List[asyncio.Queue], event: Event) -> None:
+        for queue in list(queues):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # too slow a reader must not hold up the run for the others
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("error", {"error": "client too slow, stream dropped"}))
+                queue.put_nowait(None)
+                queues.remove(queue)
+                self.dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "running": self.running,
+            "waiting": self.waiting,
+            "threads": len(self._workers),
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+def default_agent(checkpointer):
+    factory = os.getenv("CHEF_AGENT")
+    if factory:
+        module, _, name = factory.partition(":")
+        return getattr(importlib.import_module(module), name)(checkpointer)
+    from personal_chef_project import build_agent
+    return build_agent(checkpointer=checkpointer)
+
+
+def default_checkpointer():
+    sys.path.append(str(BASE_DIR.parents[2] / "Essentials"))
+    from sqlite_checkpointer import SqliteCheckpointer
+
+    path = os.getenv("CHEF_CHECKPOINTS", str(CHECKPOINT_PATH))
+    return SqliteCheckpointer(path or ":memory:", keep_last=20)
+
+
+def create_app(scheduler: Optional[ThreadScheduler] = None) -> Starlette:
+    if scheduler is None:
+        lock_dir = os.getenv("CHEF_LOCK_DIR")
+        scheduler = ThreadScheduler(
+            default_agent(default_checkpointer()),
+            max_running=int(os.getenv("CHEF_MAX_RUNNING", MAX_RUNNING)),
+            max_pending=int(os.getenv("CHEF_MAX_PENDING", MAX_PENDING)),
+            max_waiting=int(os.getenv("CHEF_MAX_WAITING", MAX_WAITING)),
+            locks=ThreadLocks(lock_dir) if lock_dir else None,
+        )
+
+    async def stream(request):
+        thread_id = request.path_params.get("thread_id") or str(uuid4())
+        try:
+            message = (await request.json()).get("message")
+        except (ValueError, AttributeError):
+            message = None
+        if not isinstance(message, str) or not message.strip():
+            return JSONResponse({"error": 'send {"message": "..."}'}, status_code=400)
+        try:
+            queue = scheduler.submit(thread_id, message)
+        except Busy as e:
+            return JSONResponse({"error": str(e)}, status_code=e.status, headers={"Retry-After": "1"})
+
+        async def events():
+            yield {"event": "thread", "data": json.dumps({"thread_id": thread_id})}
+            while (event := await queue.get()) is not None:
+                yield {"event": event[0], "data": json.dumps(event[1])}
+
+        return EventSourceResponse(events())
+
+    async def stats(request):
+        from personal_chef_project import search_flight
+
+        return JSONResponse({"pid": os.getpid(), **scheduler.stats(), "web_search": search_flight.stats()})
+
+    async def health(request):
+        return JSONResponse({"ok": True})
+
+    app = Starlette(
+        routes=[
+            Route("/stream", stream, methods=["POST"]),
+            Route("/threads/{thread_id}/stream", stream, methods=["POST"]),
+            Route("/stats", stats),
+            Route("/health", health),
+        ]
+    )
+    app.state.scheduler = scheduler
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the personal chef agent with SSE streaming")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="processes; more than one needs a Unix for the thread locks")
+    args = parser.parse_args(argv)
+    if args.workers > 1:
+        os.environ.setdefault("CHEF_LOCK_DIR", str(Path(tempfile.gettempdir()) / f"chef_locks_{args.port}"))
+    uvicorn.run("chef_server:create_app", factory=True, host=args.host, port=args.port, workers=args.workers, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Load test of chef_server.py with a fake model in place of Gemini, no API calls.
+
+    python load_chef.py [requests] [concurrency] [threads] [--workers 1,2]
+
+Starts the server once per worker count, sends `requests` messages from
+`concurrency` clients spread over `threads` conversations and reports
+requests per second, time to the first token (TTFT) and to the end of the
+stream, how many were rejected with 429/503 and how many were answered in a
+coalesced run.
+
+FakeChef streams CHEF_FAKE_TOKENS words, CHEF_FAKE_DELAY seconds apart, and
+burns CHEF_FAKE_CPU seconds of CPU per answer, standing in for the work a
+real answer costs in the process (parsing, tool calls, checkpoints).
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, List, Optional
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+BASE_DIR = Path(__file__).resolve().parent
+
+sys.path.append(str(BASE_DIR.parents[2] / "Essentials"))
+from agent_trace import percentile
+
+
+class FakeChef(BaseChatModel):
+    """Answers with `tokens` words, naming how many user messages it answers"""
+
+    tokens: int = 20
+    delay: float = 0.01
+    cpu: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chef"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _words(self, messages: List[BaseMessage]) -> List[str]:
+        # the user messages since the last answer, more than one when requests were coalesced
+        waiting = 0
+        for message in reversed(messages):
+            if not isinstance(message, HumanMessage):
+                break
+            waiting += 1
+        end = time.process_time() + self.cpu
+        while time.process_time() < end:
+            pass
+        return [f"Answering {waiting} message(s):"] + [f"step{i}" for i in range(self.tokens)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(" ".join(self._words(messages))))])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for i, word in enumerate(self._words(messages)):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(word if i == 0 else " " + word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def build_fake_agent(checkpointer):
+    # CHEF_AGENT=load_chef:build_fake_agent
+    from personal_chef_project import build_agent
+
+    model = FakeChef(
+        tokens=int(os.getenv("CHEF_FAKE_TOKENS", 20)),
+        delay=float(os.getenv("CHEF_FAKE_DELAY", 0.01)),
+        cpu=float(os.getenv("CHEF_FAKE_CPU", 0.005)),
+    )
+    return build_agent(model=model, checkpointer=checkpointer)
+
+
+async def read_stream(client: httpx.AsyncClient, thread_id: str, message: str):
+    """(seconds to the first token, seconds to the end, events) of one request, or the status it was refused with"""
+    start = time.perf_counter()
+    first, events = None, []
+    async with client.stream("POST", f"/threads/{thread_id}/stream", json={"message": message}) as response:
+        if response.status_code != 200:
+            return response.status_code
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                if event == "token" and first is None:
+                    first = time.perf_counter() - start
+                events.append((event, json.loads(line[5:])))
+    return first, time.perf_counter() - start, events
+
+
+async def drive(base_url: str, requests: int, concurrency: int, threads: int):
+    results = []
+    sent = iter(range(requests))
+
+    async def client_loop(client):
+        for i in sent:
+            results.append(await read_stream(client, str(i % threads), f"I have ingredient {i}"))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int, checkpoints: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "CHEF_AGENT": "load_chef:build_fake_agent",
+        "CHEF_CHECKPOINTS": checkpoints,
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "load"),
+        "TAVILY_API_KEY": os.getenv("TAVILY_API_KEY", "load"),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "chef_server.py", "--port", str(port), "--workers", str(workers)], cwd=BASE_DIR, env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("the server did not start")
+
+
+def report(label: str, results, elapsed: float) -> None:
+    done = [r for r in results if isinstance(r, tuple)]
+    refused = len(results) - len(done)
+    ttft = [1000 * first for first, _, _ in done if first is not None]
+    total = [1000 * seconds for _, seconds, _ in done]
+    coalesced = sum(1 for *_, events in done if events and events[-1][0] == "end" and events[-1][1]["messages"] > 1)
+    errors = sum(1 for *_, events in done if any(kind == "error" for kind, _ in events))
+
+    def ms(values, q):
+        # every request refused, or none streamed a token: nothing to take a percentile of
+        return f"{percentile(values, q):6.1f}" if values else f"{'-':>6}"
+
+    print(
+        f"{label:<10} {len(done) / elapsed:7.1f} rps  "
+        f"ttft p50 {ms(ttft, 50)} p95 {ms(ttft, 95)} ms  "
+        f"done p50 {ms(total, 50)} p95 {ms(total, 95)} ms  "
+        f"refused {refused}  coalesced {coalesced}  errors {errors}"
+    )
+
+
+def main(requests: int = 400, concurrency: int = 64, threads: int = 16, workers=(1, 2)):
+    print(f"{requests} requests, {concurrency} clients, {threads} threads, {os.cpu_count()} CPU(s)\n")
+    for count in workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            port = free_port()
+            server = start_server(port, count, str(Path(tmp) / "checkpoints.sqlite3"))
+            try:
+                asyncio.run(drive(f"http://127.0.0.1:{port}", 8, 8, 8))  # warm up every worker
+                results, elapsed = asyncio.run(drive(f"http://127.0.0.1:{port}", requests, concurrency, threads))
+                report(f"{count} worker(s)", results, elapsed)
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    workers = (1, 2)
+    if "--workers" in sys.argv:
+        workers = tuple(int(w) for w in sys.argv[sys.argv.index("--workers") + 1].split(","))
+        args = [a for a in args if a != sys.argv[sys.argv.index("--workers") + 1]]
+    main(*(int(a) for a in args[:3]), workers=workers)
@@ -2,18 +2,35 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from langchain.tools import tool
+import os
+import sys
+import threading
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, Any
-from tavily import TavilyClient
 
-tavily_client = TavilyClient()
+BASE_DIR = Path(__file__).resolve().parent
 
-@tool
+sys.path.append(str(BASE_DIR.parents[2] / "Essentials"))
+from single_flight import SingleFlight
+
+# importing this module only defines things; langchain, gemini and tavily are
+# imported and the agent is built on the first get_agent() (about 2 s less per boot)
+
+@lru_cache(maxsize=None)
+def tavily_client():
+    from tavily import TavilyClient
+    return TavilyClient()
+
+# sessions running at the same time often search the same ingredients, they share one Tavily request
+search_flight = SingleFlight(key=lambda query: " ".join(query.lower().split()))
+
+@search_flight.wrap
 def web_search(query: str) -> Dict[str, Any]:
 
     """Search the web for information"""
 
-    return tavily_client.search(query)
+    return tavily_client().search(query)
 
 system_prompt = """
 
@@ -25,11 +42,54 @@ Return recipe suggestions and eventually the recipe instructions to the user, if
 
 """
 
-from langchain.agents import create_agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-model = ChatGoogleGenerativeAI(model = "gemini-2.5-flash")
-agent = create_agent(
-    model=model,
-    tools=[web_search],
-    system_prompt=system_prompt
-)
\ No newline at end of file
+def build_agent(model=None, checkpointer=None):
+    from langchain.agents import create_agent
+    from langchain.tools import tool
+
+    if model is None:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        from response_cache import ResponseCache
+
+        # the same ingredient lists come up again and again, answer them from here
+        # set RESPONSE_CACHE_THRESHOLD (e.g. 0.95) to also reuse answers to similar questions
+        threshold = os.getenv("RESPONSE_CACHE_THRESHOLD")
+        if threshold:
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            embeddings = GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001")
+        else:
+            embeddings = None
+        response_cache = ResponseCache(
+            str(BASE_DIR / ".cache" / "responses.sqlite3"),
+            embeddings=embeddings,
+            threshold=float(threshold or 0.95),
+        )
+        model = ChatGoogleGenerativeAI(model = "gemini-2.5-flash", cache = response_cache)
+
+    return create_agent(
+        model=model,
+        tools=[tool(web_search)],
+        system_prompt=system_prompt,
+        checkpointer=checkpointer
+    )
+
+_agent = None
+_agent_lock = threading.Lock()
+
+def get_agent():
+    """The agent of this process, built on first use"""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                _agent = build_agent()
+    return _agent
+
+def make_graph():
+    # graph factory for langgraph.json, a server worker builds the agent once
+    return get_agent()
+
+def __getattr__(name):
+    # `from personal_chef_project import agent` still works, it builds the agent then
+    if name == "agent":
+        return get_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
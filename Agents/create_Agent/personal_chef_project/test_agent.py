@@ -1,9 +1,15 @@
-from personal_chef_project import agent
+import sys
+from pathlib import Path
+from personal_chef_project import get_agent
 from langchain.messages import HumanMessage
 
+sys.path.append(str(Path(__file__).resolve().parents[3] / "Essentials"))
+from agent_trace import trace_config
+
 # Test the agent
+# AGENT_TRACE=trace.jsonl records node, model and tool timings, python agent_trace.py trace.jsonl sums them up
 question = HumanMessage(content="I have chicken, rice, and broccoli. What can I make?")
-response = agent.invoke({"messages": [question]})
+response = get_agent().invoke({"messages": [question]}, trace_config())
 
 from pprint import pprint
 
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import time
+import zlib
+
+import httpx
+from langgraph.checkpoint.memory import InMemorySaver
+
+from chef_server import ThreadLocks, ThreadScheduler, create_app
+from load_chef import FakeChef
+from personal_chef_project import build_agent
+
+
+def fake_agent(**model):
+    return build_agent(model=FakeChef(**{"tokens": 5, "delay": 0.001, **model}), checkpointer=InMemorySaver())
+
+
+def parse(body):
+    events = []
+    for block in body.strip().split("\r\n\r\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def collect(queue):
+    events = []
+    while (event := await queue.get()) is not None:
+        events.append(event)
+    return events
+
+
+def test_answer_is_streamed_token_by_token_and_the_thread_remembered():
+    app = create_app(ThreadScheduler(fake_agent()))
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://chef") as client:
+            first = await client.post("/threads/t1/stream", json={"message": "I have eggs"})
+            second = await client.post("/threads/t1/stream", json={"message": "and flour"})
+            bad = await client.post("/threads/t1/stream", json={"text": "?"})
+            return first, second, bad
+
+    first, second, bad = asyncio.run(run())
+
+    events = parse(first.text)
+    assert first.headers["content-type"].startswith("text/event-stream")
+    assert events[0] == ("thread", {"thread_id": "t1"})
+    tokens = [data["content"] for kind, data in events if kind == "token"]
+    assert "".join(tokens) == "Answering 1 message(s): step0 step1 step2 step3 step4"
+    assert len(tokens) == 6
+    assert events[-1] == ("end", {"thread_id": "t1", "messages": 1})
+    checkpoint = app.state.scheduler.agent.get_state({"configurable": {"thread_id": "t1"}})
+    assert [m.text for m in checkpoint.values["messages"]][::2] == ["I have eggs", "and flour"]
+    assert parse(second.text)[-1][0] == "end"
+    assert bad.status_code == 400
+
+
+def test_messages_sent_while_the_thread_runs_are_answered_in_one_run():
+    scheduler = ThreadScheduler(fake_agent(delay=0.02))
+
+    async def run():
+        first = scheduler.submit("t1", "I have eggs")
+        while scheduler.running == 0:
+            await asyncio.sleep(0.001)
+        later = [scheduler.submit("t1", text) for text in ("and flour", "and milk", "no oven")]
+        return await asyncio.gather(collect(first), *map(collect, later))
+
+    first, *later = asyncio.run(run())
+
+    assert first[-1] == ("end", {"thread_id": "t1", "messages": 1})
+    # the three waiting requests share one run and get the same stream
+    assert later[0] == later[1] == later[2]
+    assert later[0][0] == ("token", {"content": "Answering 3 message(s):"})
+    assert later[0][-1] == ("end", {"thread_id": "t1", "messages": 3})
+    assert scheduler.stats() | {"threads": 0} == {
+        "requests": 4, "runs": 2, "coalesced": 2, "running": 0, "waiting": 0,
+        "threads": 0, "rejected": 0, "dropped": 0, "errors": 0,
+    }
+
+
+def test_full_thread_gets_429_and_full_server_503():
+    scheduler = ThreadScheduler(fake_agent(delay=0.05), max_running=1, max_pending=2, max_waiting=3)
+    app = create_app(scheduler)
+
+    async def run():
+        scheduler.submit("busy", "first")
+        while scheduler.running == 0:
+            await asyncio.sleep(0.001)
+        scheduler.submit("busy", "second")
+        scheduler.submit("busy", "third")
+        scheduler.submit("other", "fourth")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://chef") as client:
+            thread_full = await client.post("/threads/busy/stream", json={"message": "too many"})
+            server_full = await client.post("/threads/new/stream", json={"message": "too many"})
+        return thread_full, server_full
+
+    thread_full, server_full = asyncio.run(run())
+
+    assert thread_full.status_code == 429
+    assert server_full.status_code == 503
+    assert thread_full.headers["retry-after"] == "1"
+    assert scheduler.rejected == 2
+
+
+def test_slow_reader_is_dropped_without_holding_up_the_run():
+    scheduler = ThreadScheduler(fake_agent(tokens=50, delay=0), buffer=10)
+
+    async def run():
+        queue = scheduler.submit("t1", "hi")
+        while scheduler._workers:
+            await asyncio.sleep(0.001)
+        return await collect(queue)
+
+    events = asyncio.run(run())
+
+    assert events == [("error", {"error": "client too slow, stream dropped"})]
+    assert scheduler.dropped == 1
+    assert scheduler.runs == 1
+
+
+def test_thread_locks_serialize_a_thread_but_not_others(tmp_path):
+    locks = ThreadLocks(str(tmp_path), poll=0.001)
+    # a second instance stands in for another worker process
+    other = ThreadLocks(str(tmp_path), poll=0.001)
+
+    async def hold(locks, thread_id):
+        async with locks.hold(thread_id):
+            start = time.perf_counter()
+            await asyncio.sleep(0.05)
+            return start, time.perf_counter()
+
+    async def run():
+        return await asyncio.gather(hold(locks, "a"), hold(other, "a"), hold(other, "b"))
+
+    a1, a2, b = asyncio.run(run())
+
+    first, second = sorted([a1, a2])
+    assert second[0] >= first[1]
+    assert b[0] < first[1]
+
+
+def test_thread_locked_by_another_process_does_not_take_a_slot(tmp_path):
+    # "a" and "b" have different lock files
+    assert zlib.crc32(b"a") % 256 != zlib.crc32(b"b") % 256
+    scheduler = ThreadScheduler(fake_agent(), max_running=1, locks=ThreadLocks(str(tmp_path), poll=0.001))
+    other = ThreadLocks(str(tmp_path), poll=0.001)
+
+    async def run():
+        async with other.hold("a"):
+            blocked = scheduler.submit("a", "I have eggs")
+            await asyncio.sleep(0.01)
+            # the only slot is free while "a" waits for the other process
+            done = await asyncio.wait_for(collect(scheduler.submit("b", "and flour")), timeout=2)
+        return done, await collect(blocked)
+
+    done, blocked = asyncio.run(run())
+
+    assert done[-1] == ("end", {"thread_id": "b", "messages": 1})
+    assert blocked[-1] == ("end", {"thread_id": "a", "messages": 1})
@@ -0,0 +1,306 @@
+"""
+Opt-in timing and token traces for graphs and agents.
+
+    config = trace_config({"configurable": {"thread_id": "1"}})
+    await agent.ainvoke(inputs, config)
+
+With AGENT_TRACE=path/to/trace.jsonl set, trace_config() adds a callback
+handler that writes one JSON record per graph, node, model call and tool call.
+Without it the config is returned as it is, nothing is added to the run.
+
+Every record has the wall time of the run and its queue time: how long it
+waited after it could have started, i.e. after its parent started or its
+previous sibling (an earlier step, an earlier tool call) finished. Model calls
+also carry their token counts.
+
+    python agent_trace.py trace.jsonl        # flame-style breakdown + percentiles
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+TRACE_ENV = "AGENT_TRACE"
+
+
+class TraceRecorder(BaseCallbackHandler):
+    """
+    Callback handler that records graph, node, model and tool runs.
+
+    Records are buffered and appended to `path` as JSONL when the top-level
+    run ends; the newest `keep` also stay in `records`. Runs of the trace that
+    never ended (cancelled without a callback) are dropped then, unrecorded.
+    """
+
+    # called in the thread of the run, no executor hop in async code
+    run_inline = True
+
+    def __init__(self, path: Optional[str] = None, keep: int = 10_000):
+        self.path = Path(path) if path else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.records: "deque[Dict[str, Any]]" = deque(maxlen=keep)
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        # every run's parent, also of the runs that aren't recorded
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _recorded_parent(self, parent_run_id: Optional[UUID]) -> Optional[UUID]:
+        while parent_run_id is not None and parent_run_id not in self._runs:
+            parent_run_id = self._parents.get(parent_run_id)
+        return parent_run_id
+
+    def _start(self, kind: str, name: str, run_id: UUID, parent_run_id: Optional[UUID], **extra) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+            parent_id = self._recorded_parent(parent_run_id)
+            parent = self._runs.get(parent_id)
+            trace_id = parent["trace_id"] if parent else run_id
+            ready = max(parent["t0"], parent["last_child_end"]) if parent else now
+            self._runs[run_id] = {
+                "trace_id": trace_id,
+                "parent_id": parent_id,
+                "kind": kind,
+                "name": name,
+                "t0": now,
+                "start": time.time(),
+                "queue_ms": (now - ready) * 1000,
+                "last_child_end": 0.0,
+                **extra,
+            }
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **extra) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self._parents.pop(run_id, None)
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            parent = self._runs.get(run["parent_id"])
+            if parent is not None:
+                parent["last_child_end"] = max(parent["last_child_end"], now)
+            record = {
+                "trace_id": str(run["trace_id"]),
+                "span_id": str(run_id),
+                "parent_id": str(run["parent_id"]) if run["parent_id"] else None,
+                "kind": run["kind"],
+                "name": run["name"],
+                "start": round(run["start"], 6),
+                "wall_ms": round((now - run["t0"]) * 1000, 3),
+                "queue_ms": round(run["queue_ms"], 3),
+            }
+            for key in ("step", "model"):
+                if run.get(key) is not None:
+                    record[key] = run[key]
+            record.update(extra)
+            if error is not None:
+                record["error"] = f"{type(error).__name__}: {error}"
+            self.records.append(record)
+            self._pending.append(record)
+            if run["parent_id"] is None:
+                self._drop_trace(run_id)
+                self._flush()
+
+    def _drop_trace(self, trace_id: UUID) -> None:
+        # a cancelled hedge or timed out call may never get its end callback
+        for run_id in [run_id for run_id, run in self._runs.items() if run["trace_id"] == trace_id]:
+            del self._runs[run_id]
+
+        def root(run_id):
+            while self._parents.get(run_id) is not None:
+                run_id = self._parents[run_id]
+            return run_id
+
+        for run_id in [run_id for run_id in self._parents if root(run_id) == trace_id]:
+            del self._parents[run_id]
+
+    def _flush(self) -> None:
+        if self.path is not None and self._pending:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in self._pending)
+        self._pending = []
+
+    # graph and nodes
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        metadata = metadata or {}
+        if parent_run_id is None:
+            self._start("graph", name, run_id, None)
+        elif name == metadata.get("langgraph_node"):
+            self._start("node", name, run_id, parent_run_id, step=metadata.get("langgraph_step"))
+        else:
+            with self._lock:
+                self._parents[run_id] = parent_run_id
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        # GraphInterrupt and ParentCommand are control flow, not failures
+        self._end(run_id, None if type(error).__name__ in ("GraphInterrupt", "ParentCommand") else error)
+
+    # model calls
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name")
+        name = kwargs.get("name") or model or (serialized or {}).get("id", ["model"])[-1]
+        self._start("model", name, run_id, parent_run_id, model=model)
+
+    on_llm_start = on_chat_model_start
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage: Dict[str, int] = defaultdict(int)
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                for key, value in (getattr(message, "usage_metadata", None) or {}).items():
+                    if key in ("input_tokens", "output_tokens", "total_tokens"):
+                        usage[key] += value
+        self._end(run_id, **usage)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # tool calls, MCP tools included
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start("tool", kwargs.get("name") or (serialized or {}).get("name", "tool"), run_id, parent_run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+_recorders: Dict[str, TraceRecorder] = {}
+
+
+def trace_config(config: Optional[Dict[str, Any]] = None, path: Optional[str] = None) -> Dict[str, Any]:
+    """The config with a TraceRecorder added if tracing is on (AGENT_TRACE or `path`)"""
+    path = path or os.getenv(TRACE_ENV)
+    config = dict(config or {})
+    if not path:
+        return config
+    if path not in _recorders:
+        _recorders[path] = TraceRecorder(path)
+    callbacks = config.get("callbacks") or []
+    if not isinstance(callbacks, list):
+        # a callback manager: let it carry the recorder too
+        callbacks = callbacks.copy()
+        callbacks.add_handler(_recorders[path], inherit=True)
+        config["callbacks"] = callbacks
+    else:
+        config["callbacks"] = [*callbacks, _recorders[path]]
+    return config
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """The p-th percentile (0-100), interpolated between the closest values; 0.0 for no values"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    position = (len(values) - 1) * p / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _busy_ms(intervals: List[tuple]) -> float:
+    """Length of the union of (start, end) intervals: parallel runs count once"""
+    total, current_start, current_end = 0.0, None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total * 1000
+
+
+def flame(records: List[Dict[str, Any]], width: int = 30) -> str:
+    """
+    Time per call path (graph > node > model/tool), summed over all traces.
+
+    Runs of the same path that overlap, like parallel tool calls, are counted
+    once, so a child never takes more than its parent.
+    """
+    by_id = {r["span_id"]: r for r in records}
+    intervals: Dict[tuple, Dict[str, List[tuple]]] = defaultdict(lambda: defaultdict(list))
+    for record in records:
+        path = []
+        current: Optional[Dict[str, Any]] = record
+        while current is not None:
+            path.append(f"{current['kind']}:{current['name']}")
+            current = by_id.get(current["parent_id"])
+        intervals[tuple(reversed(path))][record["trace_id"]].append(
+            (record["start"], record["start"] + record["wall_ms"] / 1000)
+        )
+
+    busy = {path: sum(_busy_ms(runs) for runs in traces.values()) for path, traces in intervals.items()}
+    counts = {path: sum(len(runs) for runs in traces.values()) for path, traces in intervals.items()}
+    roots = sum(ms for path, ms in busy.items() if len(path) == 1) or 1.0
+    lines = []
+    for path in sorted(busy):
+        ms = busy[path]
+        bar = "#" * max(1, round(width * ms / roots))
+        label = f"{'  ' * (len(path) - 1)}{path[-1]}"
+        lines.append(f"{label:<44} {ms:10.1f} ms {counts[path]:5}x  {100 * ms / roots:5.1f}%  {bar}")
+    return "\n".join(lines)
+
+
+def percentiles(records: List[Dict[str, Any]]) -> str:
+    """Wall and queue time percentiles and tokens per kind and name"""
+    groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        groups[(record["kind"], record["name"])].append(record)
+
+    lines = [f"{'kind':<6} {'name':<28} {'n':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'queue p50':>10} {'tokens in/out':>15} {'errors':>6}"]
+    for (kind, name), group in sorted(groups.items(), key=lambda item: -sum(r["wall_ms"] for r in item[1])):
+        wall = [r["wall_ms"] for r in group]
+        queue = statistics.median(r["queue_ms"] for r in group)
+        tokens = f"{sum(r.get('input_tokens', 0) for r in group)}/{sum(r.get('output_tokens', 0) for r in group)}"
+        errors = sum("error" in r for r in group)
+        lines.append(
+            f"{kind:<6} {name[:28]:<28} {len(group):>5} {percentile(wall, 50):>9.1f} {percentile(wall, 90):>9.1f} "
+            f"{percentile(wall, 99):>9.1f} {max(wall):>9.1f} {queue:>10.2f} {tokens if kind == 'model' else '':>15} {errors:>6}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize an AGENT_TRACE file")
+    parser.add_argument("path", nargs="?", default=os.getenv(TRACE_ENV))
+    parser.add_argument("--kind", choices=["graph", "node", "model", "tool"], help="only this kind in the percentile table")
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error(f"give a trace file or set {TRACE_ENV}")
+
+    records = load_records(args.path)
+    traces = len({r["trace_id"] for r in records})
+    print(f"{len(records)} records in {traces} traces\n")
+    print(flame(records))
+    print()
+    print(percentiles([r for r in records if args.kind in (None, r["kind"])]))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
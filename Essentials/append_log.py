@@ -0,0 +1,141 @@
+import threading
+from collections.abc import Sequence
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Optional
+
+from langgraph.channels.delta import DeltaChannel
+
+# views of one buffer can be extended from several worker threads in the same step
+_extend_lock = threading.Lock()
+
+
+class AppendLog(Sequence):
+    """
+    Immutable list view used as the value of an append-only state key.
+
+    Logs share one growing buffer; a log is just (buffer, length). Extending
+    the newest log appends to the buffer in place, so it costs O(len(values))
+    and never copies what is already there. Older logs keep their length and
+    still see exactly the items they had. Extending an older log with
+    different values copies its prefix first (a fork of the history).
+
+    Reads behave like a list: len, indexing, slicing (returns a list),
+    iteration, == against lists, and the repr.
+    """
+
+    __slots__ = ("_items", "_len")
+
+    def __init__(self, items: Iterable[Any] = ()):
+        self._items = list(items)
+        self._len = len(self._items)
+
+    @classmethod
+    def _view(cls, items: list, length: int) -> "AppendLog":
+        log = cls.__new__(cls)
+        log._items = items
+        log._len = length
+        return log
+
+    @classmethod
+    def coerce(cls, value: Any) -> "AppendLog":
+        """A log for a value restored from a checkpoint or passed as input"""
+        if isinstance(value, AppendLog):
+            return value
+        if isinstance(value, dict) and set(value) == {"items"}:
+            # what the serializer returns when the type isn't allowed to be rebuilt
+            value = value["items"]
+        return cls(value or ())
+
+    def extend(self, values: Iterable[Any]) -> "AppendLog":
+        """Return a new log with `values` after this one's items"""
+        values = list(values)
+        if not values:
+            return self
+        with _extend_lock:
+            items, start = self._items, self._len
+            end = start + len(values)
+            if start == len(items):
+                items.extend(values)
+            elif not (len(items) >= end and all(a is b for a, b in zip(islice(items, start, end), values))):
+                # somebody else already appended here; unless it was these very
+                # values (a channel copy read ahead of the update) start a new buffer
+                items = items[:start]
+                items.extend(values)
+        return AppendLog._view(items, end)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._items[slice(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("AppendLog index out of range")
+        return self._items[index]
+
+    def __iter__(self):
+        return islice(self._items, self._len)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (AppendLog, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __add__(self, other: Iterable[Any]) -> "AppendLog":
+        return self.extend(other)
+
+    def __repr__(self) -> str:
+        return repr(self.to_list())
+
+    def __copy__(self) -> "AppendLog":
+        # immutable, channel copies can share it
+        return self
+
+    def __reduce__(self):
+        return AppendLog, (self.to_list(),)
+
+    def to_list(self) -> list:
+        return self._items[: self._len]
+
+    def _asdict(self) -> dict:
+        # checkpoint serializer hook, stored as AppendLog(items=[...])
+        return {"items": self.to_list()}
+
+
+def extend_log(log: Any, writes: Sequence[Iterable[Any]]) -> AppendLog:
+    """DeltaChannel reducer: append every write of the step, in order"""
+    return AppendLog.coerce(log).extend(chain.from_iterable(writes))
+
+
+class AppendLogChannel(DeltaChannel):
+    """
+    State channel for append-only lists.
+
+    Each step costs only the appended items, and checkpoints store the step's
+    writes instead of the whole list, with a full snapshot every
+    `snapshot_frequency` updates.
+
+    Snapshots are stored as AppendLog; langgraph logs a one-time warning when
+    it loads the type, pass allowed_msgpack_modules=[("append_log", "AppendLog")]
+    to the checkpointer's JsonPlusSerializer to silence it.
+    """
+
+    def __init__(
+        self,
+        reducer: Callable[[Any, Sequence[Any]], Any] = extend_log,
+        typ: Optional[type] = None,
+        *,
+        snapshot_frequency: int = 1000,
+    ):
+        super().__init__(reducer, typ, snapshot_frequency=snapshot_frequency)
+
+    def from_checkpoint(self, checkpoint: Any) -> "AppendLogChannel":
+        channel = super().from_checkpoint(checkpoint)
+        channel.value = AppendLog.coerce(channel.value)
+        return channel
+
+
+# drop-in for operator.add:  nlist: Annotated[List[str], append_log]
+append_log = AppendLogChannel()
@@ -0,0 +1,71 @@
+"""
+Cost of agent_trace: a 10-node graph run without tracing, with tracing
+switched off (AGENT_TRACE unset) and with tracing on.
+
+    python bench_agent_trace.py [runs]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Annotated, List, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from agent_trace import TRACE_ENV, trace_config
+from append_log import append_log
+
+
+class State(TypedDict):
+    nlist: Annotated[List[str], append_log]
+
+
+def chain_graph(nodes=10):
+    graph = StateGraph(State)
+    names = [f"n{i}" for i in range(nodes)]
+    for name in names:
+        graph.add_node(name, lambda state, name=name: {"nlist": [name]})
+    graph.add_edge(START, names[0])
+    for a, b in zip(names, names[1:]):
+        graph.add_edge(a, b)
+    graph.add_edge(names[-1], END)
+    return graph.compile()
+
+
+def main(runs=1000):
+    graph = chain_graph()
+    base_config = {"configurable": {"thread_id": "1"}}
+    tmp = tempfile.TemporaryDirectory()
+    trace_path = os.path.join(tmp.name, "trace.jsonl")
+
+    def tracing_off():
+        os.environ.pop(TRACE_ENV, None)
+        return trace_config(base_config)
+
+    def tracing_on():
+        os.environ[TRACE_ENV] = trace_path
+        return trace_config(base_config)
+
+    modes = {"no tracing": lambda: base_config, "tracing off": tracing_off, "tracing on": tracing_on}
+    samples = {name: [] for name in modes}
+    # round robin, so drift on a busy machine hits every mode the same
+    for i in range(runs + 20):
+        for name, make_config in modes.items():
+            config = make_config()
+            start = time.perf_counter()
+            graph.invoke({"nlist": []}, config)
+            if i >= 20:
+                samples[name].append((time.perf_counter() - start) * 1e6)
+    os.environ.pop(TRACE_ENV, None)
+    tmp.cleanup()
+
+    baseline = statistics.median(samples["no tracing"])
+    print(f"10-node graph, median of {runs} runs")
+    for name, values in samples.items():
+        us = statistics.median(values)
+        print(f"{name:>12}: {us:8.0f} us  ({100 * (us / baseline - 1):+5.1f}%)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,88 @@
+"""
+operator.add vs append_log on a looping StateGraph.
+
+    python bench_append_log.py [appends] [checkpointed_appends]
+
+Every super-step appends one item and a conditional edge loops back until the
+list is long enough, like the notebook loops.
+
+no saver : `appends` steps (default 100000), time per step at the start and the end
+sqlite   : `checkpointed_appends` steps (default 10000) with SqliteCheckpointer,
+           time and size of the database
+"""
+import operator
+import os
+import sys
+import tempfile
+import time
+from typing import Annotated, List, TypedDict
+
+from append_log import append_log
+from sqlite_checkpointer import SqliteCheckpointer
+
+from langgraph.graph import END, START, StateGraph
+
+REDUCERS = {"operator.add": operator.add, "append_log": append_log}
+
+
+def build_graph(reducer, appends, checkpointer=None, marks=None):
+    class State(TypedDict):
+        nlist: Annotated[List[str], reducer]
+
+    def node(state):
+        if marks is not None:
+            marks.append(time.perf_counter())
+        return {"nlist": ["A"]}
+
+    def loop(state):
+        return END if len(state["nlist"]) >= appends else "node"
+
+    graph = StateGraph(State)
+    graph.add_node("node", node)
+    graph.add_edge(START, "node")
+    graph.add_conditional_edges("node", loop)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def run(reducer, appends, checkpointer=None):
+    marks = []
+    app = build_graph(reducer, appends, checkpointer, marks)
+    config = {"configurable": {"thread_id": "bench"}, "recursion_limit": 2 * appends + 10}
+    start = time.perf_counter()
+    result = app.invoke({"nlist": []}, config)
+    assert len(result["nlist"]) == appends
+    return time.perf_counter() - start, marks
+
+
+def per_step_us(marks, first=True, window=1000):
+    window = min(window, len(marks) - 1)
+    span = marks[:window + 1] if first else marks[-window - 1:]
+    return (span[-1] - span[0]) / window * 1e6
+
+
+def main(appends, checkpointed):
+    print(f"no checkpointer, {appends} appends")
+    for name, reducer in REDUCERS.items():
+        seconds, marks = run(reducer, appends)
+        print(
+            f"  {name:<13} {seconds:7.1f} s   first 1k steps {per_step_us(marks):5.0f} us/step"
+            f"   last 1k steps {per_step_us(marks, first=False):5.0f} us/step"
+        )
+
+    print(f"SqliteCheckpointer, {checkpointed} appends")
+    for name, reducer in REDUCERS.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.sqlite3")
+            with SqliteCheckpointer(path) as saver:
+                seconds, marks = run(reducer, checkpointed, saver)
+                saver.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            size = os.path.getsize(path) / 2**20
+        print(
+            f"  {name:<13} {seconds:7.1f} s   last 1k steps {per_step_us(marks, first=False):5.0f} us/step"
+            f"   database {size:8.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [100_000, 10_000][len(args):]))
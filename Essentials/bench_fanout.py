@@ -0,0 +1,51 @@
+"""
+Super-step latency of the diamond graph as fan-out width and node latency grow.
+
+    python bench_fanout.py [widths...]      (default 2 8 32 64)
+
+For every node latency and execution mode (sync, async, thread offload), with
+and without a worker bound, prints the mean wall time of a super-step and of
+the widest (fan-out) step. Ideal is one node latency per step, whatever the width.
+Without a bound sync and thread nodes share the default pool (min(32, cpus + 4)
+threads), so wide steps run in waves.
+The last table runs one slow branch to show how NodeTimings points at it.
+"""
+import sys
+
+from diamond_graph import MODES, NodeTimings, branch_names, diamond_levels, run_diamond
+
+LATENCIES = (0.01, 0.05)
+# default pool, a tight bound, and one worker per branch
+WORKERS = (None, 4, 64)
+
+
+def measure(width, latency, mode, workers):
+    timings = NodeTimings()
+    _, seconds = run_diamond(width, latency, mode, workers, timings)
+    steps = timings.step_ms(diamond_levels(width))
+    return seconds * 1000 / len(steps), max(steps)
+
+
+def main(widths):
+    header = "".join(f"{f'w={w}':>16}" for w in widths)
+    for latency in LATENCIES:
+        print(f"\nnode latency {latency * 1000:.0f} ms   (mean super-step / fan-out step, ms)")
+        print(f"{'mode':<8}{'workers':>8}{header}")
+        for mode in MODES:
+            for workers in WORKERS:
+                cells = "".join(
+                    f"{'%.0f / %.0f' % measure(width, latency, mode, workers):>16}" for width in widths
+                )
+                print(f"{mode:<8}{workers or '-':>8}{cells}")
+
+    width = 8
+    slow = {"a": 0.01, "d": 0.01, **{n: 0.01 for pair in branch_names(width) for n in pair}}
+    slow["bb3"] = 0.2
+    timings = NodeTimings()
+    run_diamond(width, slow, "async", timings=timings)
+    print(f"\none slow node (bb3 = 200 ms, others 10 ms), width {width}, async")
+    print(timings.report(width))
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [2, 8, 32, 64])
@@ -0,0 +1,69 @@
+"""
+Per-turn latency and prompt size of a long thread, with and without HistoryCompaction.
+
+    python bench_history_compaction.py [turns]
+
+Offline: the chat model and the summarizer are fake, so the latency is what
+the agent, the checkpointer and the compaction cost by themselves; a real
+model adds time that grows with the prompt tokens shown.
+"""
+import statistics
+import sys
+import time
+
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import InMemorySaver
+
+from history_compaction import HistoryCompaction
+
+
+class FakeModel(GenericFakeChatModel):
+    """Replies with a couple of sentences and records how many tokens it was sent"""
+
+    prompt_tokens: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompt_tokens.append(count_tokens_approximately(messages))
+        answer = AIMessage(f"Here is what I think about {messages[-1].content}. " * 3)
+        return ChatResult(generations=[ChatGeneration(message=answer)])
+
+
+class FakeSummarizer(GenericFakeChatModel):
+    """Returns a summary of fixed length, like a model told to stay under N words"""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage("summary " * 150))])
+
+
+def run(turns, middleware):
+    model = FakeModel(messages=iter([]), prompt_tokens=[])
+    agent = create_agent(model=model, system_prompt="You are a helpful chef.", middleware=middleware, checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": "1"}}
+    latencies = []
+    question = HumanMessage("Remember: my name is hitman and my favourite colour is blue")
+    for turn in range(turns):
+        start = time.perf_counter()
+        agent.invoke({"messages": [question]}, config)
+        latencies.append((time.perf_counter() - start) * 1e3)
+        question = HumanMessage(f"What can I cook tonight with ingredient number {turn}?")
+    return latencies, model.prompt_tokens
+
+
+def main(turns=500):
+    compaction = HistoryCompaction(FakeSummarizer(messages=iter([])), max_tokens=4000)
+    windows = [(0, 10), (turns // 2 - 5, turns // 2 + 5), (turns - 10, turns)]
+    print(f"{turns}-turn thread, median per turn over turns " + ", ".join(f"{a + 1}-{b}" for a, b in windows))
+    for label, middleware in (("full history", []), ("compaction", [compaction])):
+        latencies, tokens = run(turns, middleware)
+        cells = "   ".join(
+            f"{statistics.median(latencies[a:b]):6.1f} ms {statistics.median(tokens[a:b]):7.0f} tok" for a, b in windows
+        )
+        print(f"{label:>12}: {cells}   total {sum(latencies) / 1e3:5.1f} s, {sum(tokens):,} prompt tokens")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
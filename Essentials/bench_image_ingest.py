@@ -0,0 +1,98 @@
+"""
+Encode time and memory of image ingestion on a batch of large PNGs.
+
+    python bench_image_ingest.py [images] [side]
+
+upload    : one image already in memory as a memoryview (what FileUpload gives),
+            the notebook's bytes() + b64encode + decode vs ImageIngestor.ingest,
+            for a new image and for one that was uploaded before
+directory : a batch of files, a quarter of them duplicates, read and encoded
+            one by one vs ImageIngestor.ingest_dir (sequential, in a process
+            pool, and again with every payload cached)
+
+Memory is the peak of Python allocations during the step, measured with
+tracemalloc; mapped file pages are page cache and not counted.
+"""
+import base64
+import random
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from pathlib import Path
+
+from image_ingest import ImageIngestor
+
+
+def noise_png(side, seed):
+    """An RGB PNG of random pixels, stored uncompressed so its size is ~3 bytes per pixel"""
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = 3 * side
+    pixels = bytearray(random.Random(seed).randbytes(side * (row + 1)))
+    pixels[:: row + 1] = bytes(side)
+    header = struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(pixels, 0)) + chunk(b"IEND", b"")
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+def naive_upload(content):
+    img_bytes = bytes(content)
+    img_b64 = base64.b64encode(img_bytes).decode("utf-8")
+    return f"data:image/png;base64,{img_b64}"
+
+
+def naive_dir(paths):
+    return [naive_upload(memoryview(Path(p).read_bytes())) for p in paths]
+
+
+def main(count=16, side=1400):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(count):
+            # every fourth file repeats the one before it
+            data = noise_png(side, i - 1 if i % 4 == 3 else i)
+            path = Path(tmp) / f"page{i:03}.png"
+            path.write_bytes(data)
+            paths.append(path)
+        size = paths[0].stat().st_size / 2**20
+        print(f"{count} PNGs of {side}x{side}, {size:.1f} MiB each\n")
+
+        content = memoryview(paths[0].read_bytes())
+        samples = {"naive": [], "ingest": [], "ingest, seen before": []}
+        seen = ImageIngestor()
+        seen.ingest(content)
+        for _ in range(5):
+            samples["naive"].append(measure(lambda: naive_upload(content))[1:])
+            samples["ingest"].append(measure(lambda: ImageIngestor().ingest(content).block)[1:])
+            samples["ingest, seen before"].append(measure(lambda: seen.ingest(content).block)[1:])
+        for label, runs in samples.items():
+            print(f"upload    {label:>18}: {1e3 * statistics.median(s for s, _ in runs):7.1f} ms  peak {statistics.median(m for _, m in runs):6.1f} MiB")
+        print()
+
+        _, seconds, peak = measure(lambda: naive_dir(paths))
+        print(f"directory {'naive':>18}: {1e3 * seconds:7.1f} ms  peak {peak:6.1f} MiB")
+        for workers in (1, 2):
+            images = ImageIngestor()
+            _, seconds, peak = measure(lambda: images.ingest_dir(tmp, workers=workers))
+            print(f"directory {f'ingest, {workers} worker(s)':>18}: {1e3 * seconds:7.1f} ms  peak {peak:6.1f} MiB  ({images.misses} encoded)")
+        _, seconds, peak = measure(lambda: images.ingest_dir(tmp, workers=1))
+        print(f"directory {'ingest, cached':>18}: {1e3 * seconds:7.1f} ms  peak {peak:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,98 @@
+"""
+Cold-start time of the repo's entry points, each in a fresh interpreter.
+
+    python bench_import_time.py [runs] [--save]
+
+Every entry point is loaded with `python -X importtime` (its __main__ block
+doesn't run), the table shows the median wall time and the top-level imports
+that cost the most. Dummy API keys are set, so constructors that check for
+them don't fail. With --save the medians are written to
+.cache/import_times.json and the next run shows the change against them.
+"""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_PATH = Path(__file__).resolve().parent / ".cache" / "import_times.json"
+
+# name: (script, code run after loading it with its globals as `ns`)
+ENTRY_POINTS = {
+    "chef: import": ("Agents/create_Agent/personal_chef_project/personal_chef_project.py", ""),
+    "chef: get_agent()": ("Agents/create_Agent/personal_chef_project/personal_chef_project.py", "ns['get_agent']()"),
+    "mcp agent (2_mcp)": ("Agents/Advanced_Agent/2_mcp.py", ""),
+    "mcp online (3_mcp_online)": ("Agents/Advanced_Agent/3_mcp_online.py", ""),
+    "travel agent": ("Agents/Advanced_Agent/Travel_agent/travelagent.py", ""),
+    "travel agent, html": ("Agents/Advanced_Agent/Travel_agent/travel_Agent_With_html.py", ""),
+    "mcp server 2.1": ("Agents/Advanced_Agent/Resources/2.1_mcp_server.py", ""),
+    "mcp server": ("Agents/Advanced_Agent/Resources/mcp_server.py", ""),
+}
+
+LOADER = """
+import runpy, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {dir!r})
+ns = runpy.run_path({path!r}, run_name="startup_bench")
+{after}
+print(time.perf_counter() - start)
+"""
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def top_imports(stderr: str, n: int = 3):
+    """The n top-level packages with the largest cumulative import time, in ms"""
+    totals = defaultdict(int)
+    started = False
+    for self_us, cumulative_us, indent, name in _IMPORT_LINE.findall(stderr):
+        # everything before runpy is the interpreter's own startup
+        started = started or name == "runpy"
+        # a top-level import is printed with a single space of indentation
+        if started and len(indent) == 1 and name != "runpy":
+            totals[name.split(".")[0]] += int(cumulative_us)
+    return sorted(((ms / 1000, name) for name, ms in totals.items()), reverse=True)[:n]
+
+
+def run_once(script: str, after: str):
+    path = ROOT / script
+    env = {**os.environ, "GOOGLE_API_KEY": "bench", "TAVILY_API_KEY": "bench", "SEARCH_CACHE_PATH": ""}
+    code = LOADER.format(dir=str(path.parent), path=str(path), after=after)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=path.parent, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1]
+    return float(proc.stdout.strip().splitlines()[-1]) * 1000, top_imports(proc.stderr)
+
+
+def main(runs: int = 3, save: bool = False):
+    previous = json.loads(RESULTS_PATH.read_text()) if RESULTS_PATH.exists() else {}
+    results = {}
+    print(f"{'entry point':<28} {'median ms':>10} {'change':>8}  heaviest imports")
+    for name, (script, after) in ENTRY_POINTS.items():
+        samples, top = [], None
+        for _ in range(runs):
+            ms, top = run_once(script, after)
+            if ms is None:
+                break
+            samples.append(ms)
+        if not samples:
+            print(f"{name:<28} {'failed':>10} {'':>8}  {top}")
+            continue
+        results[name] = statistics.median(samples)
+        change = f"{100 * (results[name] / previous[name] - 1):+.0f}%" if name in previous else ""
+        heaviest = ", ".join(f"{module} {ms:.0f}" for ms, module in top)
+        print(f"{name:<28} {results[name]:>10.0f} {change:>8}  {heaviest}")
+    if save:
+        RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        RESULTS_PATH.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(int(args[0]) if args else 3, save="--save" in sys.argv)
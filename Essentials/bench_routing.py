@@ -0,0 +1,135 @@
+"""
+Router overhead: if/elif chain vs RoutingTable vs MemoRouter.
+
+    python bench_routing.py [calls] [graph_steps]
+
+calls       : each router called directly on notebook-shaped states (default 3M)
+graph_steps : a looping graph routed by each router, router share of a step (default 20000)
+
+"wide" routes 20 commands, the if/elif chain grows with every route while the
+table stays one lookup. "slow" is a router that normalizes and regex-matches
+the input before it decides, the case MemoRouter is for.
+"""
+import random
+import re
+import sys
+import time
+from typing import Annotated, List, TypedDict
+
+from append_log import append_log
+from routing import MemoRouter, RoutingTable
+
+from langgraph.graph import END, START, StateGraph
+
+INPUTS = ["b", "c", "q", "B ", "x"]
+WIDE = [f"cmd{i}" for i in range(20)]
+PATTERNS = [(re.compile(r"^\s*b\s*$", re.I), "b"), (re.compile(r"^\s*c\s*$", re.I), "c")]
+
+
+def conditional_edge(state):
+    # the notebook router
+    select = state["nlist"][-1]
+    if select == "b":
+        return "b"
+    elif select == "c":
+        return "c"
+    elif select == "q":
+        return END
+    else:
+        return END
+
+
+def slow_router(state):
+    text = " ".join(state["nlist"][-1].split()).lower()
+    for pattern, target in PATTERNS:
+        if pattern.match(text):
+            return target
+    return END
+
+
+def chain_router(commands):
+    """The if/elif chain over `commands`, as it would be written by hand"""
+    lines = ["def route(state):", "    select = state['nlist'][-1]"]
+    for i, command in enumerate(commands):
+        lines.append(f"    {'if' if i == 0 else 'elif'} select == {command!r}:")
+        lines.append(f"        return {command!r}")
+    lines.append("    return END")
+    namespace = {"END": END}
+    exec("\n".join(lines), namespace)
+    return namespace["route"]
+
+
+def routers():
+    return {
+        "if/elif": conditional_edge,
+        "RoutingTable": RoutingTable({"b": "b", "c": "c", "q": END}, field="nlist", index=-1).route,
+        "slow": slow_router,
+        "MemoRouter(slow)": MemoRouter(slow_router, lambda state: state["nlist"][-1]).route,
+    }
+
+
+def wide_routers():
+    return {
+        "if/elif (wide)": chain_router(WIDE),
+        "RoutingTable (wide)": RoutingTable({c: c for c in WIDE}, field="nlist", index=-1).route,
+    }
+
+
+def call_overhead(calls):
+    print(f"{calls:,} direct calls")
+    time_calls(routers(), INPUTS, calls)
+    time_calls(wide_routers(), WIDE + ["x"], calls)
+
+
+def time_calls(routers, inputs, calls):
+    rng = random.Random(0)
+    states = [{"nlist": ["Initial String : "] * rng.randint(1, 50) + [rng.choice(inputs)]} for _ in range(1000)]
+    for name, router in routers.items():
+        start = time.perf_counter()
+        for _ in range(calls // len(states)):
+            for state in states:
+                router(state)
+        ns = (time.perf_counter() - start) / calls * 1e9
+        print(f"  {name:<20} {ns:7.0f} ns/call")
+
+
+class State(TypedDict):
+    nlist: Annotated[List[str], append_log]
+
+
+def graph_overhead(steps):
+    print(f"looping graph, {steps:,} routing decisions")
+    rng = random.Random(1)
+    script = [rng.choice(["b", "c"]) for _ in range(steps)]
+    for name, router in routers().items():
+        spent = [0.0]
+
+        def route(state, router=router):
+            if len(state["nlist"]) > steps:
+                return END
+            start = time.perf_counter()
+            target = router({"nlist": [script[len(state["nlist"]) - 1]]})
+            spent[0] += time.perf_counter() - start
+            return target
+
+        graph = StateGraph(State)
+        graph.add_node("a", lambda state: None)
+        graph.add_node("b", lambda state: {"nlist": ["B"]})
+        graph.add_node("c", lambda state: {"nlist": ["C"]})
+        graph.add_edge(START, "a")
+        graph.add_conditional_edges("a", route, ["b", "c", END])
+        graph.add_edge("b", "a")
+        graph.add_edge("c", "a")
+        app = graph.compile()
+
+        start = time.perf_counter()
+        app.invoke({"nlist": ["b"]}, {"recursion_limit": 2 * steps + 10})
+        total = time.perf_counter() - start
+        print(f"  {name:<20} {total:6.1f} s   router {spent[0] * 1000:7.1f} ms ({spent[0] / total:.2%} of the run)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    calls, steps = args + [3_000_000, 20_000][len(args):]
+    call_overhead(calls)
+    graph_overhead(steps)
@@ -0,0 +1,78 @@
+"""
+Backend calls and wall time of concurrent searches with and without SingleFlight.
+
+    python bench_single_flight.py [calls] [distinct] [latency_ms]
+
+`calls` searches over `distinct` queries are started at once against a fake
+search backend that takes `latency_ms` and allows 8 requests at a time, the
+way a rate-limited API does. sync: a pool of threads, as ToolNode runs the
+chef's web_search; async: tasks on one loop, as the MCP server runs search_web.
+"""
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from single_flight import SingleFlight
+
+
+class Backend:
+    def __init__(self, latency, limit=8):
+        self.latency = latency
+        self.calls = 0
+        self._slots = threading.Semaphore(limit)
+
+    def search(self, query):
+        with self._slots:
+            self.calls += 1
+            time.sleep(self.latency)
+            return {"query": query}
+
+
+def run_sync(queries, latency, flight):
+    backend = Backend(latency)
+    search = flight.wrap(backend.search) if flight else backend.search
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        list(pool.map(search, queries))
+    return backend.calls, time.perf_counter() - start
+
+
+def run_async(queries, latency, flight):
+    backend = Backend(latency)
+
+    async def search(query):
+        return await asyncio.to_thread(backend.search, query)
+
+    if flight:
+        search = flight.wrap(search)
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*map(search, queries))
+        return time.perf_counter() - start
+
+    # the default executor has few threads, size it like the sync pool
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=len(queries)))
+    try:
+        seconds = loop.run_until_complete(main())
+        return backend.calls, seconds
+    finally:
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+
+def main(calls=300, distinct=10, latency_ms=100):
+    queries = [f"recipes with ingredient {i % distinct}" for i in range(calls)]
+    print(f"{calls} concurrent searches, {distinct} distinct, {latency_ms} ms each, 8 at a time\n")
+    for mode, run in (("sync", run_sync), ("async", run_async)):
+        for label, flight in (("direct", None), ("single-flight", SingleFlight())):
+            backend_calls, seconds = run(queries, latency_ms / 1000, flight)
+            ratio = f"dedupe {flight.stats()['dedupe_ratio']:.1%}" if flight else ""
+            print(f"{mode:<6} {label:<14} {backend_calls:5} backend calls  {1000 * seconds:8.1f} ms  {ratio}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -0,0 +1,29 @@
+"""Fakes shared by the tests in this directory"""
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+class FakeModel(GenericFakeChatModel):
+    """Answers from a list and counts the calls that reached it"""
+
+    calls: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(messages[-1].content)
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+
+@pytest.fixture()
+def fake_model():
+    """fake_model(*answers, cache=None): a FakeModel giving the answers in order, strings become AIMessages"""
+
+    def make(*answers, cache=None):
+        messages = [AIMessage(a) if isinstance(a, str) else a for a in answers]
+        return FakeModel(messages=iter(messages), cache=cache, calls=[])
+
+    return make
@@ -0,0 +1,215 @@
+"""
+The fan-out graph from edges.ipynb as a module, with slow nodes.
+
+    a → (b, c) → (bb, cc) → d
+
+`width` sets the number of parallel branches (2 is the notebook graph),
+`latency` how long every node waits on its fake I/O call, either one number
+or a {node: seconds} dict, and `mode` how the wait is done:
+
+sync   : time.sleep in a plain function, langgraph runs siblings in its thread pool
+async  : asyncio.sleep in a coroutine
+thread : the blocking call from an async node, offloaded to a thread pool
+
+`workers` bounds how many sibling branches run at the same time. Every node
+call is recorded in a NodeTimings, so a slow branch shows up in the report.
+
+    python diamond_graph.py --width 8 --latency 0.05 --mode async --workers 4
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Dict, List, Optional, TypedDict, Union
+
+from append_log import append_log
+from langgraph.graph import END, START, StateGraph
+
+MODES = ("sync", "async", "thread")
+
+
+class State(TypedDict):
+    nlist: Annotated[List[str], append_log]
+
+
+def branch_names(width: int) -> List[tuple]:
+    """(first, second) node of every branch, the notebook names for width 2"""
+    if width == 2:
+        return [("b", "bb"), ("c", "cc")]
+    return [(f"b{i}", f"bb{i}") for i in range(1, width + 1)]
+
+
+def diamond_levels(width: int) -> List[List[str]]:
+    """Nodes of every super-step, in order"""
+    branches = branch_names(width)
+    return [["a"], [b for b, _ in branches], [bb for _, bb in branches], ["d"]]
+
+
+class NodeTimings:
+    """Start/end of every node call, thread safe"""
+
+    def __init__(self):
+        self.records: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def record(self, node: str, start: float, end: float) -> None:
+        with self._lock:
+            self.records.append((node, start, end))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+    def by_node(self) -> Dict[str, Dict[str, float]]:
+        nodes: Dict[str, List[float]] = {}
+        for node, start, end in self.records:
+            nodes.setdefault(node, []).append((end - start) * 1000)
+        return {
+            node: {"calls": len(ms), "mean_ms": sum(ms) / len(ms), "max_ms": max(ms)}
+            for node, ms in nodes.items()
+        }
+
+    def step_ms(self, levels: List[List[str]]) -> List[float]:
+        """Wall time of every super-step: first start to last end of its nodes"""
+        walls = []
+        for level in levels:
+            spans = [(start, end) for node, start, end in self.records if node in level]
+            walls.append((max(e for _, e in spans) - min(s for s, _ in spans)) * 1000 if spans else 0.0)
+        return walls
+
+    def branch_ms(self, branches: List[tuple]) -> Dict[str, float]:
+        """Time spent in the nodes of every branch, the slowest one bounds the graph"""
+        totals: Dict[str, float] = {}
+        for node, start, end in self.records:
+            totals[node] = totals.get(node, 0.0) + (end - start) * 1000
+        return {branch[0]: sum(totals.get(node, 0.0) for node in branch) for branch in branches}
+
+    def report(self, width: int) -> str:
+        lines = [f"{'node':<8} {'calls':>5} {'mean ms':>9} {'max ms':>9}"]
+        for node, stats in self.by_node().items():
+            lines.append(f"{node:<8} {stats['calls']:>5} {stats['mean_ms']:9.1f} {stats['max_ms']:9.1f}")
+        steps = self.step_ms(diamond_levels(width))
+        lines.append("super-steps ms  " + "  ".join(f"{ms:.1f}" for ms in steps))
+        branches = self.branch_ms(branch_names(width))
+        slowest = max(branches, key=branches.get)
+        lines.append(f"slowest branch  {slowest} ({branches[slowest]:.1f} ms)")
+        return "\n".join(lines)
+
+
+def make_node(
+    name: str,
+    latency: float,
+    mode: str,
+    timings: Optional[NodeTimings] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+):
+    update = {"nlist": [name.upper()]}
+
+    def call():
+        # stands in for a blocking I/O call (HTTP request, database query...)
+        time.sleep(latency)
+        return update
+
+    def done(start):
+        if timings is not None:
+            timings.record(name, start, time.perf_counter())
+
+    if mode == "sync":
+        def node(state: State) -> State:
+            start = time.perf_counter()
+            call()
+            done(start)
+            return update
+    elif mode == "async":
+        async def node(state: State) -> State:
+            start = time.perf_counter()
+            await asyncio.sleep(latency)
+            done(start)
+            return update
+    elif mode == "thread":
+        async def node(state: State) -> State:
+            start = time.perf_counter()
+            await asyncio.get_running_loop().run_in_executor(executor, call)
+            done(start)
+            return update
+    else:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    node.__name__ = f"node_{name}"
+    return node
+
+
+def build_diamond(
+    width: int = 2,
+    latency: Union[float, Dict[str, float]] = 0.0,
+    mode: str = "sync",
+    timings: Optional[NodeTimings] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+):
+    def delay(name):
+        return latency.get(name, 0.0) if isinstance(latency, dict) else latency
+
+    builder = StateGraph(State)
+    for level in diamond_levels(width):
+        for name in level:
+            builder.add_node(name, make_node(name, delay(name), mode, timings, executor))
+
+    builder.add_edge(START, "a")
+    for b, bb in branch_names(width):
+        builder.add_edge("a", b)
+        builder.add_edge(b, bb)
+        builder.add_edge(bb, "d")
+    builder.add_edge("d", END)
+    return builder.compile()
+
+
+def run_diamond(
+    width: int = 2,
+    latency: Union[float, Dict[str, float]] = 0.0,
+    mode: str = "sync",
+    workers: Optional[int] = None,
+    timings: Optional[NodeTimings] = None,
+):
+    """
+    Build and run the graph once, returns (state, seconds).
+
+    workers bounds the sibling branches running at once (langgraph's
+    max_concurrency); in thread mode the blocking calls also get a pool of
+    that size instead of the event loop's default one.
+    """
+    config = {"max_concurrency": workers} if workers else {}
+    state = {"nlist": ["Initial String : "]}
+
+    if mode == "sync":
+        graph = build_diamond(width, latency, mode, timings)
+        start = time.perf_counter()
+        result = graph.invoke(state, config)
+        return result, time.perf_counter() - start
+
+    async def main():
+        executor = ThreadPoolExecutor(workers, thread_name_prefix="diamond") if mode == "thread" and workers else None
+        try:
+            graph = build_diamond(width, latency, mode, timings, executor)
+            start = time.perf_counter()
+            result = await graph.ainvoke(state, config)
+            return result, time.perf_counter() - start
+        finally:
+            if executor:
+                executor.shutdown()
+
+    return asyncio.run(main())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--width", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--mode", choices=MODES, default="sync")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    timings = NodeTimings()
+    result, seconds = run_diamond(args.width, args.latency, args.mode, args.workers, timings)
+    print(result["nlist"])
+    print(f"{seconds * 1000:.1f} ms")
+    print(timings.report(args.width))
@@ -0,0 +1,163 @@
+"""
+Keeps a checkpointed conversation under a token budget, for create_agent.
+
+    compaction = HistoryCompaction(summarizer=model, max_tokens=4000)
+    agent = create_agent(model=model, middleware=[compaction], checkpointer=SqliteCheckpointer(...))
+
+Before a model call, if the thread's messages take more than `max_tokens`,
+the oldest turns are folded into a running summary until `keep_tokens` are
+left. Only the turns dropped now are sent to the summarizer, together with the
+summary so far, and the folded messages are removed from the thread. The
+summary is a state key, so it is stored in the checkpoint with the messages.
+
+Human messages that start with "remember" or "important" (or carry
+additional_kwargs={"pin": True}) are pinned: their text is kept verbatim and
+given to the model on every turn, also long after the message was folded.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain.agents.middleware import AgentMiddleware, AgentState
+from langchain_core.messages import AnyMessage, HumanMessage, RemoveMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately, get_buffer_string
+from langchain_core.runnables import Runnable
+from typing_extensions import NotRequired
+
+DEFAULT_MAX_TOKENS = 4000
+MAX_PINNED = 20
+PIN_PATTERN = re.compile(r"^\s*(remember|important|don'?t forget)\b", re.IGNORECASE)
+
+SUMMARY_PROMPT = """Update the running summary of a conversation with the new messages below.
+Keep names, preferences, facts, decisions and open questions; drop greetings and small talk.
+Answer with the updated summary only, in at most {words} words.
+
+Summary so far:
+{summary}
+
+New messages:
+{messages}"""
+
+
+class CompactionState(AgentState):
+    summary: NotRequired[str]
+    pinned: NotRequired[List[str]]
+
+
+def _text(message: AnyMessage) -> str:
+    return message.content if isinstance(message.content, str) else message.text
+
+
+def is_pinned(message: AnyMessage) -> bool:
+    return isinstance(message, HumanMessage) and bool(
+        message.additional_kwargs.get("pin") or PIN_PATTERN.match(_text(message))
+    )
+
+
+class HistoryCompaction(AgentMiddleware):
+    """
+    Sliding window under a token budget, an incremental summary of what left
+    the window and pinned user facts.
+
+    `summarizer` is a chat model, or a function (summary so far, dropped
+    messages) -> new summary. `count_tokens` counts a list of messages.
+    """
+
+    state_schema = CompactionState
+
+    def __init__(
+        self,
+        summarizer,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        keep_tokens: Optional[int] = None,
+        summary_words: int = 200,
+        count_tokens: Callable[[List[AnyMessage]], int] = count_tokens_approximately,
+    ):
+        super().__init__()
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        # compact down to half the budget, so it happens every few turns and not on each one
+        self.keep_tokens = keep_tokens if keep_tokens is not None else max_tokens // 2
+        self.summary_words = summary_words
+        self.count_tokens = count_tokens
+
+    def _prompt(self, summary: str, messages: List[AnyMessage]) -> str:
+        return SUMMARY_PROMPT.format(
+            words=self.summary_words, summary=summary or "(none yet)", messages=get_buffer_string(messages)
+        )
+
+    def _plan(self, state: Dict[str, Any]):
+        """(messages to fold, pinned list if it changed)"""
+        messages = state["messages"]
+        pinned = list(state.get("pinned") or [])
+        new_pins = [_text(m) for m in messages if is_pinned(m) and _text(m) not in pinned]
+        if new_pins:
+            pinned = (pinned + list(dict.fromkeys(new_pins)))[-MAX_PINNED:]
+
+        counts = [self.count_tokens([m]) for m in messages]
+        if sum(counts) <= self.max_tokens:
+            return [], pinned if new_pins else None
+
+        # newest messages first until keep_tokens, then forward to the start of a turn,
+        # so an AI tool call is never separated from its tool results
+        cut, kept = len(messages), 0
+        while cut > 0 and kept + counts[cut - 1] <= self.keep_tokens:
+            cut -= 1
+            kept += counts[cut]
+        while cut < len(messages) and not isinstance(messages[cut], HumanMessage):
+            cut += 1
+        # the current question always stays
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        cut = min(cut, last_human)
+        return messages[:cut], pinned if new_pins else None
+
+    def _update(self, folded: List[AnyMessage], summary: Optional[str], pinned: Optional[List[str]]):
+        update: Dict[str, Any] = {}
+        if folded:
+            update["messages"] = [RemoveMessage(id=m.id) for m in folded]
+            update["summary"] = summary
+        if pinned is not None:
+            update["pinned"] = pinned
+        return update or None
+
+    def before_model(self, state, runtime):
+        folded, pinned = self._plan(state)
+        summary = None
+        if folded:
+            previous = state.get("summary", "")
+            if isinstance(self.summarizer, Runnable):
+                summary = self.summarizer.invoke(self._prompt(previous, folded)).text
+            else:
+                summary = self.summarizer(previous, folded)
+        return self._update(folded, summary, pinned)
+
+    async def abefore_model(self, state, runtime):
+        folded, pinned = self._plan(state)
+        summary = None
+        if folded:
+            previous = state.get("summary", "")
+            if isinstance(self.summarizer, Runnable):
+                summary = (await self.summarizer.ainvoke(self._prompt(previous, folded))).text
+            else:
+                summary = self.summarizer(previous, folded)
+        return self._update(folded, summary, pinned)
+
+    def _with_context(self, request):
+        state = request.state or {}
+        parts = []
+        if state.get("pinned"):
+            parts.append("The user asked you to remember:\n" + "\n".join(f"- {fact}" for fact in state["pinned"]))
+        if state.get("summary"):
+            parts.append(f"Summary of the earlier conversation:\n{state['summary']}")
+        if not parts:
+            return request
+        context = "\n\n".join(parts)
+        system = request.system_message
+        if system is not None:
+            context = f"{system.text}\n\n{context}"
+        return request.override(system_message=SystemMessage(context))
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._with_context(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._with_context(request))
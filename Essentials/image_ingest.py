@@ -0,0 +1,330 @@
+"""
+Images for multimodal messages, hashed and encoded straight from their buffer.
+
+    images = ImageIngestor(cache_dir=".cache/images")
+    block = images.ingest(uploader.value[0]["content"]).block   # the FileUpload memoryview
+    question = HumanMessage(content=[{"type": "text", "text": "Tell me about this paper"}, block])
+
+    payloads = images.ingest_dir("scans/", "*.png", workers=4)
+
+A memoryview or a memory-mapped file is hashed and base64-encoded as it is,
+without first copying it into bytes. Payloads are cached by content hash
+(in memory, and on disk with `cache_dir`), so an image that was seen before,
+under any name, is never encoded again.
+
+Images larger than the model's bound (`max_side` pixels, `max_bytes`) are
+downscaled and recompressed with Pillow when it is installed; without it an
+image over `max_bytes` is rejected and one over `max_side` is sent as it is.
+
+The image block's id is derived from the hash, DedupeImages uses it to send
+an image that appears several times in a thread only once.
+"""
+import base64
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from langchain.agents.middleware import AgentMiddleware
+
+# Gemini scales larger images down itself and takes at most ~7 MB of inline image data
+MAX_SIDE = 3072
+MAX_BYTES = 7 * 2**20
+CACHE_BYTES = 256 * 2**20
+JPEG_QUALITY = 85
+
+Source = Union[bytes, bytearray, memoryview, str, Path]
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class ImagePayload:
+    sha256: str
+    mime_type: str
+    width: Optional[int]
+    height: Optional[int]
+    # size of the (possibly recompressed) image, before base64
+    size: int
+    base64: str
+    resized: bool = False
+
+    @property
+    def id(self) -> str:
+        return f"img-{self.sha256[:16]}"
+
+    @property
+    def block(self) -> Dict[str, Any]:
+        """A standard LangChain image content block"""
+        return {"type": "image", "id": self.id, "base64": self.base64, "mime_type": self.mime_type}
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.base64}"
+
+
+def _sniff(head: bytes) -> Tuple[str, Optional[int], Optional[int]]:
+    """(mime type, width, height) from the first bytes of an image"""
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and len(head) >= 24:
+        return "image/png", int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+    if head.startswith(b"GIF8") and len(head) >= 10:
+        return "image/gif", int.from_bytes(head[6:8], "little"), int.from_bytes(head[8:10], "little")
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg", None, None
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", None, None
+    raise ValueError("not a PNG, JPEG, GIF or WebP image")
+
+
+def _jpeg_size(data: memoryview) -> Tuple[Optional[int], Optional[int]]:
+    # walk the segments up to the first start-of-frame marker
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None, None
+        marker = data[i + 1]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return int.from_bytes(data[i + 7 : i + 9], "big"), int.from_bytes(data[i + 5 : i + 7], "big")
+        i += 2 + int.from_bytes(data[i + 2 : i + 4], "big")
+    return None, None
+
+
+@contextmanager
+def _buffer(source: Source) -> Iterator[memoryview]:
+    """A read-only byte view of the source: the memoryview itself or a mapped file"""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"{source} is empty")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+    else:
+        view = memoryview(source)
+        yield view if view.format == "B" and view.ndim == 1 else view.cast("B")
+
+
+def _shrink(data: memoryview, mime_type: str, max_side: int, max_bytes: int):
+    """Downscaled and/or recompressed image bytes and their (mime type, width, height)"""
+    try:
+        from PIL import Image
+    except ImportError:
+        if len(data) > max_bytes:
+            raise ImageTooLarge(f"image is {len(data)} bytes, over {max_bytes}; install pillow to downscale it")
+        print("pillow is not installed, sending the image at full size", file=sys.stderr)
+        return None
+
+    import io
+
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail((max_side, max_side))
+    out = io.BytesIO()
+    if mime_type == "image/png":
+        image.save(out, "PNG", optimize=True)
+    if not out.tell() or out.tell() > max_bytes:
+        out = io.BytesIO()
+        image.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        mime_type = "image/jpeg"
+    if out.tell() > max_bytes:
+        raise ImageTooLarge(f"image is still {out.tell()} bytes after downscaling to {image.size}")
+    return out.getbuffer(), mime_type, image.width, image.height
+
+
+def encode(data: memoryview, digest: str, max_side: int = MAX_SIDE, max_bytes: int = MAX_BYTES) -> ImagePayload:
+    mime_type, width, height = _sniff(data[:32].tobytes())
+    if mime_type == "image/jpeg":
+        width, height = _jpeg_size(data)
+    too_big = len(data) > max_bytes or (width or 0) > max_side or (height or 0) > max_side
+    shrunk = _shrink(data, mime_type, max_side, max_bytes) if too_big else None
+    if shrunk is not None:
+        data, mime_type, width, height = shrunk
+    return ImagePayload(
+        sha256=digest,
+        mime_type=mime_type,
+        width=width,
+        height=height,
+        size=len(data),
+        # b64encode reads the view directly, the encoded string is the only new buffer
+        base64=base64.b64encode(data).decode("ascii"),
+        resized=shrunk is not None,
+    )
+
+
+def _hash_file(path: Path) -> str:
+    with _buffer(path) as data:
+        return hashlib.sha256(data).hexdigest()
+
+
+def _encode_file(path: Path, digest: str, max_side: int, max_bytes: int) -> ImagePayload:
+    with _buffer(path) as data:
+        return encode(data, digest, max_side, max_bytes)
+
+
+class ImageIngestor:
+    """
+    Content-addressed cache of encoded images.
+
+    The in-memory cache keeps up to `cache_bytes` of base64 text, least
+    recently used first out; `cache_dir` keeps every payload on disk.
+    """
+
+    def __init__(
+        self,
+        max_side: int = MAX_SIDE,
+        max_bytes: int = MAX_BYTES,
+        cache_dir: Optional[str] = None,
+        cache_bytes: int = CACHE_BYTES,
+    ):
+        self.max_side = max_side
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_bytes = cache_bytes
+        self._cache: "OrderedDict[str, ImagePayload]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, digest: str) -> str:
+        # the same image under another bound is another payload
+        return f"{digest}-{self.max_side}-{self.max_bytes}"
+
+    def _get(self, key: str) -> Optional[ImagePayload]:
+        with self._lock:
+            payload = self._cache.get(key)
+            if payload is not None:
+                self._cache.move_to_end(key)
+                return payload
+        if self.cache_dir is not None:
+            path = self.cache_dir / f"{key}.json"
+            if path.exists():
+                payload = ImagePayload(**json.loads(path.read_text(encoding="utf-8")))
+                self._remember(key, payload)
+                return payload
+        return None
+
+    def _remember(self, key: str, payload: ImagePayload) -> None:
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = payload
+            self._cached_bytes += len(payload.base64)
+            while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+                _, old = self._cache.popitem(last=False)
+                self._cached_bytes -= len(old.base64)
+
+    def _store(self, key: str, payload: ImagePayload) -> None:
+        self._remember(key, payload)
+        if self.cache_dir is not None:
+            tmp = self.cache_dir / f"{key}.json.tmp"
+            tmp.write_text(json.dumps(asdict(payload)), encoding="utf-8")
+            os.replace(tmp, self.cache_dir / f"{key}.json")
+
+    def ingest(self, source: Source) -> ImagePayload:
+        """The payload of an image given as bytes, a memoryview or a file path"""
+        with _buffer(source) as data:
+            digest = hashlib.sha256(data).hexdigest()
+            key = self._key(digest)
+            payload = self._get(key)
+            if payload is not None:
+                self.hits += 1
+                return payload
+            self.misses += 1
+            payload = encode(data, digest, self.max_side, self.max_bytes)
+        self._store(key, payload)
+        return payload
+
+    def ingest_many(self, paths: Sequence[Union[str, Path]], workers: Optional[int] = None) -> List[ImagePayload]:
+        """
+        Payloads of many image files, in order. Files are hashed first, so
+        every distinct image is encoded once, in a pool of `workers` processes
+        (1 encodes in this process).
+        """
+        paths = [Path(p) for p in paths]
+        if not paths:
+            return []
+        workers = workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(workers) if workers > 1 else None
+        mapper = pool.map if pool is not None else map
+        try:
+            digests = list(mapper(_hash_file, paths))
+            todo: Dict[str, Path] = {}
+            for path, digest in zip(paths, digests):
+                if digest not in todo and self._get(self._key(digest)) is None:
+                    todo[digest] = path
+            self.hits += len(paths) - len(todo)
+            self.misses += len(todo)
+            encoded = mapper(_encode_file, todo.values(), todo.keys(), repeat(self.max_side), repeat(self.max_bytes))
+            for payload in encoded:
+                self._store(self._key(payload.sha256), payload)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        # read back from the cache, one payload object per distinct image
+        return [self._get(self._key(digest)) or self.ingest(path) for path, digest in zip(paths, digests)]
+
+    def ingest_dir(self, directory: Union[str, Path], pattern: str = "*.png", workers: Optional[int] = None) -> List[ImagePayload]:
+        return self.ingest_many(sorted(Path(directory).glob(pattern)), workers)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached": len(self._cache),
+            "cached_bytes": self._cached_bytes,
+        }
+
+
+def dedupe_images(messages: List[Any]) -> List[Any]:
+    """The messages with every image but the last copy of each (by block id) replaced by a note"""
+    last: Dict[str, Tuple[int, int]] = {}
+    for i, message in enumerate(messages):
+        for j, block in enumerate(message.content if isinstance(message.content, list) else []):
+            if isinstance(block, dict) and block.get("type") == "image" and block.get("id"):
+                last[block["id"]] = (i, j)
+
+    def repeated(block, i, j):
+        return isinstance(block, dict) and block.get("id") in last and last[block["id"]] != (i, j)
+
+    out = []
+    for i, message in enumerate(messages):
+        blocks = message.content if isinstance(message.content, list) else []
+        if not any(repeated(block, i, j) for j, block in enumerate(blocks)):
+            out.append(message)
+            continue
+        content = [
+            {"type": "text", "text": f"[image {block['id']}, attached again later in the conversation]"}
+            if repeated(block, i, j)
+            else block
+            for j, block in enumerate(blocks)
+        ]
+        out.append(message.model_copy(update={"content": content}))
+    return out
+
+
+class DedupeImages(AgentMiddleware):
+    """create_agent middleware: an image that appears several times in the thread is sent once"""
+
+    def wrap_model_call(self, request, handler):
+        return handler(request.override(messages=dedupe_images(request.messages)))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(request.override(messages=dedupe_images(request.messages)))
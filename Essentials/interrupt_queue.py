@@ -0,0 +1,263 @@
+"""
+Human-in-the-loop without blocking on input().
+
+Threads that hit interrupt() are parked in a SQLite queue. Whoever answers
+them (a UI, a reviewer script, another agent) lists or claims the pending
+ones and resumes them in bulk, possibly from another process and long after
+the run that paused them.
+
+    queue = InterruptQueue(".cache/interrupts.sqlite3")
+    service = ResumeService(graph, queue)          # graph compiled with a checkpointer
+    await service.start("user-1", {"nlist": ["x"]})
+    items = await service.claim("reviewer")
+    await service.resume_many([(item, "continue") for item in items])
+
+Resuming reads the thread's latest checkpoint by primary key and continues
+from its pending writes; earlier steps don't run again.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langgraph.types import Command
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interrupts (
+    interrupt_id TEXT PRIMARY KEY,
+    thread_id TEXT NOT NULL,
+    value TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created REAL NOT NULL,
+    claimed_by TEXT,
+    claimed_until REAL,
+    finished REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS interrupts_by_status ON interrupts (status, created);
+CREATE INDEX IF NOT EXISTS interrupts_by_thread ON interrupts (thread_id, status);
+"""
+
+COLUMNS = "interrupt_id, thread_id, value, status, created, claimed_by"
+
+
+@dataclass(slots=True)
+class PendingInterrupt:
+    interrupt_id: str
+    thread_id: str
+    value: Any
+    status: str
+    created: float
+    claimed_by: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row) -> "PendingInterrupt":
+        interrupt_id, thread_id, value, status, created, claimed_by = row
+        return cls(interrupt_id, thread_id, json.loads(value), status, created, claimed_by)
+
+
+class InterruptQueue:
+    """
+    Persistent queue of interrupts waiting for an answer.
+
+    pending -> claimed (leased to one worker) -> resumed | failed. A claim that
+    isn't resumed within its lease goes back to the other workers.
+    """
+
+    def __init__(self, path: str = "interrupts.sqlite3", clock=time.time):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def put(self, thread_id: str, interrupts: Iterable[Any]) -> int:
+        """Queue the interrupts of a paused run (result["__interrupt__"])"""
+        now = self.clock()
+        rows = [(i.id, thread_id, json.dumps(i.value, default=str), now) for i in interrupts]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO interrupts (interrupt_id, thread_id, value, created) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def pending(self, limit: int = 100, thread_id: Optional[str] = None) -> List[PendingInterrupt]:
+        """Oldest interrupts nobody holds a claim on"""
+        query = f"SELECT {COLUMNS} FROM interrupts WHERE (status = 'pending' OR (status = 'claimed' AND claimed_until < ?))"
+        params: list = [self.clock()]
+        if thread_id is not None:
+            query += " AND thread_id = ?"
+            params.append(thread_id)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY created LIMIT ?", (*params, limit)).fetchall()
+        return [PendingInterrupt.from_row(row) for row in rows]
+
+    def claim(self, worker: str, limit: int = 100, lease: float = 300) -> List[PendingInterrupt]:
+        """Take up to `limit` pending interrupts for `worker`, oldest first"""
+        now = self.clock()
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "UPDATE interrupts SET status = 'claimed', claimed_by = ?, claimed_until = ? "
+                "WHERE interrupt_id IN ("
+                "  SELECT interrupt_id FROM interrupts"
+                "  WHERE status = 'pending' OR (status = 'claimed' AND claimed_until < ?)"
+                "  ORDER BY created LIMIT ?"
+                f") RETURNING {COLUMNS}",
+                (worker, now + lease, now, limit),
+            ).fetchall()
+        return sorted((PendingInterrupt.from_row(row) for row in rows), key=lambda item: item.created)
+
+    def renew(self, worker: str, interrupt_ids: Iterable[str], lease: float = 300) -> List[str]:
+        """Extend `worker`'s claims that haven't run out by `lease` seconds. Returns the ids it still holds"""
+        ids = list(interrupt_ids)
+        now = self.clock()
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "UPDATE interrupts SET claimed_until = ? "
+                f"WHERE interrupt_id IN ({', '.join('?' * len(ids))}) "
+                "AND status = 'claimed' AND claimed_by = ? AND claimed_until > ? RETURNING interrupt_id",
+                (now + lease, *ids, worker, now),
+            ).fetchall()
+        return [interrupt_id for (interrupt_id,) in rows]
+
+    def release(self, worker: str, interrupt_ids: Iterable[str]) -> int:
+        """Hand `worker`'s claims back to the queue unanswered"""
+        ids = list(interrupt_ids)
+        with self.lock, self.conn:
+            return self.conn.execute(
+                "UPDATE interrupts SET status = 'pending', claimed_by = NULL, claimed_until = NULL "
+                f"WHERE interrupt_id IN ({', '.join('?' * len(ids))}) AND status = 'claimed' AND claimed_by = ?",
+                (*ids, worker),
+            ).rowcount
+
+    def finish(self, worker: str, interrupt_ids: Iterable[str], error: Optional[str] = None) -> List[str]:
+        """Mark `worker`'s claims done; ones it lost to another worker are left alone and returned"""
+        ids = list(interrupt_ids)
+        status = "failed" if error else "resumed"
+        now = self.clock()
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "UPDATE interrupts SET status = ?, finished = ?, error = ? "
+                f"WHERE interrupt_id IN ({', '.join('?' * len(ids))}) "
+                "AND status = 'claimed' AND claimed_by = ? RETURNING interrupt_id",
+                (status, now, error, *ids, worker),
+            ).fetchall()
+        done = {interrupt_id for (interrupt_id,) in rows}
+        return [interrupt_id for interrupt_id in ids if interrupt_id not in done]
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM interrupts GROUP BY status").fetchall())
+
+
+class ClaimLost(Exception):
+    """A thread wasn't resumed: some of its claims ran out and another worker took them"""
+
+    def __init__(self, interrupt_ids: List[str]):
+        super().__init__(f"claims lost before resuming: {', '.join(interrupt_ids)}")
+        self.interrupt_ids = interrupt_ids
+
+
+class ResumeService:
+    """
+    Async front end: runs threads, queues what they interrupt on, resumes in bulk.
+
+    At most `concurrency` threads are resumed at the same time. Interrupts of
+    the same thread are answered together in one Command, as langgraph expects.
+    Right before a thread is resumed its claims are renewed for `lease` seconds;
+    a thread with a claim that already went to another worker is left to that
+    worker. Claims lost while a thread was running are collected in `lost`.
+    """
+
+    def __init__(self, graph, queue: InterruptQueue, concurrency: int = 64, lease: float = 300):
+        self.graph = graph
+        self.queue = queue
+        self.concurrency = concurrency
+        self.lease = lease
+        self.lost: List[str] = []
+
+    @staticmethod
+    def config(thread_id: str) -> dict:
+        return {"configurable": {"thread_id": thread_id}}
+
+    # the queue's sqlite calls run in a thread, a commit can wait on another process's lock
+
+    async def _park(self, thread_id: str, result: Any) -> Any:
+        if isinstance(result, dict) and result.get("__interrupt__"):
+            await asyncio.to_thread(self.queue.put, thread_id, result["__interrupt__"])
+        return result
+
+    async def start(self, thread_id: str, graph_input: Any) -> Any:
+        """Run a thread; if it pauses, its interrupts are queued"""
+        return await self._park(thread_id, await self.graph.ainvoke(graph_input, self.config(thread_id)))
+
+    async def list(self, limit: int = 100, thread_id: Optional[str] = None) -> List[PendingInterrupt]:
+        return await asyncio.to_thread(self.queue.pending, limit, thread_id)
+
+    async def claim(self, worker: str, limit: int = 100, lease: float = 300) -> List[PendingInterrupt]:
+        return await asyncio.to_thread(self.queue.claim, worker, limit, lease)
+
+    async def finish(self, worker: str, interrupt_ids: Iterable[str], error: Optional[str] = None) -> List[str]:
+        return await asyncio.to_thread(self.queue.finish, worker, list(interrupt_ids), error)
+
+    async def _renew(self, by_worker: Dict[str, List[str]]) -> List[str]:
+        held = []
+        for worker, ids in by_worker.items():
+            held += await asyncio.to_thread(self.queue.renew, worker, ids, self.lease)
+        return held
+
+    async def _finish_all(self, by_worker: Dict[str, List[str]], error: Optional[str] = None) -> None:
+        for worker, ids in by_worker.items():
+            self.lost += await self.finish(worker, ids, error)
+
+    async def _resume_thread(self, thread_id: str, answers: List[Tuple[PendingInterrupt, Any]], semaphore) -> Any:
+        # each claim is finished by the worker that holds it
+        by_worker: Dict[str, List[str]] = defaultdict(list)
+        for item, _ in answers:
+            by_worker[item.claimed_by].append(item.interrupt_id)
+        async with semaphore:
+            # a lease can run out while the thread waits for a slot: renew it in the same
+            # statement that checks it is still ours, and resume nothing another worker took
+            held = set(await self._renew(by_worker))
+            if len(held) < len(answers):
+                for worker, ids in by_worker.items():
+                    await asyncio.to_thread(self.queue.release, worker, ids)
+                return ClaimLost([item.interrupt_id for item, _ in answers if item.interrupt_id not in held])
+            try:
+                result = await self.graph.ainvoke(
+                    Command(resume={item.interrupt_id: answer for item, answer in answers}),
+                    self.config(thread_id),
+                )
+            except Exception as e:
+                await self._finish_all(by_worker, error=f"{type(e).__name__}: {e}")
+                return e
+        await self._finish_all(by_worker)
+        # a resumed thread can pause again
+        return await self._park(thread_id, result)
+
+    async def resume(self, item: PendingInterrupt, answer: Any) -> Any:
+        return (await self.resume_many([(item, answer)]))[item.thread_id]
+
+    async def resume_many(self, answers: Iterable[Tuple[PendingInterrupt, Any]]) -> Dict[str, Any]:
+        """Answer claimed interrupts, returns {thread_id: final state or the exception (ClaimLost if skipped)}"""
+        by_thread: Dict[str, list] = defaultdict(list)
+        for item, answer in answers:
+            by_thread[item.thread_id].append((item, answer))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._resume_thread(thread_id, items, semaphore) for thread_id, items in by_thread.items())
+        )
+        return dict(zip(by_thread, results))
@@ -0,0 +1,219 @@
+"""
+Response cache for chat models, plugged in through the model's `cache=`.
+
+    cache = ResponseCache(".cache/responses.sqlite3", ttl=24 * 3600)
+    model = ChatGoogleGenerativeAI(model="gemini-2.5-flash", cache=cache)
+    agent = create_agent(model=model, tools=tools, system_prompt=system_prompt)
+
+LangChain builds the lookup from the whole request: the model and its
+parameters, the tools bound by create_agent, the system prompt and the full
+message history. Equal requests are answered from the cache.
+
+With `embeddings` the cache also answers a new question that is close enough
+(cosine >= threshold) to a cached one asked in the same context, i.e. with the
+same model, tools, system prompt and history before it. Only the last human
+message is compared; follow-up calls after tool results must match exactly.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_SIZE = 1000
+DEFAULT_THRESHOLD = 0.95
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    context TEXT NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL,
+    generations TEXT NOT NULL,
+    vector BLOB
+);
+CREATE INDEX IF NOT EXISTS responses_by_context ON responses (context);
+CREATE INDEX IF NOT EXISTS responses_by_use ON responses (used);
+"""
+
+
+def _digest(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return " ".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+
+
+def split_prompt(prompt: str, llm_string: str):
+    """(context key, last human question or None) of a serialized request"""
+    messages = json.loads(prompt)
+    last = messages[-1] if messages else {}
+    if isinstance(last, dict) and last.get("id", [""])[-1] in ("HumanMessage", "HumanMessageChunk"):
+        return _digest(llm_string, json.dumps(messages[:-1], sort_keys=True)), _text(last["kwargs"].get("content", ""))
+    return _digest(llm_string, prompt), None
+
+
+class ResponseCache(BaseCache):
+    """
+    Exact (and optionally semantic) cache of model responses in SQLite.
+
+    Entries expire `ttl` seconds after they were stored; beyond `max_size` the
+    least recently used are evicted. Without a `path` the cache lives in memory.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = DEFAULT_TTL,
+        max_size: int = DEFAULT_MAX_SIZE,
+        embeddings=None,
+        threshold: float = DEFAULT_THRESHOLD,
+        clock=time.time,
+    ):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.clock = clock
+        self.conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        # the question embedded on a miss is embedded again by update(), keep it
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _embed(self, text: str) -> np.ndarray:
+        with self.lock:
+            vector = self._vectors.get(text)
+        if vector is None:
+            # embedding may call an API, only the memo is touched under the lock
+            vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+            vector /= np.linalg.norm(vector) or 1.0
+            with self.lock:
+                self._vectors[text] = vector
+                while len(self._vectors) > 64:
+                    self._vectors.popitem(last=False)
+        return vector
+
+    @staticmethod
+    def _load(generations: str):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return loads(generations, allowed_objects=[ChatGeneration, Generation, AIMessage])
+
+    def _similar(self, context: str, vector: np.ndarray, now: float) -> Optional[str]:
+        rows = self.conn.execute(
+            "SELECT key, vector FROM responses WHERE context = ? AND vector IS NOT NULL AND created > ?",
+            (context, now - self.ttl),
+        ).fetchall()
+        if not rows:
+            return None
+        scores = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), -1) @ vector
+        best = int(np.argmax(scores))
+        return rows[best][0] if scores[best] >= self.threshold else None
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT generations FROM responses WHERE key = ? AND created > ?", (key, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        now = self.clock()
+        with self.lock:
+            found = self._get(_digest(llm_string, prompt), now)
+        if found is None and self.embeddings is not None:
+            context, question = split_prompt(prompt, llm_string)
+            if question:
+                # embedding may call an API, don't hold the lock for it
+                vector = self._embed(question)
+                with self.lock:
+                    similar = self._similar(context, vector, now)
+                    found = self._get(similar, now) if similar else None
+                    if found is not None:
+                        self.semantic_hits += 1
+        with self.lock:
+            if found is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._load(found)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = _digest(llm_string, prompt)
+        context, question = split_prompt(prompt, llm_string)
+        vector = self._embed(question).tobytes() if question and self.embeddings is not None else None
+        # a replayed answer gets a new id, the cached one could already be in the thread
+        generations = [
+            gen.model_copy(update={"message": gen.message.model_copy(update={"id": None})})
+            if isinstance(gen, ChatGeneration)
+            else gen
+            for gen in return_val
+        ]
+        now = self.clock()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, context, created, used, generations, vector) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, context, now, now, dumps(generations), vector),
+            )
+            self.conn.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,))
+            excess = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_size
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY used LIMIT ?)", (excess,)
+                )
+                self.evictions += excess
+
+    def clear(self, **kwargs: Any) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            hits, semantic_hits, misses, evictions = self.hits, self.semantic_hits, self.misses, self.evictions
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "semantic_hits": semantic_hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size": size,
+            "max_size": self.max_size,
+            "evictions": evictions,
+            "ttl": self.ttl,
+            "semantic": self.embeddings is not None,
+        }
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
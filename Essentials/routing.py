@@ -0,0 +1,142 @@
+"""
+Declarative routers for conditional edges and Command nodes.
+
+    routes = RoutingTable({"b": "b", "c": "c", "q": END}, field="nlist", index=-1)
+    routes.add_to(builder, "a")         # add_conditional_edges("a", routes.route, routes.path_map)
+    builder.add_node("a", node_a, destinations=routes.targets)    # Command nodes: goto=routes(state)
+
+The targets are handed to langgraph as the path map / node destinations, so a
+table pointing at a node that doesn't exist fails in builder.compile().
+"""
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from langgraph.graph import END
+
+Field = Union[str, Callable[[Any], Hashable]]
+
+
+class RoutingTable:
+    """
+    Route on one state value with a dict lookup instead of an if/elif chain.
+
+    field/index pick the value (state[field] or state[field][index]); values
+    that aren't in `routes` go to `default`. With default=None the table
+    returns None for them and the caller (a Command node) decides; None is not
+    a target. `hits` counts how often every target was chosen.
+    """
+
+    def __init__(
+        self,
+        routes: Dict[Hashable, str],
+        field: str,
+        *,
+        index: Optional[int] = None,
+        default: Optional[str] = END,
+    ):
+        self.routes = dict(routes)
+        self.field = field
+        self.index = index
+        self.default = default
+        self.targets: Tuple[str, ...] = tuple(
+            dict.fromkeys(target for target in [*self.routes.values(), default] if target is not None)
+        )
+        self.hits: Dict[Optional[str], int] = dict.fromkeys([*self.targets, default], 0)
+        self.route = self._compile()
+
+    def _compile(self) -> Callable[[Any], Optional[str]]:
+        # everything the call needs is bound to locals once, a call is
+        # two subscripts, a dict lookup and the counter
+        lookup, hits, field, index, default = self.routes.get, self.hits, self.field, self.index, self.default
+
+        if index is None:
+            def route(state):
+                target = lookup(state[field], default)
+                hits[target] += 1
+                return target
+        else:
+            def route(state):
+                target = lookup(state[field][index], default)
+                hits[target] += 1
+                return target
+        return route
+
+    def __call__(self, state: Any) -> Optional[str]:
+        return self.route(state)
+
+    @property
+    def path_map(self) -> Dict[str, str]:
+        return {target: target for target in self.targets}
+
+    def add_to(self, builder, source: str) -> None:
+        """Add the conditional edges from `source`, with the targets as the path map"""
+        builder.add_conditional_edges(source, self.route, self.path_map)
+
+    def stats(self) -> Dict[Optional[str], int]:
+        return dict(self.hits)
+
+
+class MemoRouter:
+    """
+    Cache the decisions of a router that only depends on a few state values.
+
+    Every field is a state key or a function of the state returning something
+    hashable; the router only runs for a combination it hasn't seen, the
+    `maxsize` most recent ones are kept.
+    """
+
+    def __init__(self, router: Callable[[Any], str], *fields: Field, maxsize: int = 1024):
+        if not fields:
+            raise ValueError("MemoRouter needs at least one field to key the cache on")
+        self.router = router
+        self.maxsize = maxsize
+        self.hits: Dict[str, int] = {}
+        self.counts = {"hits": 0, "misses": 0}
+        self._cache: "OrderedDict[Hashable, str]" = OrderedDict()
+        getters = [itemgetter(f) if isinstance(f, str) else f for f in fields]
+        self._key = getters[0] if len(getters) == 1 else (lambda state: tuple(g(state) for g in getters))
+        self.route = self._compile()
+
+    def _compile(self) -> Callable[[Any], str]:
+        cache, counts, hits, key_of, router, maxsize = (
+            self._cache, self.counts, self.hits, self._key, self.router, self.maxsize
+        )
+
+        def route(state):
+            key = key_of(state)
+            target = cache.get(key)
+            if target is None:
+                counts["misses"] += 1
+                target = cache[key] = router(state)
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            else:
+                counts["hits"] += 1
+                cache.move_to_end(key)
+            hits[target] = hits.get(target, 0) + 1
+            return target
+
+        return route
+
+    def __call__(self, state: Any) -> str:
+        return self.route(state)
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.counts["hits"] + self.counts["misses"]
+        return {
+            "routes": dict(self.hits),
+            "cache_hits": self.counts["hits"],
+            "cache_misses": self.counts["misses"],
+            "hit_rate": self.counts["hits"] / calls if calls else 0.0,
+            "size": len(self._cache),
+        }
+
+
+def memoize_router(*fields: Field, maxsize: int = 1024):
+    """Decorator form of MemoRouter"""
+
+    def wrap(router):
+        return MemoRouter(router, *fields, maxsize=maxsize)
+
+    return wrap
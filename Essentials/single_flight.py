@@ -0,0 +1,149 @@
+"""
+Single-flight calls: concurrent calls with the same arguments share one execution.
+
+    search_flight = SingleFlight(key=normalize_query)
+
+    @mcp.tool()
+    @search_flight.wrap
+    async def search_web(query: str) -> Dict[str, Any]:
+        ...
+
+The first call runs the function; calls with an equal key that arrive while
+it runs wait for it and all get its result, or its exception. Nothing is kept
+once it returns, caching stays with the caller (SearchCache, ResponseCache).
+
+Sync functions are shared between threads (ToolNode runs sync tools in a
+thread pool), async ones between tasks of an event loop. An async call runs
+in its own task, so a caller that is cancelled doesn't cancel it for the
+others. `wrap` keeps the signature, @tool and @mcp.tool() build the same
+schema from the wrapper.
+
+The key is built from the arguments bound to the signature, defaults
+applied, with whitespace in strings collapsed; pass `key` (called with the
+same arguments) to normalize further.
+"""
+import functools
+import inspect
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def default_key(fn: Callable, args: tuple, kwargs: dict) -> str:
+    """The arguments as bound to fn's signature, strings with their whitespace collapsed"""
+    bound = inspect.signature(fn).bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = {
+        name: " ".join(value.split()) if isinstance(value, str) else value
+        for name, value in bound.arguments.items()
+    }
+    return json.dumps(arguments, sort_keys=True, default=repr)
+
+
+@dataclass(slots=True)
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls of the functions it wraps, with counters of how much it saved"""
+
+    def __init__(self, key: Optional[Callable[..., Hashable]] = None):
+        self.key = key
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._tasks: Dict[Hashable, "asyncio.Task"] = {}
+        self.calls = 0
+        self.runs = 0
+        self.shared = 0
+        self.errors = 0
+
+    def _key(self, fn: Callable, args: tuple, kwargs: dict) -> Hashable:
+        # the function is part of the key, one SingleFlight can serve several
+        arguments = self.key(*args, **kwargs) if self.key else default_key(fn, args, kwargs)
+        return fn.__module__, fn.__qualname__, arguments
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """fn(*args, **kwargs), or the result of the equal call already running in another thread"""
+        key = self._key(fn, args, kwargs)
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.runs += 1
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                flight.result = fn(*args, **kwargs)
+            except BaseException as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                    self.errors += flight.error is not None
+                flight.done.set()
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    async def acall(self, fn: Callable, *args, **kwargs) -> Any:
+        """await fn(*args, **kwargs), or the result of the equal call already running on this loop"""
+        # imported here, the chef's sync tool shouldn't pay for asyncio on import
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        key = (loop, self._key(fn, args, kwargs))
+        with self._lock:
+            self.calls += 1
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = loop.create_task(fn(*args, **kwargs))
+                task.add_done_callback(functools.partial(self._finish, key))
+                self.runs += 1
+            else:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Task") -> None:
+        # reading the exception here also keeps a call whose callers were all cancelled from logging it
+        with self._lock:
+            self._tasks.pop(key, None)
+            self.errors += task.cancelled() or task.exception() is not None
+
+    def wrap(self, fn: Callable) -> Callable:
+        """Decorator: calls of fn go through this SingleFlight, sync or async like fn"""
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                return await self.acall(fn, *args, **kwargs)
+
+        else:
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return self.call(fn, *args, **kwargs)
+
+        wrapper.single_flight = self
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "runs": self.runs,
+            "shared": self.shared,
+            "errors": self.errors,
+            "in_flight": len(self._flights) + len(self._tasks),
+            # share of the calls that didn't run the function themselves
+            "dedupe_ratio": self.shared / self.calls if self.calls else 0.0,
+        }
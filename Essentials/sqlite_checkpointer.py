@@ -0,0 +1,497 @@
+import asyncio
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    DeltaChannelHistory,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    checkpoint_type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+INSERT_WRITE = "INSERT OR {} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    File-backed checkpointer, a drop-in replacement for InMemorySaver.
+
+    * The database runs in WAL mode, so readers don't wait for the writer.
+    * Task writes of a super-step are buffered and committed together with the
+      checkpoint that ends the step (interrupts and errors are written at once).
+    * Tables are keyed (thread_id, checkpoint_ns, checkpoint_id), so the latest
+      checkpoint of a thread is one B-tree lookup, however long the history is.
+    * With `keep_last` only the newest checkpoints of every thread are kept;
+      older ones and blobs nobody references any more are removed every
+      `compact_every` checkpoints. Checkpoints that DeltaChannel state such as
+      append_log is rebuilt from (back to its last snapshot) are kept too.
+    """
+
+    def __init__(
+        self,
+        path: str = "checkpoints.sqlite3",
+        *,
+        keep_last: Optional[int] = None,
+        compact_every: int = 50,
+        batch_writes: bool = True,
+        max_buffered_writes: int = 1000,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.keep_last = keep_last
+        self.compact_every = compact_every
+        self.batch_writes = batch_writes
+        self.max_buffered_writes = max_buffered_writes
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.RLock()
+        self._buffered: List[Tuple[str, tuple]] = []
+        self._puts_since_compaction: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def __enter__(self) -> "SqliteCheckpointer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "SqliteCheckpointer":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self.lock:
+            self.flush()
+            self.conn.close()
+
+    def flush(self) -> None:
+        """Commit the buffered task writes"""
+        with self.lock:
+            if self._buffered:
+                with self.conn:
+                    self._write_buffered()
+
+    def _write_buffered(self) -> None:
+        for conflict, row in self._buffered:
+            self.conn.execute(INSERT_WRITE.format(conflict), row)
+        self._buffered.clear()
+
+    # reads
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            row = self.conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row and row[0] != "empty":
+                values[channel] = self.serde.loads_typed(row)
+        return values
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple[str, str, Any]]:
+        rows = self.conn.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        rows.sort(key=lambda r: writes_sort_key(r[5], r[0], r[1]))
+        return [(task_id, channel, self.serde.loads_typed((type_, value))) for task_id, _, channel, type_, value, _ in rows]
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row, metadata=None) -> CheckpointTuple:
+        checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, metadata_b = row
+        checkpoint_ = self.serde.loads_typed((checkpoint_type, checkpoint))
+
+        def ref(cid):
+            return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": cid}}
+
+        return CheckpointTuple(
+            config=ref(checkpoint_id),
+            checkpoint={
+                **checkpoint_,
+                "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint_["channel_versions"]),
+            },
+            metadata=metadata if metadata is not None else self.serde.loads_typed((metadata_type, metadata_b)),
+            parent_config=ref(parent_id) if parent_id else None,
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata"
+        with self.lock:
+            self.flush()
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                # newest checkpoint: a reverse scan of the primary key index, stops after one row
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata FROM checkpoints"
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_id)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+        # a metadata filter is applied to the decoded rows, then the cursor is read only as far as needed
+        if limit is not None and not filter:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self.lock:
+            self.flush()
+            tuples = []
+            for thread_id, checkpoint_ns, *row in self.conn.execute(query, params):
+                if limit is not None and len(tuples) >= limit:
+                    break
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                tuples.append(self._tuple(thread_id, checkpoint_ns, row, metadata))
+        yield from tuples
+
+    def get_delta_channel_history(
+        self, *, config: RunnableConfig, channels: Sequence[str]
+    ) -> Mapping[str, DeltaChannelHistory]:
+        """
+        Writes to `channels` on the path to the checkpoint, back to the nearest
+        ancestor with a stored value (the seed), for DeltaChannel state such as
+        append_log. Only parent ids, versions and the writes of those channels
+        are read, every query is a primary key lookup.
+        """
+        if not channels:
+            return {}
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = (thread_id, checkpoint_ns)
+        marks = ", ".join("?" * len(channels))
+        collected: Dict[str, list] = {channel: [] for channel in channels}
+        seeds: Dict[str, Any] = {}
+        remaining = set(channels)
+
+        with self.lock:
+            self.flush()
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    "SELECT parent_checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (*key, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT parent_checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    key,
+                ).fetchone()
+            current = row[0] if row else None
+
+            # the target's own writes are its pending writes, the walk starts at its parent
+            while current and remaining:
+                row = self.conn.execute(
+                    "SELECT parent_checkpoint_id, checkpoint_type, checkpoint FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (*key, current),
+                ).fetchone()
+                if row is None:
+                    break
+                parent, checkpoint_type, checkpoint = row
+                versions = self.serde.loads_typed((checkpoint_type, checkpoint))["channel_versions"]
+                found = {
+                    channel: value
+                    for channel in remaining
+                    if channel in versions
+                    for value in self._load_blobs(thread_id, checkpoint_ns, {channel: versions[channel]}).values()
+                }
+                writes = self.conn.execute(
+                    "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+                    f"WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? AND channel IN ({marks})",
+                    (*key, current, *channels),
+                ).fetchall()
+                writes.sort(key=lambda r: writes_sort_key(r[5], r[0], r[1]))
+                for task_id, _, channel, type_, value, _ in reversed(writes):
+                    if channel in remaining:
+                        collected[channel].append((task_id, channel, self.serde.loads_typed((type_, value))))
+                for channel, value in found.items():
+                    seeds[channel] = value
+                    remaining.discard(channel)
+                current = parent
+
+        history: Dict[str, DeltaChannelHistory] = {}
+        for channel in channels:
+            history[channel] = {"writes": collected[channel][::-1]}
+            if channel in seeds:
+                history[channel]["seed"] = seeds[channel]
+        return history
+
+    # writes
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        c = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values: Dict[str, Any] = c.pop("channel_values")
+        blob_rows = [
+            (thread_id, checkpoint_ns, channel, str(version),
+             *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)))
+            for channel, version in new_versions.items()
+        ]
+        checkpoint_row = (
+            thread_id,
+            checkpoint_ns,
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            *self.serde.dumps_typed(c),
+            *self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+        )
+        with self.lock:
+            # the buffered task writes, the blobs and the checkpoint go out in one transaction
+            with self.conn:
+                self._write_buffered()
+                self.conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blob_rows)
+                self.conn.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)", checkpoint_row)
+            if self.keep_last:
+                key = (thread_id, checkpoint_ns)
+                self._puts_since_compaction[key] += 1
+                if self._puts_since_compaction[key] >= self.compact_every:
+                    self._compact(thread_id, checkpoint_ns, self.keep_last)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        special = False
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            special = special or channel in WRITES_IDX_MAP
+            # regular writes keep the first value, special ones (interrupt, error, ...) the last
+            conflict = "REPLACE" if write_idx < 0 else "IGNORE"
+            rows.append((conflict, (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx, channel,
+                                    *self.serde.dumps_typed(value), task_path)))
+        with self.lock:
+            self._buffered.extend(rows)
+            if not self.batch_writes or special or len(self._buffered) >= self.max_buffered_writes:
+                self.flush()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock:
+            self.flush()
+            with self.conn:
+                for table in ("checkpoints", "blobs", "writes"):
+                    self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    # retention
+
+    def _compact(self, thread_id: str, checkpoint_ns: str, keep: int) -> None:
+        self._puts_since_compaction[(thread_id, checkpoint_ns)] = 0
+        kept = self.conn.execute(
+            "SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT ?",
+            (thread_id, checkpoint_ns, keep),
+        ).fetchall()
+        if not kept:
+            return
+        # DeltaChannel values (append_log) are rebuilt from the writes since their
+        # last snapshot, so the ancestors back to that snapshot stay as well
+        *_, parent, _, _, metadata_type, metadata = kept[-1]
+        counters = self.serde.loads_typed((metadata_type, metadata)).get("counters_since_delta_snapshot") or {}
+        for _ in range(max((steps for _, steps in counters.values()), default=-1) + 1):
+            row = parent and self.conn.execute(
+                "SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, NULL, NULL "
+                "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, parent),
+            ).fetchone()
+            if not row:
+                break
+            kept.append(row)
+            parent = row[1]
+        oldest = kept[-1][0]
+        referenced = {
+            (channel, str(version))
+            for _, _, type_, data, *_ in kept
+            for channel, version in self.serde.loads_typed((type_, data))["channel_versions"].items()
+        }
+        stale_blobs = [
+            (thread_id, checkpoint_ns, channel, version)
+            for channel, version in self.conn.execute(
+                "SELECT channel, version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            )
+            if (channel, version) not in referenced
+        ]
+        with self.conn:
+            for table in ("checkpoints", "writes"):
+                self.conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                    (thread_id, checkpoint_ns, oldest),
+                )
+            self.conn.executemany(
+                "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                stale_blobs,
+            )
+
+    def compact(self, keep_last: Optional[int] = None, vacuum: bool = False) -> None:
+        """Apply the retention policy to every thread now (optionally VACUUM the file)"""
+        keep = keep_last or self.keep_last or 1
+        with self.lock:
+            self.flush()
+            threads = self.conn.execute("SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints").fetchall()
+            for thread_id, checkpoint_ns in threads:
+                self._compact(thread_id, checkpoint_ns, keep)
+            if vacuum:
+                self.conn.execute("VACUUM")
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        with self.lock:
+            self.flush()
+            for thread_id in thread_ids:
+                if strategy == "delete":
+                    self.delete_thread(thread_id)
+                    continue
+                namespaces = self.conn.execute(
+                    "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+                ).fetchall()
+                for (checkpoint_ns,) in namespaces:
+                    self._compact(thread_id, checkpoint_ns, 1)
+
+    # async versions: the sqlite calls run in a thread, a commit or a lock held by
+    # another process must not stall the event loop
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: [*self.list(config, filter=filter, before=before, limit=limit)])
+        for item in items:
+            yield item
+
+    async def aget_delta_channel_history(
+        self, *, config: RunnableConfig, channels: Sequence[str]
+    ) -> Mapping[str, DeltaChannelHistory]:
+        return await asyncio.to_thread(self.get_delta_channel_history, config=config, channels=channels)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def aprune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        return await asyncio.to_thread(self.prune, thread_ids, strategy=strategy)
+
+    # same version format as InMemorySaver, so the two can be swapped
+    get_next_version = InMemorySaver.get_next_version
@@ -0,0 +1,112 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from agent_trace import TraceRecorder, _busy_ms, flame, load_records, main, percentile, percentiles, trace_config
+
+
+@tool
+async def web_search(query: str) -> str:
+    """Search the web"""
+    await asyncio.sleep(0.05)
+    if query == "fail":
+        raise ValueError("search is down")
+    return f"results for {query}"
+
+
+def chef_agent(fake_model):
+    calls = [{"name": "web_search", "args": {"query": q}, "id": q} for q in ("chicken", "rice")]
+    answers = [
+        AIMessage("", tool_calls=calls, usage_metadata={"input_tokens": 50, "output_tokens": 10, "total_tokens": 60}),
+        AIMessage("Chicken fried rice", usage_metadata={"input_tokens": 90, "output_tokens": 20, "total_tokens": 110}),
+    ]
+    return create_agent(model=fake_model(*answers), tools=[web_search], system_prompt="chef")
+
+
+def test_disabled_tracing_leaves_the_config_alone(monkeypatch):
+    monkeypatch.delenv("AGENT_TRACE", raising=False)
+    config = {"configurable": {"thread_id": "1"}}
+    assert trace_config(config) == config and "callbacks" not in trace_config()
+
+
+def test_agent_run_is_recorded(tmp_path, monkeypatch, fake_model):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv("AGENT_TRACE", str(path))
+    asyncio.run(chef_agent(fake_model).ainvoke({"messages": [("user", "chicken and rice?")]}, trace_config()))
+
+    records = load_records(str(path))
+    kinds = sorted((r["kind"], r["name"]) for r in records)
+    assert kinds == [
+        ("graph", "LangGraph"),
+        ("model", "FakeModel"), ("model", "FakeModel"),
+        ("node", "model"), ("node", "model"),
+        ("node", "tools"), ("node", "tools"),
+        ("tool", "web_search"), ("tool", "web_search"),
+    ]
+    assert len({r["trace_id"] for r in records}) == 1
+    assert sum(r.get("output_tokens", 0) for r in records) == 30
+    assert sorted(r["step"] for r in records if r["kind"] == "node") == [1, 2, 2, 3]
+    assert all(r["wall_ms"] >= 50 for r in records if r["kind"] == "tool")
+    assert all(r["queue_ms"] >= 0 for r in records)
+
+    # the two searches ran side by side: each started before the other ended,
+    # so the tools line is busy for less than their wall times added up
+    searches = [r for r in records if r["kind"] == "tool"]
+    ends = [r["start"] + r["wall_ms"] / 1000 for r in searches]
+    assert max(r["start"] for r in searches) < min(ends)
+    tools_line = next(line for line in flame(records).splitlines() if line.strip().startswith("tool:web_search"))
+    assert float(tools_line.split()[1]) < sum(r["wall_ms"] for r in searches)
+    assert "140/30" in percentiles(records)
+
+
+def test_tool_errors_are_recorded(tmp_path, fake_model):
+    path = tmp_path / "trace.jsonl"
+    calls = [{"name": "web_search", "args": {"query": "fail"}, "id": "1"}]
+    model = fake_model(AIMessage("", tool_calls=calls), "sorry")
+    agent = create_agent(model=model, tools=[web_search])
+    with pytest.raises(ValueError):
+        asyncio.run(agent.ainvoke({"messages": [("user", "x")]}, trace_config(path=str(path))))
+
+    # the failed run is still written out, with the error on every level
+    failed = {r["kind"]: r["error"] for r in load_records(str(path)) if "error" in r}
+    assert failed == {kind: "ValueError: search is down" for kind in ("graph", "node", "tool")}
+
+
+def test_runs_that_never_ended_are_dropped_with_their_trace():
+    recorder = TraceRecorder()
+    graph, other, node, chain, tool = (uuid4() for _ in range(5))
+    recorder.on_chain_start({}, {}, run_id=graph, name="LangGraph")
+    recorder.on_chain_start({}, {}, run_id=other, name="LangGraph")
+    recorder.on_chain_start({}, {}, run_id=node, parent_run_id=graph, name="tools", metadata={"langgraph_node": "tools"})
+    recorder.on_chain_start({}, {}, run_id=chain, parent_run_id=node, name="RunnableSequence")
+    # cancelled: neither the tool nor the chains around it get an end callback
+    recorder.on_tool_start({"name": "web_search"}, "rice", run_id=tool, parent_run_id=chain)
+
+    recorder.on_chain_end({}, run_id=graph)
+
+    assert [r["kind"] for r in recorder.records] == ["graph"]
+    assert set(recorder._runs) == {other} and set(recorder._parents) == {other}
+    recorder.on_chain_end({}, run_id=other)
+    assert recorder._runs == {} and recorder._parents == {} and recorder._pending == []
+
+
+def test_busy_time_and_cli(tmp_path, capsys, fake_model):
+    assert _busy_ms([(0, 1), (0.5, 2), (3, 4)]) == 3000
+    path = tmp_path / "trace.jsonl"
+    asyncio.run(chef_agent(fake_model).ainvoke({"messages": [("user", "x")]}, trace_config(path=str(path))))
+
+    main([str(path)])
+    out = capsys.readouterr().out
+    assert "9 records in 1 traces" in out and "graph:LangGraph" in out and "p99 ms" in out
+
+
+def test_percentile():
+    values = [float(v) for v in range(100, 0, -1)]
+    assert percentile(values, 0) == 1 and percentile(values, 100) == 100
+    assert percentile(values, 50) == 50.5
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 95) == 0.0
@@ -0,0 +1,90 @@
+import copy
+import operator
+from typing import Annotated, List, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from append_log import AppendLog, AppendLogChannel, append_log
+from sqlite_checkpointer import SqliteCheckpointer
+
+
+def looping_graph(reducer, appends, checkpointer=None):
+    class State(TypedDict):
+        nlist: Annotated[List[str], reducer]
+
+    graph = StateGraph(State)
+    graph.add_node("a", lambda state: {"nlist": [str(len(state["nlist"]))]})
+    graph.add_edge(START, "a")
+    graph.add_conditional_edges("a", lambda state: END if len(state["nlist"]) >= appends else "a")
+    return graph.compile(checkpointer=checkpointer)
+
+
+def test_old_logs_keep_their_items():
+    first = AppendLog(["a"])
+    second = first.extend(["b"])
+    third = second.extend(["c", "d"])
+    fork = second.extend(["x"])
+
+    assert first == ["a"] and second == ["a", "b"]
+    assert third == ["a", "b", "c", "d"] and fork == ["a", "b", "x"]
+    assert third[-1] == "d" and third[1:3] == ["b", "c"] and repr(fork) == "['a', 'b', 'x']"
+    # newest log extends the shared buffer in place
+    assert third._items is second._items and fork._items is not second._items
+    assert copy.copy(third) is third
+
+
+def test_same_results_as_operator_add():
+    expected = looping_graph(operator.add, 50).invoke({"nlist": ["start"]})
+    result = looping_graph(append_log, 50).invoke({"nlist": ["start"]})
+
+    assert result["nlist"] == expected["nlist"]
+    # the channel copy read by the conditional edge doesn't force a new buffer
+    assert len(result["nlist"]._items) == 50
+
+
+def test_parallel_branches_append_in_order():
+    class State(TypedDict):
+        nlist: Annotated[List[str], append_log]
+
+    graph = StateGraph(State)
+    for name in "abcd":
+        graph.add_node(name, lambda state, name=name: {"nlist": [name.upper()]})
+    graph.add_edge(START, "a")
+    graph.add_edge("a", "b")
+    graph.add_edge("a", "c")
+    graph.add_edge(["b", "c"], "d")
+    graph.add_edge("d", END)
+
+    assert graph.compile().invoke({"nlist": ["start"]})["nlist"] == ["start", "A", "B", "C", "D"]
+
+
+def test_checkpoints_store_deltas(tmp_path):
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3")) as saver:
+        app = looping_graph(append_log, 300, saver)
+        config = {"configurable": {"thread_id": "t"}, "recursion_limit": 1000}
+        app.invoke({"nlist": []}, config)
+        stored = saver.conn.execute("SELECT COUNT(*) FROM blobs WHERE channel = 'nlist' AND type != 'empty'").fetchone()[0]
+
+        state = app.get_state(config)
+        assert state.values["nlist"] == [str(i) for i in range(300)]
+        assert stored <= 1
+        # resumes from the stored deltas
+        resumed = looping_graph(append_log, 305, saver).invoke({"nlist": ["x"]}, config)["nlist"]
+        assert resumed[-6:] == ["299", "x", "301", "302", "303", "304"]
+
+
+def test_retention_keeps_what_the_log_is_rebuilt_from(tmp_path):
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3"), keep_last=3, compact_every=5) as saver:
+        config = {"configurable": {"thread_id": "t"}, "recursion_limit": 1000}
+        looping_graph(append_log, 40, saver).invoke({"nlist": []}, config)
+        # no snapshot yet: the whole history is needed
+        assert list(saver.list(config))[-1].metadata["step"] == -1
+
+        frequent = AppendLogChannel(snapshot_frequency=10)
+        looping_graph(frequent, 100, saver).invoke({"nlist": []}, {**config, "configurable": {"thread_id": "u"}})
+        kept = len(list(saver.list({"configurable": {"thread_id": "u"}})))
+        assert kept < 30
+
+        for thread_id, appends in (("t", 40), ("u", 100)):
+            state = looping_graph(append_log, appends, saver).get_state({"configurable": {"thread_id": thread_id}})
+            assert state.values["nlist"] == [str(i) for i in range(appends)]
@@ -0,0 +1,50 @@
+from diamond_graph import MODES, NodeTimings, branch_names, diamond_levels, run_diamond
+
+
+def test_notebook_graph():
+    for mode in MODES:
+        result, _ = run_diamond(mode=mode)
+        assert result["nlist"] == ["Initial String : ", "A", "B", "C", "BB", "CC", "D"]
+
+
+def most_at_once(timings, nodes):
+    """Largest number of the nodes' calls that had started and not yet ended at the same time"""
+    # an end sorts before a start at the same instant
+    events = sorted(
+        (t, step) for node, start, end in timings.records if node in nodes for t, step in ((start, 1), (end, -1))
+    )
+    running = peak = 0
+    for _, step in events:
+        running += step
+        peak = max(peak, running)
+    return peak
+
+
+def test_siblings_run_concurrently():
+    for mode in MODES:
+        timings = NodeTimings()
+        run_diamond(width=8, latency=0.2, mode=mode, workers=8, timings=timings)
+        # every sibling started before the first one was done
+        assert most_at_once(timings, diamond_levels(8)[1]) == 8, mode
+
+
+def test_workers_bound_the_branches():
+    for mode in MODES:
+        timings = NodeTimings()
+        result, _ = run_diamond(width=4, latency=0.05, mode=mode, workers=2, timings=timings)
+        assert len(result["nlist"]) == 1 + 1 + 4 + 4 + 1
+        # four siblings, two at a time: two waves
+        assert most_at_once(timings, diamond_levels(4)[1]) == 2, mode
+        assert timings.step_ms(diamond_levels(4))[1] >= 100, mode
+
+
+def test_slow_branch_shows_up_in_timings():
+    latency = {name: 0.01 for pair in branch_names(4) for name in pair}
+    latency["bb2"] = 0.15
+    timings = NodeTimings()
+    run_diamond(width=4, latency=latency, mode="async", timings=timings)
+
+    branches = timings.branch_ms(branch_names(4))
+    assert max(branches, key=branches.get) == "b2"
+    assert timings.by_node()["bb2"]["max_ms"] >= 150
+    assert "slowest branch  b2" in timings.report(4)
@@ -0,0 +1,101 @@
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import InMemorySaver
+
+from history_compaction import HistoryCompaction, is_pinned
+
+
+class EchoModel(GenericFakeChatModel):
+    """Answers every question with a fixed-size reply and keeps the prompts it got"""
+
+    prompts: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(messages)
+        answer = AIMessage(f"answer to {messages[-1].content} " + "blah " * 20)
+        return ChatResult(generations=[ChatGeneration(message=answer)])
+
+
+class Summarizer:
+    """Keeps every folded human message, like a summary that never forgets"""
+
+    def __init__(self):
+        self.calls = []
+        self.results = []
+
+    def __call__(self, summary, messages):
+        self.calls.append((summary, [m.content for m in messages]))
+        self.results.append(" | ".join(filter(None, [summary] + [m.content for m in messages if isinstance(m, HumanMessage)])))
+        return self.results[-1]
+
+
+def words(messages):
+    return sum(len(str(m.content).split()) + 3 for m in messages)
+
+
+def build(summarizer, max_tokens=200):
+    model = EchoModel(messages=iter([]), prompts=[])
+    compaction = HistoryCompaction(summarizer, max_tokens=max_tokens, count_tokens=words)
+    agent = create_agent(model=model, system_prompt="You are helpful.", middleware=[compaction], checkpointer=InMemorySaver())
+    return agent, model
+
+
+def test_thread_stays_under_budget_and_is_summarized_incrementally():
+    summarizer = Summarizer()
+    agent, model = build(summarizer)
+    config = {"configurable": {"thread_id": "1"}}
+
+    for i in range(40):
+        agent.invoke({"messages": [HumanMessage(f"question {i}")]}, config)
+
+    state = agent.get_state(config).values
+    assert words(state["messages"]) <= 200 + words(state["messages"][-2:])
+    assert max(words(prompt[1:]) for prompt in model.prompts) <= 200
+    # every call gets the previous summary and only messages it has not seen
+    folded = [content for _, contents in summarizer.calls for content in contents if content.startswith("question")]
+    assert folded == [f"question {i}" for i in range(len(folded))]
+    assert [summary for summary, _ in summarizer.calls] == [""] + summarizer.results[:-1]
+    assert state["summary"].startswith("question 0 | question 1")
+    assert "question 0" in model.prompts[-1][0].content
+
+
+def test_pinned_fact_reaches_the_model_after_it_was_folded():
+    agent, model = build(Summarizer())
+    config = {"configurable": {"thread_id": "1"}}
+    fact = "Remember: my name is hitman and my favourite colour is blue"
+
+    agent.invoke({"messages": [HumanMessage(fact)]}, config)
+    for i in range(30):
+        agent.invoke({"messages": [HumanMessage(f"question {i}")]}, config)
+
+    state = agent.get_state(config).values
+    assert fact not in [m.content for m in state["messages"]]
+    assert state["pinned"] == [fact]
+    system = model.prompts[-1][0].content
+    assert system.startswith("You are helpful.")
+    assert f"- {fact}" in system
+
+
+def test_window_starts_at_a_turn_so_tool_results_keep_their_call():
+    compaction = HistoryCompaction(lambda summary, messages: "s", max_tokens=20, keep_tokens=12, count_tokens=words)
+    messages = [
+        HumanMessage("what is the weather in Warsaw", id="1"),
+        AIMessage("", tool_calls=[{"name": "weather", "args": {"city": "Warsaw"}, "id": "c1"}], id="2"),
+        ToolMessage("sunny and 20 degrees", tool_call_id="c1", id="3"),
+        AIMessage("It is sunny", id="4"),
+        HumanMessage("and tomorrow", id="5"),
+    ]
+
+    update = compaction.before_model({"messages": messages}, None)
+
+    assert [m.id for m in update["messages"]] == ["1", "2", "3", "4"]
+    assert update["summary"] == "s"
+
+
+def test_pins_are_marked_by_the_user():
+    assert is_pinned(HumanMessage("important: I'm allergic to peanuts"))
+    assert is_pinned(HumanMessage("my name is hitman", additional_kwargs={"pin": True}))
+    assert not is_pinned(HumanMessage("what is important in a recipe?"))
+    assert not is_pinned(AIMessage("Remember to drink water"))
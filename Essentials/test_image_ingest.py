@@ -0,0 +1,88 @@
+import base64
+import struct
+import sys
+import zlib
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+import image_ingest
+from image_ingest import ImageIngestor, ImageTooLarge, dedupe_images
+
+
+def png(width, height, shade=0):
+    """A grey RGB PNG, written without Pillow"""
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + bytes([shade]) * 3 * width for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+def test_same_image_is_encoded_once_whatever_it_comes_from(tmp_path):
+    data = png(40, 30)
+    path = tmp_path / "upload.png"
+    path.write_bytes(data)
+    images = ImageIngestor()
+
+    first = images.ingest(memoryview(data))
+    again = [images.ingest(data), images.ingest(str(path)), images.ingest(memoryview(bytearray(data)))]
+
+    assert all(payload is first for payload in again)
+    assert base64.b64decode(first.base64) == data
+    assert (first.mime_type, first.width, first.height, first.resized) == ("image/png", 40, 30, False)
+    assert first.block == {"type": "image", "id": first.id, "base64": first.base64, "mime_type": "image/png"}
+    assert (images.stats()["hits"], images.stats()["misses"]) == (3, 1)
+
+
+def test_payloads_on_disk_are_not_encoded_again(tmp_path, monkeypatch):
+    data = png(8, 8)
+    ImageIngestor(cache_dir=str(tmp_path)).ingest(data)
+
+    def fail(*args):
+        raise AssertionError("encoded again")
+
+    monkeypatch.setattr(image_ingest, "encode", fail)
+    payload = ImageIngestor(cache_dir=str(tmp_path)).ingest(memoryview(data))
+
+    assert base64.b64decode(payload.base64) == data
+
+
+def test_directory_is_ingested_in_a_process_pool_with_duplicates_encoded_once(tmp_path):
+    for i in range(6):
+        (tmp_path / f"page{i}.png").write_bytes(png(16, 16, shade=i % 3))
+    images = ImageIngestor()
+
+    payloads = images.ingest_dir(tmp_path, workers=2)
+
+    assert [base64.b64decode(p.base64) for p in payloads] == [png(16, 16, shade=i % 3) for i in range(6)]
+    assert payloads[0] is payloads[3]
+    assert (images.stats()["misses"], images.stats()["hits"]) == (3, 3)
+    assert images.ingest_dir(tmp_path, workers=1) == payloads
+
+
+def test_image_over_the_bound_needs_pillow(monkeypatch):
+    # no Pillow: too many bytes is an error, too many pixels is sent as it is
+    monkeypatch.setitem(sys.modules, "PIL", None)
+
+    with pytest.raises(ImageTooLarge):
+        ImageIngestor(max_bytes=50).ingest(png(64, 64, shade=7))
+    payload = ImageIngestor(max_side=32).ingest(png(64, 64))
+    assert (payload.width, payload.resized) == (64, False)
+
+
+def test_repeated_image_is_sent_once_per_thread():
+    block = ImageIngestor().ingest(png(4, 4)).block
+    messages = [
+        HumanMessage([{"type": "text", "text": "Tell me about this paper"}, block]),
+        AIMessage("It is about cricket"),
+        HumanMessage([{"type": "text", "text": "and this one?"}, block]),
+    ]
+
+    deduped = dedupe_images(messages)
+
+    assert deduped[0].content[1] == {"type": "text", "text": f"[image {block['id']}, attached again later in the conversation]"}
+    assert deduped[1] is messages[1]
+    assert deduped[2] is messages[2]
@@ -0,0 +1,192 @@
+import asyncio
+from typing import Annotated, List, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import interrupt
+
+from append_log import append_log
+from interrupt_queue import ClaimLost, InterruptQueue, ResumeService
+from sqlite_checkpointer import SqliteCheckpointer
+
+
+class State(TypedDict):
+    nlist: Annotated[List[str], append_log]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def review_graph(checkpointer, calls, parallel=False):
+    def prepare(state):
+        calls.append(state["nlist"][-1])
+        return {"nlist": ["prepared"]}
+
+    def ask(name):
+        def node(state):
+            answer = interrupt(f"{name}: approve {state['nlist'][0]}?")
+            return {"nlist": [f"{name}={answer}"]}
+        return node
+
+    graph = StateGraph(State)
+    graph.add_node("prepare", prepare)
+    graph.add_edge(START, "prepare")
+    for name in ("legal", "finance") if parallel else ("review",):
+        graph.add_node(name, ask(name))
+        graph.add_edge("prepare", name)
+        graph.add_edge(name, END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def test_claims_leases_and_resume(tmp_path):
+    clock = FakeClock()
+    calls = []
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3")) as saver:
+        queue = InterruptQueue(str(tmp_path / "queue.sqlite3"), clock=clock)
+        service = ResumeService(review_graph(saver, calls), queue)
+
+        async def run():
+            for i in range(3):
+                await service.start(f"t{i}", {"nlist": [f"doc{i}"]})
+                clock.now += 1
+            assert [item.value for item in await service.list()] == [f"review: approve doc{i}?" for i in range(3)]
+
+            first = await service.claim("w1", limit=2, lease=60)
+            assert [item.thread_id for item in first] == ["t0", "t1"]
+            assert [item.thread_id for item in await service.list()] == ["t2"]
+
+            # w1 went away: after the lease its claims are up for grabs again
+            clock.now += 61
+            second = await service.claim("w2", limit=10)
+            assert sorted(item.thread_id for item in second) == ["t0", "t1", "t2"]
+
+            results = await service.resume_many([(item, "yes") for item in second])
+            assert results["t1"]["nlist"] == ["doc1", "prepared", "review=yes"]
+            assert queue.stats() == {"resumed": 3}
+            assert await service.list() == []
+
+        asyncio.run(run())
+        queue.close()
+    # resuming didn't run the steps before the interrupt again
+    assert calls == ["doc0", "doc1", "doc2"]
+
+
+def test_only_the_worker_holding_a_claim_finishes_it():
+    clock = FakeClock()
+    queue = InterruptQueue(":memory:", clock=clock)
+
+    class Interrupt:
+        def __init__(self, id):
+            self.id, self.value = id, id
+
+    queue.put("t", [Interrupt("i1"), Interrupt("i2")])
+    queue.claim("w1", lease=60)
+    clock.now += 61
+    queue.claim("w2", limit=1)
+
+    # i1 went to w2 after w1's lease ran out, w1 still holds i2
+    assert queue.finish("w1", ["i1", "i2"]) == ["i1"]
+    assert queue.stats() == {"claimed": 1, "resumed": 1}
+    assert queue.finish("w1", ["i1"], error="late") == ["i1"]
+    assert queue.finish("w2", ["i1"]) == []
+    assert queue.stats() == {"resumed": 2}
+
+
+def test_a_thread_whose_claim_was_taken_over_is_not_resumed(tmp_path):
+    clock = FakeClock()
+    calls = []
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3")) as saver:
+        queue = InterruptQueue(":memory:", clock=clock)
+        service = ResumeService(review_graph(saver, calls, parallel=True), queue)
+
+        async def run():
+            await service.start("t", {"nlist": ["contract"]})
+            stale = await service.claim("w1", lease=60)
+            # w1 stalls past its lease and w2 takes one of the two interrupts
+            clock.now += 61
+            taken = await service.claim("w2", limit=1)
+            result = (await service.resume_many([(item, "ok") for item in stale]))["t"]
+            return stale, taken, result
+
+        stale, taken, result = asyncio.run(run())
+
+        # past the lease neither claim can be renewed, though only one was taken
+        assert isinstance(result, ClaimLost)
+        assert result.interrupt_ids == [item.interrupt_id for item in stale]
+        # w2's claim is untouched, the one nobody took over is back in the queue
+        assert queue.stats() == {"claimed": 1, "pending": 1}
+        assert [item.interrupt_id for item in queue.pending()] == [
+            item.interrupt_id for item in stale if item.interrupt_id != taken[0].interrupt_id
+        ]
+        state = review_graph(saver, calls, parallel=True).get_state({"configurable": {"thread_id": "t"}})
+        assert state.values["nlist"] == ["contract", "prepared"]
+
+
+def test_resume_renews_a_claim_that_is_about_to_run_out(tmp_path):
+    clock = FakeClock()
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3")) as saver:
+        queue = InterruptQueue(":memory:", clock=clock)
+        service = ResumeService(review_graph(saver, []), queue, lease=60)
+
+        async def run():
+            await service.start("t", {"nlist": ["doc"]})
+            items = await service.claim("w1", lease=60)
+            clock.now += 59
+            # the renewed lease keeps w2 away until the resume is done
+            assert queue.renew("w1", [items[0].interrupt_id], lease=60) == [items[0].interrupt_id]
+            clock.now += 59
+            assert await service.claim("w2") == []
+            return (await service.resume_many([(item, "yes") for item in items]))["t"]
+
+        result = asyncio.run(run())
+
+        assert result["nlist"] == ["doc", "prepared", "review=yes"]
+        assert queue.stats() == {"resumed": 1}
+        assert service.lost == []
+
+
+def test_parallel_interrupts_are_answered_together(tmp_path):
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3")) as saver:
+        queue = InterruptQueue(":memory:")
+        service = ResumeService(review_graph(saver, [], parallel=True), queue)
+
+        async def run():
+            await service.start("t", {"nlist": ["contract"]})
+            items = await service.claim("w")
+            assert len(items) == 2
+            answers = [(item, "ok" if "legal" in item.value else "no") for item in items]
+            return (await service.resume_many(answers))["t"]
+
+        result = asyncio.run(run())
+        assert sorted(result["nlist"][2:]) == ["finance=no", "legal=ok"]
+        assert queue.stats() == {"resumed": 2}
+
+
+def test_resume_throughput_with_many_paused_threads(tmp_path):
+    threads = 1000
+    calls = []
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3")) as saver:
+        queue = InterruptQueue(str(tmp_path / "queue.sqlite3"))
+        service = ResumeService(review_graph(saver, calls), queue, concurrency=100)
+
+        async def run():
+            await asyncio.gather(*(service.start(f"t{i}", {"nlist": [f"doc{i}"]}) for i in range(threads)))
+            assert queue.stats() == {"pending": threads}
+
+            resumed = 0
+            while items := await service.claim("bulk", limit=250):
+                results = await service.resume_many([(item, "approved") for item in items])
+                resumed += len(results)
+            return resumed
+
+        resumed = asyncio.run(run())
+
+        assert resumed == threads
+        assert queue.stats() == {"resumed": threads}
+        assert len(calls) == threads
+        state = review_graph(saver, calls).get_state({"configurable": {"thread_id": "t737"}})
+        assert state.values["nlist"] == ["doc737", "prepared", "review=approved"]
@@ -0,0 +1,137 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.agents import create_agent
+from langchain_core.embeddings import Embeddings
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.tools import tool
+
+from response_cache import ResponseCache
+
+
+class WordEmbeddings(Embeddings):
+    """Bag of words over a tiny vocabulary, enough to tell questions apart"""
+
+    VOCAB = ["capital", "india", "france", "chicken", "rice", "broccoli", "recipe"]
+
+    def embed_query(self, text):
+        words = re.findall(r"[a-z]+", text.lower())
+        return [float(words.count(w)) for w in self.VOCAB]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_same_request_is_answered_from_the_cache(fake_model):
+    cache = ResponseCache()
+    model = fake_model("New Delhi", "Paris", "New Delhi, India", cache=cache)
+    question = [SystemMessage("Be brief"), HumanMessage("What is the capital of India?")]
+
+    assert model.invoke(question).content == "New Delhi"
+    assert model.invoke(question).content == "New Delhi"
+    assert model.invoke([HumanMessage("What is the capital of France?")]).content == "Paris"
+    # another system prompt is another request
+    assert model.invoke([SystemMessage("Be verbose"), question[1]]).content == "New Delhi, India"
+
+    assert len(model.calls) == 3
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 3)
+
+
+def test_tools_are_part_of_the_key(fake_model):
+    @tool
+    def web_search(query: str) -> str:
+        """Search the web"""
+        return query
+
+    @tool
+    def get_recipe(name: str) -> str:
+        """Look up a recipe"""
+        return name
+
+    cache = ResponseCache()
+    model = fake_model("a", "b", "c", cache=cache)
+    question = [HumanMessage("chicken and rice?")]
+    model.bind_tools([web_search]).invoke(question)
+    model.bind_tools([web_search]).invoke(question)
+    model.bind_tools([web_search, get_recipe]).invoke(question)
+    assert len(model.calls) == 2
+
+
+def test_ttl_eviction_and_restart(tmp_path, fake_model):
+    clock = FakeClock()
+    path = str(tmp_path / "responses.sqlite3")
+    cache = ResponseCache(path, ttl=60, max_size=2, clock=clock)
+    model = fake_model(*"abcdef", cache=cache)
+
+    for q in ["q1", "q2", "q1", "q3"]:
+        model.invoke(q)
+        clock.now += 1
+    # q2 was the least recently used
+    assert model.calls == ["q1", "q2", "q3"] and cache.stats()["evictions"] == 1
+    cache.close()
+
+    restarted = ResponseCache(path, ttl=60, max_size=2, clock=clock)
+    model = fake_model(*"xyz", cache=restarted)
+    assert model.invoke("q1").content == "a" and model.invoke("q2").content == "x"
+    clock.now += 61
+    assert model.invoke("q1").content == "y"
+
+
+def test_similar_questions_in_the_same_context(fake_model):
+    cache = ResponseCache(embeddings=WordEmbeddings(), threshold=0.9)
+    model = fake_model("New Delhi", "Paris", "Fried rice", "tool answer", "after tool", cache=cache)
+    system = SystemMessage("You are a geography tutor")
+
+    assert model.invoke([system, HumanMessage("What is the capital of India?")]).content == "New Delhi"
+    assert model.invoke([system, HumanMessage("capital of india??")]).content == "New Delhi"
+    assert model.invoke([system, HumanMessage("And the capital of France")]).content == "Paris"
+    # same words, another system prompt
+    assert model.invoke([SystemMessage("You are a chef"), HumanMessage("capital of India")]).content == "Fried rice"
+
+    # after a tool result only an exact match counts
+    call = AIMessage("", tool_calls=[{"name": "web_search", "args": {"query": "india"}, "id": "1"}])
+    history = [system, HumanMessage("capital of india"), call]
+    model.invoke(history + [ToolMessage("New Delhi", tool_call_id="1")])
+    assert model.invoke(history + [ToolMessage("Delhi", tool_call_id="1")]).content == "after tool"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["semantic_hits"], len(model.calls)) == (1, 1, 5)
+
+
+def test_agents_share_answers_across_threads(tmp_path, fake_model):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    model = fake_model("Chicken fried rice", "Stir fry", cache=cache)
+    agent = create_agent(model=model, tools=[], system_prompt="You are a personal chef.")
+
+    first = agent.invoke({"messages": [HumanMessage("I have chicken, rice, and broccoli")]})
+    second = agent.invoke({"messages": [HumanMessage("I have chicken, rice, and broccoli")]})
+
+    assert first["messages"][-1].content == second["messages"][-1].content == "Chicken fried rice"
+    assert first["messages"][-1].id != second["messages"][-1].id
+    assert len(model.calls) == 1
+
+
+def test_concurrent_lookups_are_all_counted():
+    cache = ResponseCache(embeddings=WordEmbeddings(), threshold=0.9)
+    # prompts serialized the way the model serializes them for the cache
+    cached, other = dumps([HumanMessage("capital of india")]), dumps([HumanMessage("capital of france")])
+    cache.update(cached, "model", [ChatGeneration(message=AIMessage("New Delhi"))])
+    prompts = [cached, other] * 200
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda prompt: cache.lookup(prompt, "model"), prompts))
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (200, 200)
+    assert len(cache._vectors) == 2
+
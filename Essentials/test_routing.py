@@ -0,0 +1,106 @@
+from typing import Annotated, List, Literal, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command
+
+from append_log import append_log
+from routing import MemoRouter, RoutingTable, memoize_router
+
+
+class State(TypedDict):
+    nlist: Annotated[List[str], append_log]
+
+
+def notebook_graph(routes):
+    builder = StateGraph(State)
+    builder.add_node("a", lambda state: None)
+    builder.add_node("b", lambda state: {"nlist": ["B"]})
+    builder.add_node("c", lambda state: {"nlist": ["C"]})
+    builder.add_edge(START, "a")
+    builder.add_edge("b", END)
+    builder.add_edge("c", END)
+    routes.add_to(builder, "a")
+    return builder
+
+
+def test_table_routes_and_counts():
+    routes = RoutingTable({"b": "b", "c": "c", "q": END}, field="nlist", index=-1)
+    graph = notebook_graph(routes).compile()
+
+    assert graph.invoke({"nlist": ["b"]})["nlist"] == ["b", "B"]
+    assert graph.invoke({"nlist": ["c"]})["nlist"] == ["c", "C"]
+    assert graph.invoke({"nlist": ["zzz"]})["nlist"] == ["zzz"]
+    assert graph.invoke({"nlist": ["q"]})["nlist"] == ["q"]
+    assert routes.stats() == {"b": 1, "c": 1, END: 2}
+    assert set(graph.get_graph().nodes) == {"__start__", "a", "b", "c", "__end__"}
+
+
+def test_unknown_targets_fail_at_compile():
+    routes = RoutingTable({"b": "b", "x": "missing"}, field="nlist", index=-1)
+    with pytest.raises(ValueError, match="missing"):
+        notebook_graph(routes).compile()
+
+    builder = StateGraph(State)
+    builder.add_node("a", lambda state: Command(goto=routes(state)), destinations=routes.targets)
+    builder.add_node("b", lambda state: None)
+    builder.add_edge(START, "a")
+    with pytest.raises(ValueError, match="missing"):
+        builder.compile()
+
+
+def test_command_node_with_table():
+    routes = RoutingTable({"b": "b", "q": END}, field="nlist", index=-1)
+
+    def node_a(state) -> Command[Literal["b", END]]:
+        return Command(update={"nlist": ["A"]}, goto=routes(state))
+
+    builder = StateGraph(State)
+    builder.add_node("a", node_a, destinations=routes.targets)
+    builder.add_node("b", lambda state: {"nlist": ["B"]})
+    builder.add_edge(START, "a")
+    graph = builder.compile()
+
+    assert graph.invoke({"nlist": ["b"]})["nlist"] == ["b", "A", "B"]
+    assert graph.invoke({"nlist": ["q"]})["nlist"] == ["q", "A"]
+
+
+def test_none_default_leaves_unknown_values_to_the_node():
+    routes = RoutingTable({"b": "b", "q": END}, field="nlist", index=-1, default=None)
+
+    def node_a(state) -> Command[Literal["b", END]]:
+        # what the table doesn't know goes to "b" here, the interrupt notebook asks a human
+        return Command(update={"nlist": ["A"]}, goto=routes(state) or "b")
+
+    builder = StateGraph(State)
+    builder.add_node("a", node_a, destinations=routes.targets)
+    builder.add_node("b", lambda state: {"nlist": ["B"]})
+    builder.add_edge(START, "a")
+    graph = builder.compile()
+
+    assert routes.targets == ("b", END)
+    assert graph.invoke({"nlist": ["zzz"]})["nlist"] == ["zzz", "A", "B"]
+    assert graph.invoke({"nlist": ["q"]})["nlist"] == ["q", "A"]
+    assert routes.stats() == {"b": 0, END: 1, None: 1}
+
+
+def test_memo_router_only_runs_for_new_keys():
+    calls = []
+
+    @memoize_router(lambda state: state["nlist"][-1], "mode", maxsize=2)
+    def route(state):
+        calls.append(state["nlist"][-1])
+        return "b" if state["nlist"][-1] == "b" else END
+
+    assert isinstance(route, MemoRouter)
+    for last in ["b", "b", "c", "b", "c", "q", "b"]:
+        route({"nlist": ["start", last], "mode": "x"})
+
+    # b, c, q fill a two-entry cache: b was evicted by q
+    assert calls == ["b", "c", "q", "b"]
+    stats = route.stats()
+    assert stats["routes"] == {"b": 4, END: 3}
+    assert (stats["cache_hits"], stats["cache_misses"], stats["size"]) == (3, 4, 2)
+
+    with pytest.raises(ValueError):
+        MemoRouter(route.router)
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.tools import tool
+from mcp.server.fastmcp import FastMCP
+
+from single_flight import SingleFlight
+
+
+class SlowSearch:
+    """Stands in for Tavily: counts the searches and holds each one until released"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def search(self, query):
+        self.calls.append(query)
+        self.release.wait(5)
+        return {"query": query, "results": [{"title": f"result for {query}"}]}
+
+    async def asearch(self, query):
+        self.calls.append(query)
+        await asyncio.sleep(0.05)
+        return {"query": query, "results": [{"title": f"result for {query}"}]}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_hundreds_of_threads_share_one_search():
+    backend = SlowSearch()
+    flight = SingleFlight(key=lambda query: query.lower().strip())
+    web_search = flight.wrap(backend.search)
+    queries = ["chicken rice broccoli recipes", "  Chicken rice broccoli recipes"] * 150
+
+    with ThreadPoolExecutor(max_workers=300) as pool:
+        futures = [pool.submit(web_search, q) for q in queries]
+        wait_for(lambda: flight.calls == 300)
+        backend.release.set()
+        results = [f.result() for f in futures]
+
+    assert backend.calls == ["chicken rice broccoli recipes"]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {
+        "calls": 300, "runs": 1, "shared": 299, "errors": 0, "in_flight": 0, "dedupe_ratio": 299 / 300,
+    }
+
+
+def test_hundreds_of_tasks_share_one_search_per_query():
+    backend = SlowSearch()
+    flight = SingleFlight()
+    search = flight.wrap(backend.asearch)
+
+    async def run():
+        return await asyncio.gather(*(search(f"recipes  with {i % 4}") for i in range(400)))
+
+    results = asyncio.run(run())
+
+    assert sorted(backend.calls) == [f"recipes  with {i}" for i in range(4)]
+    assert [r["query"] for r in results[:4]] == [f"recipes  with {i}" for i in range(4)]
+    assert flight.stats()["runs"] == 4
+    assert flight.stats()["dedupe_ratio"] == 0.99
+
+
+def test_failure_reaches_every_waiter_and_is_not_kept():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    @flight.wrap
+    def search(query):
+        calls.append(query)
+        started.set()
+        release.wait(5)
+        if len(calls) == 1:
+            raise TimeoutError("tavily timed out")
+        return {"query": query}
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        first = pool.submit(search, "rice")
+        started.wait(5)
+        futures = [pool.submit(search, "rice") for _ in range(19)]
+        wait_for(lambda: flight.calls == 20)
+        release.set()
+        errors = [f.exception() for f in [first, *futures]]
+
+    assert all(isinstance(e, TimeoutError) for e in errors)
+    assert search("rice") == {"query": "rice"}
+    assert flight.stats()["errors"] == 1
+    assert flight.stats()["runs"] == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    backend = SlowSearch()
+    flight = SingleFlight()
+    search = flight.wrap(backend.asearch)
+
+    async def run():
+        first = asyncio.create_task(search("rice"))
+        second = asyncio.create_task(search("rice"))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run())["query"] == "rice"
+    assert backend.calls == ["rice"]
+    assert flight.stats()["errors"] == 0
+
+
+def test_wrapped_functions_keep_their_tool_schema():
+    backend = SlowSearch()
+    flight = SingleFlight()
+
+    def web_search(query: str, max_results: int = 5) -> dict:
+        """Search the web for information"""
+        return {"query": query, "max_results": max_results}
+
+    async def search_web(query: str) -> dict:
+        """Search the web for the information."""
+        return await backend.asearch(query)
+
+    chef_tool = tool(flight.wrap(web_search))
+    mcp = FastMCP("test")
+    mcp.tool()(flight.wrap(search_web))
+
+    async def run():
+        [listed] = await mcp.list_tools()
+        answers = await asyncio.gather(*(mcp.call_tool("search_web", {"query": "pasta"}) for _ in range(200)))
+        return listed, answers
+
+    listed, answers = asyncio.run(run())
+
+    assert chef_tool.description == "Search the web for information"
+    assert chef_tool.invoke({"query": "rice"}) == {"query": "rice", "max_results": 5}
+    assert set(chef_tool.args) == {"query", "max_results"}
+    assert listed.name == "search_web"
+    assert listed.inputSchema["required"] == ["query"]
+    assert len(answers) == 200
+    assert backend.calls == ["pasta"]
@@ -0,0 +1,166 @@
+import asyncio
+import operator
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, List, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command, interrupt
+
+from sqlite_checkpointer import SqliteCheckpointer
+
+
+class State(TypedDict):
+    steps: Annotated[List[str], operator.add]
+
+
+def build_graph(checkpointer):
+    graph = StateGraph(State)
+    graph.add_node("a", lambda state: {"steps": ["a"]})
+    graph.add_node("b", lambda state: {"steps": ["b"]})
+    graph.add_edge(START, "a")
+    graph.add_edge("a", "b")
+    graph.add_edge("b", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def test_state_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cp.sqlite3")
+    with SqliteCheckpointer(path) as saver:
+        build_graph(saver).invoke({"steps": []}, config("t1"))
+        assert saver.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    with SqliteCheckpointer(path) as saver:
+        app = build_graph(saver)
+        assert app.get_state(config("t1")).values["steps"] == ["a", "b"]
+        app.invoke({"steps": ["c"]}, config("t1"))
+        assert app.get_state(config("t1")).values["steps"] == ["a", "b", "c", "a", "b"]
+        history = list(app.get_state_history(config("t1")))
+        assert len(history) == 8
+        assert history[0].parent_config == history[1].config
+
+
+def test_interrupt_and_resume(tmp_path):
+    def ask(state):
+        answer = interrupt("name?")
+        return {"steps": [answer]}
+
+    graph = StateGraph(State)
+    graph.add_node("ask", ask)
+    graph.add_edge(START, "ask")
+    path = str(tmp_path / "cp.sqlite3")
+
+    with SqliteCheckpointer(path) as saver:
+        result = graph.compile(checkpointer=saver).invoke({"steps": []}, config("t1"))
+        assert result["__interrupt__"][0].value == "name?"
+
+    with SqliteCheckpointer(path) as saver:
+        result = graph.compile(checkpointer=saver).invoke(Command(resume="Ada"), config("t1"))
+        assert result["steps"] == ["Ada"]
+
+
+def test_retention_keeps_the_newest_checkpoints(tmp_path):
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3"), keep_last=3, compact_every=5) as saver:
+        app = build_graph(saver)
+        for _ in range(10):
+            app.invoke({"steps": []}, config("t1"))
+
+        history = list(app.get_state_history(config("t1")))
+        assert 3 <= len(history) < 8
+        assert app.get_state(config("t1")).values["steps"] == ["a", "b"] * 10
+
+        saver.compact(keep_last=1, vacuum=True)
+        assert len(list(app.get_state_history(config("t1")))) == 1
+        assert app.get_state(config("t1")).values["steps"] == ["a", "b"] * 10
+        # only the blobs of the remaining checkpoint are left
+        versions = saver.get_tuple(config("t1")).checkpoint["channel_versions"]
+        assert saver.conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == len(versions)
+
+
+def test_latest_lookup_uses_the_primary_key(tmp_path):
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3")) as saver:
+        plan = saver.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1",
+            ("t", ""),
+        ).fetchall()
+    detail = " ".join(row[-1] for row in plan)
+    assert "USING PRIMARY KEY" in detail
+    assert "TEMP B-TREE" not in detail
+
+
+def test_list_limit_is_applied_in_sql(tmp_path):
+    with SqliteCheckpointer(str(tmp_path / "cp.sqlite3")) as saver:
+        app = build_graph(saver)
+        for _ in range(5):
+            app.invoke({"steps": []}, config("t1"))
+        statements = []
+        saver.conn.set_trace_callback(statements.append)
+
+        newest = list(saver.list(config("t1"), limit=2))
+        inputs = list(saver.list(config("t1"), filter={"source": "input"}, limit=2))
+        saver.conn.set_trace_callback(None)
+        history = list(app.get_state_history(config("t1")))
+
+    assert [c.config for c in newest] == [c.config for c in history[:2]]
+    assert any("LIMIT 2" in statement for statement in statements)
+    assert [c.metadata["source"] for c in inputs] == ["input", "input"]
+
+
+def test_async_methods_keep_sqlite_off_the_event_loop(tmp_path):
+    class RecordingCheckpointer(SqliteCheckpointer):
+        def put(self, *args):
+            threads.add(threading.current_thread())
+            return super().put(*args)
+
+        def get_tuple(self, config):
+            threads.add(threading.current_thread())
+            return super().get_tuple(config)
+
+    threads = set()
+    with RecordingCheckpointer(str(tmp_path / "cp.sqlite3")) as saver:
+        app = build_graph(saver)
+
+        async def run():
+            await app.ainvoke({"steps": []}, config("t1"))
+            return (await app.aget_state(config("t1"))).values, threading.current_thread()
+
+        values, loop_thread = asyncio.run(run())
+
+    assert values["steps"] == ["a", "b"]
+    assert threads and loop_thread not in threads
+
+
+def test_many_threads_and_deep_histories(tmp_path):
+    path = str(tmp_path / "cp.sqlite3")
+    with SqliteCheckpointer(path) as saver:
+        app = build_graph(saver)
+
+        def run(thread):
+            for _ in range(5):
+                app.invoke({"steps": []}, config(f"t{thread}"))
+
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(run, range(50)))
+
+        for thread in range(50):
+            assert app.get_state(config(f"t{thread}")).values["steps"] == ["a", "b"] * 5
+
+        for _ in range(300):
+            app.invoke({"steps": []}, config("deep"))
+
+        start = time.perf_counter()
+        for _ in range(100):
+            state = app.get_state(config("deep"))
+        per_lookup = (time.perf_counter() - start) / 100
+        assert len(state.values["steps"]) == 600
+        assert per_lookup < 0.05
+
+    rows = sqlite3.connect(path).execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0]
+    assert rows == 51